@@ -0,0 +1,301 @@
+"""
+Jobs de scoring en masse : saisons entières ou backlog d'une ligue, hors requête HTTP.
+
+    POST   /jobs/score?kind=club          corps CSV (text/csv) ou JSON {"fixtures": [...]}
+    GET    /jobs/{id}                     statut et progression
+    GET    /jobs/{id}/result              CSV : colonnes soumises + p_*, value_*/stake_* (si cotes), model
+    DELETE /jobs/{id}                     annule / supprime
+
+Chaque job vit dans data/cache/jobs/<id>/ :
+  job.json          état (queued, running, done, error, cancelled), lignes et morceaux traités
+  input.csv         matchs soumis
+  parts/NNNNN.csv   résultat de chaque morceau de CHUNK_SIZE lignes (écrit atomiquement)
+  result.csv        concaténation finale
+
+Les morceaux sont lus en flux (pd.read_csv(chunksize=...)) et scorés d'un bloc par
+ligue avec fixtures.batch.score_batch (un predict_proba par ligue et par morceau).
+BATCH_WORKERS jobs tournent en parallèle, au plus MAX_PENDING en attente.
+Au redémarrage, les jobs queued/running sont repris au premier morceau manquant.
+
+Features : état courant des équipes pour les matchs à venir ; pour ceux datés au
+plus tard au jour de l'état, recalcul à la date du match (fixtures.batch.AsOfHistory,
+chargé une fois par historique), comme fixtures/predict_fixtures.py.
+La colonne features_date du résultat indique laquelle a servi.
+"""
+
+import io
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import pandas as pd
+
+from fixtures.batch import AsOfHistory, past_mask, score_batch
+
+ROOT = Path(__file__).resolve().parent.parent
+JOBS_DIR = Path(os.environ.get("BATCH_JOBS_DIR", ROOT / "data" / "cache" / "jobs"))
+
+BATCH_WORKERS = int(os.environ.get("BATCH_WORKERS", "2"))
+CHUNK_SIZE = int(os.environ.get("BATCH_CHUNK_SIZE", "5000"))
+MAX_PENDING = int(os.environ.get("BATCH_MAX_PENDING", "20"))
+MAX_ROWS = int(os.environ.get("BATCH_MAX_ROWS", "2000000"))
+JOB_TTL = float(os.environ.get("BATCH_JOB_TTL", str(7 * 86400)))
+
+KINDS = ("club", "international")
+ACTIVE = ("queued", "running")
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+
+def _write_atomic(path: Path, text: str):
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(text, encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def parse_fixtures(body: bytes, content_type: str) -> pd.DataFrame:
+    """Corps de POST /jobs/score -> DataFrame (au moins home, away). ValueError si illisible."""
+    if "json" in (content_type or ""):
+        data = json.loads(body or b"{}")
+        rows = data.get("fixtures") if isinstance(data, dict) else data
+        if not isinstance(rows, list):
+            raise ValueError('JSON attendu : {"fixtures": [{"league", "date", "home", "away", ...}]}')
+        df = pd.DataFrame(rows)
+    else:
+        df = pd.read_csv(io.BytesIO(body))
+    missing = {"home", "away"} - set(df.columns)
+    if missing:
+        raise ValueError(f"Colonnes manquantes : {', '.join(sorted(missing))}")
+    if df.empty:
+        raise ValueError("Aucun match fourni.")
+    if len(df) > MAX_ROWS:
+        raise ValueError(f"{len(df)} lignes > BATCH_MAX_ROWS={MAX_ROWS}")
+    return df
+
+
+# ============================================================
+# SCORING D'UN MORCEAU
+# ============================================================
+
+_histories: Dict[tuple, AsOfHistory] = {}
+_histories_lock = threading.Lock()
+
+
+def history_for(kind: str, store, chunk: pd.DataFrame) -> Optional[AsOfHistory]:
+    """Historique à la date des matchs, seulement si le morceau contient des matchs passés (un par version du CSV)."""
+    if not past_mask(store, chunk).any():
+        return None
+    key = (kind, store.source_sha256, store.as_of)
+    with _histories_lock:
+        if key not in _histories:
+            _histories.clear()
+            _histories[key] = AsOfHistory.load(kind)
+        return _histories[key]
+
+
+def score_chunk(model_set, kind: str, chunk: pd.DataFrame) -> pd.DataFrame:
+    """Un predict_proba par ligue (clubs) ou pour tout le morceau (sélections)."""
+    if kind == "international":
+        if model_set.international is None:
+            raise RuntimeError(model_set.errors.get("international", "modèle international non chargé"))
+        model, feature_cols, store = model_set.international
+        out, _ = score_batch(model, feature_cols, store, chunk, history=history_for(kind, store, chunk))
+        out["model"] = "international"
+        return out
+
+    if model_set.club is None:
+        raise RuntimeError(model_set.errors.get("club", "modèle clubs non chargé"))
+    registry, store = model_set.club
+    chunk = chunk.reset_index(drop=True)
+    history = history_for(kind, store, chunk)
+    leagues = chunk["league"].astype(str) if "league" in chunk.columns else pd.Series("", index=chunk.index)
+    parts = []
+    for league, group in chunk.groupby(leagues, sort=False):
+        name, model = registry.model_for(league or None)
+        out, _ = score_batch(model, registry.features, store, group, history=history)
+        out.index = group.index
+        out["model"] = name
+        parts.append(out)
+    return pd.concat(parts).sort_index()
+
+
+# ============================================================
+# FILE DE JOBS
+# ============================================================
+
+class JobQueue:
+    """Jobs persistés sur disque, exécutés sur un pool borné de BATCH_WORKERS threads."""
+
+    def __init__(self, get_models: Callable[[], Any], root: Path = JOBS_DIR, workers: int = BATCH_WORKERS,
+                 chunk_size: int = CHUNK_SIZE):
+        self.get_models = get_models
+        self.root = root
+        self.chunk_size = chunk_size
+        self._pool = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="batch-job")
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._cancel: set = set()
+        self._lock = threading.Lock()
+        self._started = False
+
+    # ---------- état ----------
+
+    def _dir(self, job_id: str) -> Path:
+        return self.root / job_id
+
+    def _save(self, job: Dict[str, Any]):
+        job["updated_at"] = _now()
+        _write_atomic(self._dir(job["id"]) / "job.json", json.dumps(job, indent=2))
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job is not None else None
+
+    def list_jobs(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return sorted((dict(j) for j in self._jobs.values()), key=lambda j: j["created_at"], reverse=True)
+
+    def result_path(self, job_id: str) -> Path:
+        return self._dir(job_id) / "result.csv"
+
+    # ---------- soumission / reprise ----------
+
+    def submit(self, fixtures: pd.DataFrame, kind: str = "club") -> Dict[str, Any]:
+        if kind not in KINDS:
+            raise ValueError(f"kind doit valoir {' ou '.join(KINDS)}")
+        with self._lock:
+            pending = sum(j["status"] in ACTIVE for j in self._jobs.values())
+        if pending >= MAX_PENDING:
+            raise OverflowError(f"{pending} jobs en cours ou en attente (BATCH_MAX_PENDING={MAX_PENDING})")
+
+        job_id = uuid.uuid4().hex[:12]
+        path = self._dir(job_id)
+        (path / "parts").mkdir(parents=True)
+        fixtures.to_csv(path / "input.csv", index=False)
+        rows = len(fixtures)
+        job = {
+            "id": job_id,
+            "kind": kind,
+            "status": "queued",
+            "rows": rows,
+            "rows_done": 0,
+            "chunks": -(-rows // self.chunk_size),
+            "chunks_done": 0,
+            "chunk_size": self.chunk_size,
+            "model_versions": [],
+            "created_at": _now(),
+            "seconds": 0.0,
+            "error": None,
+        }
+        self._save(job)
+        with self._lock:
+            self._jobs[job_id] = job
+        self._pool.submit(self._run, job_id)
+        return dict(job)
+
+    def start(self):
+        """Recharge les jobs du disque, relance ceux interrompus, purge les vieux terminés."""
+        if self._started:
+            return
+        self._started = True
+        if not self.root.exists():
+            return
+        now = time.time()
+        for state in sorted(self.root.glob("*/job.json")):
+            try:
+                job = json.loads(state.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                continue
+            if job["status"] not in ACTIVE and now - state.stat().st_mtime > JOB_TTL:
+                shutil.rmtree(state.parent, ignore_errors=True)
+                continue
+            with self._lock:
+                self._jobs[job["id"]] = job
+            if job["status"] in ACTIVE:
+                job["status"] = "queued"
+                self._pool.submit(self._run, job["id"])
+
+    def cancel(self, job_id: str) -> bool:
+        """Annule un job actif (au prochain morceau) ; supprime un job terminé."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return False
+            if job["status"] in ACTIVE:
+                self._cancel.add(job_id)
+                return True
+            del self._jobs[job_id]
+        shutil.rmtree(self._dir(job_id), ignore_errors=True)
+        return True
+
+    # ---------- exécution ----------
+
+    def _run(self, job_id: str):
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None or job["status"] not in ACTIVE:
+            return
+        path = self._dir(job_id)
+        parts = path / "parts"
+        t0 = time.perf_counter() - job["seconds"]
+        try:
+            model_set = self.get_models()     # une seule version pour tous les morceaux de ce run
+            if model_set.version not in job["model_versions"]:
+                job["model_versions"].append(model_set.version)
+            job["status"] = "running"
+            self._save(job)
+
+            reader = pd.read_csv(path / "input.csv", chunksize=job["chunk_size"])
+            for i, chunk in enumerate(reader):
+                part = parts / f"{i:05d}.csv"
+                if part.exists():         # déjà fait avant un redémarrage
+                    continue
+                if job_id in self._cancel:
+                    job["status"] = "cancelled"
+                    break
+                out = score_chunk(model_set, job["kind"], chunk)
+                _write_atomic(part, out.to_csv(index=False))
+                job["chunks_done"] = i + 1
+                job["rows_done"] = min(job["rows"], (i + 1) * job["chunk_size"])
+                job["seconds"] = round(time.perf_counter() - t0, 3)
+                self._save(job)
+
+            if job["status"] == "running":
+                self._merge(path)
+                job["status"] = "done"
+        except Exception as e:
+            job["status"] = "error"
+            job["error"] = f"{type(e).__name__}: {e}"
+        finally:
+            self._cancel.discard(job_id)
+            job["seconds"] = round(time.perf_counter() - t0, 3)
+            self._save(job)
+
+    def _merge(self, path: Path):
+        """parts/*.csv -> result.csv (en-tête du premier morceau seulement), puis suppression des morceaux."""
+        tmp = path / "result.csv.tmp"
+        with open(tmp, "w", encoding="utf-8") as out:
+            for n, part in enumerate(sorted((path / "parts").glob("*.csv"))):
+                with open(part, encoding="utf-8") as f:
+                    header = f.readline()
+                    if n == 0:
+                        out.write(header)
+                    shutil.copyfileobj(f, out)
+        os.replace(tmp, path / "result.csv")
+        shutil.rmtree(path / "parts", ignore_errors=True)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            by_status: Dict[str, int] = {}
+            for j in self._jobs.values():
+                by_status[j["status"]] = by_status.get(j["status"], 0) + 1
+        return {"dir": str(self.root), "chunk_size": self.chunk_size, "jobs": by_status}
@@ -0,0 +1,116 @@
+"""
+GET conditionnels : ETag, If-None-Match -> 304 et Cache-Control par endpoint.
+
+L'ETag d'une réponse ne dépend que de :
+  - l'endpoint et ses paramètres de requête,
+  - la version des modèles (bundle mmap actif, sinon empreinte des .pkl),
+  - l'empreinte des résultats API-FOOTBALL dont elle dérive (upstream.data_version).
+
+Il se calcule donc AVANT d'exécuter l'endpoint dès que ces résultats sont encore
+frais dans le cache amont : un client qui renvoie le même If-None-Match reçoit
+un 304 sans appel amont, sans calcul et sans sérialisation.
+"""
+
+import functools
+import hashlib
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from fastapi import Request, Response
+
+from api import upstream
+from api.upstream import staleness_fields
+from features.mmap_bundle import MODELS_DIR, open_current
+
+# Cache-Control selon la volatilité des données
+CACHE_CONTROL = {
+    "predict_one": "public, max-age=3600",               # calcul pur sur les paramètres
+    "predict_one_api_fixture": "private, max-age=15",    # suit les cotes (/odds)
+    "teams_search": "public, max-age=86400",             # référentiel d'équipes
+}
+NO_STORE = "no-store"
+
+Dependency = Tuple[str, Dict[str, Any]]   # (route API-FOOTBALL, paramètres)
+
+_model_version: Optional[str] = None
+
+
+def model_version() -> str:
+    """Version du bundle actif, sinon empreinte (nom, taille, mtime) des modèles."""
+    global _model_version
+    if _model_version is None:
+        bundle = open_current()
+        if bundle is not None:
+            _model_version = bundle.version
+        else:
+            h = hashlib.blake2b(digest_size=8)
+            for f in sorted(MODELS_DIR.glob("*.pkl")):
+                st = f.stat()
+                h.update(f"{f.name}:{st.st_size}:{st.st_mtime_ns};".encode())
+            _model_version = h.hexdigest()
+    return _model_version
+
+
+def set_model_version(version: str):
+    global _model_version
+    _model_version = version
+
+
+def make_etag(*parts: Any) -> str:
+    return 'W/"' + hashlib.blake2b(repr(parts).encode("utf-8"), digest_size=12).hexdigest() + '"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    tags = {t.strip() for t in header.split(",")}
+    return "*" in tags or etag in tags or etag.removeprefix("W/") in tags
+
+
+def not_modified(etag: str, cache_control: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": cache_control})
+
+
+def conditional(name: str, deps: Optional[Callable[..., List[Dependency]]] = None):
+    """
+    Décorateur d'endpoint (paramètres request: Request et response: Response requis).
+    deps(**kwargs) liste les requêtes API-FOOTBALL dont dépend la réponse.
+    """
+    cache_control = CACHE_CONTROL[name]
+
+    def decorator(endpoint):
+        @functools.wraps(endpoint)
+        def wrapper(*args, **kwargs):
+            request: Request = kwargs["request"]
+            response: Response = kwargs["response"]
+            query = tuple(sorted(request.query_params.multi_items()))
+            dependencies = deps(**kwargs) if deps else []
+
+            def etag_for(fresh_only: bool) -> Optional[str]:
+                versions = [upstream.data_version(route, params, fresh_only) for route, params in dependencies]
+                if any(v is None for v in versions):
+                    return None
+                return make_etag(name, query, model_version(), versions)
+
+            # 1) Données amont encore fraîches : on peut répondre sans rien exécuter
+            etag = etag_for(fresh_only=True)
+            if etag is not None and etag_matches(request, etag):
+                return not_modified(etag, cache_control)
+
+            resp = endpoint(*args, **kwargs)
+
+            # 2) Après exécution : réponse d'erreur ou de secours -> pas de cache
+            failed = getattr(resp, "status", "ok") != "ok" or staleness_fields()["stale"]
+            etag = None if failed else etag_for(fresh_only=False)
+            if etag is None:
+                (resp if isinstance(resp, Response) else response).headers["Cache-Control"] = NO_STORE
+                return resp
+            if etag_matches(request, etag):
+                return not_modified(etag, cache_control)
+
+            headers = resp.headers if isinstance(resp, Response) else response.headers
+            headers["ETag"] = etag
+            headers["Cache-Control"] = cache_control
+            return resp
+        return wrapper
+    return decorator
@@ -0,0 +1,67 @@
+"""
+Réponses JSON rapides pour les endpoints qui renvoient de longues listes
+(/teams_search, /predict_international).
+
+Chemin par défaut de FastAPI : objets Pydantic -> re-validation via
+response_model -> jsonable_encoder -> json.dumps. Pour des centaines d'items,
+c'est la sérialisation qui domine le CPU.
+
+Chemin rapide (opt-in, API_FAST_JSON=1) :
+  - on renvoie directement des dicts déjà construits par nos soins (pas de re-validation),
+  - encodés par orjson s'il est installé (sinon json standard),
+  - compressés en gzip ou brotli si API_COMPRESS=1 et la réponse dépasse API_COMPRESS_MIN_BYTES.
+
+Mesure avant/après :
+    python tooling/bench_serialization.py
+"""
+
+import gzip
+import json
+import os
+from typing import Any
+
+from fastapi import Request, Response
+
+try:
+    import orjson  # type: ignore
+except ImportError:  # dépendance optionnelle
+    orjson = None
+
+try:
+    import brotli  # type: ignore
+except ImportError:  # dépendance optionnelle
+    brotli = None
+
+FAST_JSON = os.environ.get("API_FAST_JSON", "0") == "1"
+COMPRESS = os.environ.get("API_COMPRESS", "0") == "1"
+COMPRESS_MIN_BYTES = int(os.environ.get("API_COMPRESS_MIN_BYTES", "2048"))
+
+
+def dumps(payload: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def compress(body: bytes, accept_encoding: str):
+    """Retourne (body, content-encoding ou None) selon ce qu'accepte le client."""
+    if not COMPRESS or len(body) < COMPRESS_MIN_BYTES:
+        return body, None
+    accepted = {part.split(";")[0].strip() for part in accept_encoding.lower().split(",")}
+    if brotli is not None and "br" in accepted:
+        return brotli.compress(body, quality=4), "br"
+    if "gzip" in accepted:
+        return gzip.compress(body, compresslevel=5), "gzip"
+    return body, None
+
+
+def fast_response(request: Request, payload: Any, status_code: int = 200) -> Response:
+    """
+    Réponse JSON pré-encodée : court-circuite la validation response_model
+    et l'encodeur par défaut de FastAPI.
+    """
+    body, encoding = compress(dumps(payload), request.headers.get("accept-encoding", ""))
+    headers = {"Vary": "Accept-Encoding"}
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    return Response(content=body, status_code=status_code, media_type="application/json", headers=headers)
@@ -0,0 +1,222 @@
+"""
+Cache persistant de résolution des matchs pour /find_fixture.
+
+Un fixture_id programmé ne change pas avant le coup d'envoi : inutile de refaire
+jusqu'à dix appels API-FOOTBALL pour le même duel. On garde :
+  - nom d'équipe normalisé -> team_id        (TEAM_TTL, 30 jours par défaut)
+  - paire {team_id, team_id} -> fixture      (id, coup d'envoi, statut)
+
+Expiration d'une fixture selon son statut :
+  - à venir / en cours (NS, TBD, 1H, HT...) : coup d'envoi + LIVE_GRACE
+  - terminée (FT, AET, PEN...)               : FINISHED_TTL (un prochain duel peut être programmé)
+  - reportée / annulée / autre               : OTHER_TTL
+
+Alimentation opportuniste : chaque réponse /fixtures et /fixtures/headtohead vue
+par api/upstream.py (observe) enregistre les matchs à venir ou en cours de ses
+paires (le plus proche par paire) ; un match vu terminé retire son entrée.
+Un match terminé n'est servi que s'il a été résolu par /find_fixture lui-même
+via "last" après un "next" vide (no_next) : sinon /find_fixture repasse par
+next -> last -> date du jour, et un match à venir garde la priorité.
+
+Lecture en mémoire d'abord, puis SQLite (data/cache/fixture_resolution.sqlite,
+partagé entre workers et conservé entre redémarrages) : aucun appel réseau.
+"""
+
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+ROOT = Path(__file__).resolve().parent.parent
+DB_PATH = Path(os.environ.get("FIXTURE_CACHE_DB", ROOT / "data" / "cache" / "fixture_resolution.sqlite"))
+
+TEAM_TTL = float(os.environ.get("FIXTURE_CACHE_TEAM_TTL", str(30 * 86400)))
+LIVE_GRACE = 3 * 3600
+FINISHED_TTL = 6 * 3600
+OTHER_TTL = 3600
+
+UPCOMING = {"TBD", "NS"}
+LIVE = {"1H", "HT", "2H", "ET", "BT", "P", "SUSP", "INT", "LIVE"}
+FINISHED = {"FT", "AET", "PEN", "AWD", "WO"}
+
+
+def normalize_name(name: str) -> str:
+    """'  Paris Saint-Germain ' -> 'paris saint germain' (accents, casse, ponctuation)."""
+    text = unicodedata.normalize("NFKD", str(name))
+    text = "".join(c for c in text if not unicodedata.combining(c)).casefold()
+    return re.sub(r"[^a-z0-9]+", " ", text).strip()
+
+
+def pair_key(a: int, b: int) -> str:
+    """Paire non orientée : /find_fixture accepte les deux sens."""
+    lo, hi = sorted((int(a), int(b)))
+    return f"{lo}-{hi}"
+
+
+def expires_at(status: str, kickoff: Optional[float], now: float) -> float:
+    if status in UPCOMING | LIVE and kickoff is not None:
+        return kickoff + LIVE_GRACE
+    if status in FINISHED:
+        return now + FINISHED_TTL
+    return now + OTHER_TTL
+
+
+def _rank(status: str, kickoff: Optional[float]) -> Tuple[int, float]:
+    """Plus petit = préféré : prochain match le plus proche, puis dernier joué."""
+    if status in UPCOMING | LIVE:
+        return 0, kickoff if kickoff is not None else float("inf")
+    if status in FINISHED:
+        return 1, -(kickoff or 0.0)
+    return 2, 0.0
+
+
+def kickoff_of(fixture: Dict[str, Any]) -> Optional[float]:
+    if fixture.get("timestamp"):
+        return float(fixture["timestamp"])
+    if fixture.get("date"):
+        try:
+            return datetime.fromisoformat(str(fixture["date"])).timestamp()
+        except ValueError:
+            return None
+    return None
+
+
+class FixtureCache:
+    def __init__(self, path: Path = DB_PATH):
+        self.path = path
+        self._teams: Dict[str, Tuple[int, float]] = {}
+        self._pairs: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self.hits = 0
+        self.misses = 0
+        self.observed = 0
+
+    # ---------- stockage ----------
+
+    def _conn(self) -> sqlite3.Connection:
+        if self._db is None:
+            if str(self.path) != ":memory:":
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+            db = sqlite3.connect(str(self.path), check_same_thread=False, timeout=5)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("CREATE TABLE IF NOT EXISTS teams (name TEXT PRIMARY KEY, team_id INTEGER, expires REAL)")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS fixtures (pair TEXT PRIMARY KEY, fixture_id INTEGER, "
+                "kickoff REAL, status TEXT, expires REAL, no_next INTEGER DEFAULT 0)"
+            )
+            self._db = db
+        return self._db
+
+    # ---------- équipes ----------
+
+    def team_id(self, name: str) -> Optional[int]:
+        key = normalize_name(name)
+        now = time.time()
+        with self._lock:
+            entry = self._teams.get(key)
+            if entry is None:
+                row = self._conn().execute("SELECT team_id, expires FROM teams WHERE name = ?", (key,)).fetchone()
+                if row is not None:
+                    entry = self._teams[key] = (int(row[0]), float(row[1]))
+        if entry is None or entry[1] <= now:
+            return None
+        return entry[0]
+
+    def remember_team(self, name: str, team_id: int):
+        key = normalize_name(name)
+        entry = (int(team_id), time.time() + TEAM_TTL)
+        with self._lock:
+            self._teams[key] = entry
+            with self._conn() as db:
+                db.execute("INSERT OR REPLACE INTO teams VALUES (?, ?, ?)", (key, *entry))
+
+    # ---------- matchs ----------
+
+    def _pair(self, key: str, now: float) -> Optional[Dict[str, Any]]:
+        """Entrée mémoire, relue dans SQLite si absente ou expirée (un autre worker a pu l'écrire). Sous verrou."""
+        entry = self._pairs.get(key)
+        if entry is None or entry["expires"] <= now:
+            row = self._conn().execute(
+                "SELECT fixture_id, kickoff, status, expires, no_next FROM fixtures WHERE pair = ?", (key,)
+            ).fetchone()
+            if row is not None:
+                entry = self._pairs[key] = dict(zip(("fixture_id", "kickoff", "status", "expires", "no_next"), row))
+        return entry
+
+    @staticmethod
+    def _usable(entry: Optional[Dict[str, Any]], now: float) -> bool:
+        """Servable sans appel : à venir / en cours, ou terminé résolu via last après un next vide."""
+        if entry is None or entry["expires"] <= now:
+            return False
+        return entry["status"] in UPCOMING | LIVE or bool(entry.get("no_next"))
+
+    def fixture_for(self, home_id: int, away_id: int) -> Optional[int]:
+        now = time.time()
+        with self._lock:
+            entry = self._pair(pair_key(home_id, away_id), now)
+        if not self._usable(entry, now):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return int(entry["fixture_id"])
+
+    def remember_fixture(self, home_id: int, away_id: int, fixture_id: int, kickoff: Optional[float], status: str,
+                         no_next: bool = False):
+        """no_next=True : match terminé renvoyé par /find_fixture (h2h last) faute de match à venir."""
+        key = pair_key(home_id, away_id)
+        now = time.time()
+        candidate = {"fixture_id": int(fixture_id), "kickoff": kickoff, "status": status,
+                     "expires": expires_at(status, kickoff, now), "no_next": int(no_next)}
+        with self._lock:
+            current = self._pair(key, now)
+            if self._usable(current, now) and current["fixture_id"] != candidate["fixture_id"]:
+                if _rank(status, kickoff) >= _rank(current["status"], current["kickoff"]):
+                    return
+            self._pairs[key] = candidate
+            with self._conn() as db:
+                db.execute("INSERT OR REPLACE INTO fixtures VALUES (?, ?, ?, ?, ?, ?)",
+                           (key, candidate["fixture_id"], kickoff, status, candidate["expires"], candidate["no_next"]))
+
+    def forget_fixture(self, home_id: int, away_id: int, fixture_id: int):
+        """Retire l'entrée de la paire si elle pointe sur ce match (vu terminé, reporté...)."""
+        key = pair_key(home_id, away_id)
+        with self._lock:
+            current = self._pair(key, time.time())
+            if current is None or current["fixture_id"] != int(fixture_id) or current.get("no_next"):
+                return
+            self._pairs.pop(key, None)
+            with self._conn() as db:
+                db.execute("DELETE FROM fixtures WHERE pair = ? AND fixture_id = ?", (key, int(fixture_id)))
+
+    def observe_fixtures(self, params: Dict[str, Any], data: Any):
+        """Observateur upstream : enregistre les matchs à venir / en cours d'une réponse /fixtures*."""
+        for item in (data or {}).get("response", []) or []:
+            fixture = item.get("fixture", {}) or {}
+            teams = item.get("teams", {}) or {}
+            fid = fixture.get("id")
+            home_id = (teams.get("home") or {}).get("id")
+            away_id = (teams.get("away") or {}).get("id")
+            if not (fid and home_id and away_id):
+                continue
+            status = str((fixture.get("status") or {}).get("short") or "")
+            if status in UPCOMING | LIVE:
+                self.remember_fixture(home_id, away_id, fid, kickoff_of(fixture), status)
+            else:
+                self.forget_fixture(home_id, away_id, fid)
+            self.observed += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "path": str(self.path),
+            "teams_in_memory": len(self._teams),
+            "pairs_in_memory": len(self._pairs),
+            "hits": self.hits,
+            "misses": self.misses,
+            "observed": self.observed,
+        }
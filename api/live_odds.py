@@ -0,0 +1,179 @@
+"""
+Flux temps réel des cotes (Server-Sent Events).
+
+Au lieu que chaque client rappelle /predict_one_api_fixture en boucle, les
+clients s'abonnent à une liste de fixture_id :
+
+    GET /live/odds?fixtures=1035037,1035038      (text/event-stream)
+
+Un seul poller (OddsHub) interroge /odds une fois par fixture suivi toutes les
+LIVE_POLL_INTERVAL secondes, quel que soit le nombre d'abonnés, et ne pousse
+que les probabilités qui ont bougé d'au moins LIVE_MIN_DELTA :
+
+    event: snapshot   -> état complet (à l'abonnement, ou première cote connue)
+    event: delta      -> seulement les champs modifiés
+
+Le hub vit dans la boucle asyncio du worker : avec plusieurs workers uvicorn,
+chacun a son poller (la charge amont reste indépendante du nombre de clients).
+"""
+
+import asyncio
+import contextvars
+import json
+import os
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from fastapi import Request
+
+from api.odds import parse_odds
+
+POLL_INTERVAL = float(os.environ.get("LIVE_POLL_INTERVAL", "30"))
+MIN_DELTA = float(os.environ.get("LIVE_MIN_DELTA", "0.001"))
+KEEPALIVE = 15.0
+QUEUE_SIZE = 256
+MAX_FIXTURES = 50
+
+FIELDS = ("p_home", "p_draw", "p_away", "btts_yes", "over25")
+
+Event = Tuple[str, Dict[str, Any]]
+
+
+def snapshot_from_odds(data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Probabilités arrondies d'une réponse /odds, None si pas de 1N2 exploitable."""
+    odds = parse_odds(data)
+    if odds["p_home"] is None:
+        return None
+    return {f: (round(odds[f], 4) if odds[f] is not None else None) for f in FIELDS}
+
+
+def diff(previous: Optional[Dict[str, Any]], current: Dict[str, Any], min_delta: float = MIN_DELTA) -> Dict[str, Any]:
+    """Champs de current qui diffèrent de previous d'au moins min_delta."""
+    if previous is None:
+        return dict(current)
+    changed = {}
+    for f, value in current.items():
+        old = previous.get(f)
+        if (old is None) != (value is None) or (value is not None and abs(value - old) >= min_delta):
+            changed[f] = value
+    return changed
+
+
+class OddsHub:
+    """Abonnements par fixture + un poller partagé qui diffuse les changements."""
+
+    def __init__(self, fetch: Callable[[int], Dict[str, Any]], interval: float = POLL_INTERVAL):
+        self.fetch = fetch              # fixture_id -> réponse /odds (appel bloquant)
+        self.interval = interval
+        self.subscribers: Dict[int, Set[asyncio.Queue]] = {}
+        self.last: Dict[int, Dict[str, Any]] = {}
+        self.polls = 0
+        self.events = 0
+        self._task: Optional[asyncio.Task] = None
+
+    # ---------- abonnements ----------
+
+    def subscribe(self, fixture_ids: Iterable[int]) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+        for fid in fixture_ids:
+            self.subscribers.setdefault(fid, set()).add(queue)
+            if fid in self.last:
+                queue.put_nowait(("snapshot", {"fixture_id": fid, **self.last[fid]}))
+        if self._task is None or self._task.done():
+            # Contexte vide : le poller survit à la requête qui l'a lancé, il ne doit
+            # hériter ni de sa trace ni de son suivi des résultats périmés
+            self._task = contextvars.Context().run(asyncio.get_running_loop().create_task, self._run())
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue, fixture_ids: Iterable[int]):
+        for fid in fixture_ids:
+            subs = self.subscribers.get(fid)
+            if subs is None:
+                continue
+            subs.discard(queue)
+            if not subs:
+                del self.subscribers[fid]
+                self.last.pop(fid, None)
+
+    # ---------- poller ----------
+
+    async def _run(self):
+        while self.subscribers:
+            await self.poll_once()
+            await asyncio.sleep(self.interval)
+
+    def _snapshot(self, fixture_id: int) -> Optional[Dict[str, Any]]:
+        return snapshot_from_odds(self.fetch(fixture_id))
+
+    async def poll_once(self):
+        fids = list(self.subscribers)
+        results = await asyncio.gather(
+            *(asyncio.to_thread(self._snapshot, fid) for fid in fids), return_exceptions=True
+        )
+        self.polls += 1
+        for fid, snap in zip(fids, results):
+            # Erreur amont ou pas encore de cotes : on garde le dernier état connu
+            if isinstance(snap, BaseException) or snap is None or fid not in self.subscribers:
+                continue
+            previous = self.last.get(fid)
+            changed = diff(previous, snap)
+            if not changed:
+                continue
+            # Base de comparaison = ce que les abonnés ont reçu : un champ sous MIN_DELTA
+            # n'est pas avancé, sa dérive cumulée finira par dépasser le seuil
+            self.last[fid] = {**(previous or {}), **changed}
+            event = "snapshot" if previous is None else "delta"
+            self.publish(fid, (event, {"fixture_id": fid, **changed, "ts": round(time.time(), 3)}))
+
+    def publish(self, fixture_id: int, event: Event):
+        for queue in self.subscribers.get(fixture_id, ()):
+            if queue.full():
+                queue.get_nowait()   # client trop lent : on jette le plus ancien
+            queue.put_nowait(event)
+            self.events += 1
+
+    def stats(self) -> Dict[str, Any]:
+        clients = {id(q) for subs in self.subscribers.values() for q in subs}
+        return {
+            "fixtures": len(self.subscribers),
+            "clients": len(clients),
+            "polls": self.polls,
+            "events": self.events,
+            "interval_s": self.interval,
+        }
+
+
+# ============================================================
+# SSE
+# ============================================================
+
+def parse_fixture_ids(raw: str) -> List[int]:
+    """'1,2,3' -> [1, 2, 3] (doublons retirés) ; ValueError si invalide."""
+    ids = list(dict.fromkeys(int(part) for part in raw.split(",") if part.strip()))
+    if not ids:
+        raise ValueError("aucun fixture_id")
+    if len(ids) > MAX_FIXTURES:
+        raise ValueError(f"au plus {MAX_FIXTURES} fixtures par abonnement")
+    return ids
+
+
+def format_event(event: str, payload: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(payload, separators=(',', ':'))}\n\n"
+
+
+async def event_stream(hub: OddsHub, request: Request, fixture_ids: List[int]):
+    """Générateur SSE d'un client ; se désabonne à la déconnexion."""
+    queue = hub.subscribe(fixture_ids)
+    try:
+        yield "retry: 5000\n\n"
+        while True:
+            try:
+                event, payload = await asyncio.wait_for(queue.get(), timeout=KEEPALIVE)
+            except asyncio.TimeoutError:
+                if await request.is_disconnected():
+                    break
+                yield ": keepalive\n\n"
+                continue
+            yield format_event(event, payload)
+    finally:
+        hub.unsubscribe(queue, fixture_ids)
@@ -1,21 +1,49 @@
 import os
+from pathlib import Path
 from typing import Optional, List
 from datetime import datetime, timezone
 
+import pandas as pd
 import requests
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request, Response
+from fastapi.responses import FileResponse, StreamingResponse
 from pydantic import BaseModel
+from starlette.concurrency import run_in_threadpool
+
+from api import upstream
+from api.batch_jobs import KINDS, JobQueue, parse_fixtures
+from api.conditional import conditional, set_model_version
+from api.fast_response import FAST_JSON, fast_response
+from api.fixture_cache import FixtureCache, kickoff_of
+from api.live_odds import OddsHub, event_stream, parse_fixture_ids
+from api.model_reload import ModelManager, ModelVersionMiddleware
+from api.tracing import TracingMiddleware, span
+from api.odds import odds_params, parse_odds
+from api.odds_bulk import BulkRefresher, ingest as ingest_odds
+from api.profiler import ProfiledRoute, check_admin, profile_process, profile_response, request_sampler
+from api.upstream import staleness_fields, with_deadline, with_staleness
+
+from features.goals import goals_markets_from_1x2
+from fixtures.batch import score_batch
+
+ROOT = Path(__file__).resolve().parent.parent
+MODELS_DIR = ROOT / "models"
 
 # ============================================================
 # Config API-FOOTBALL
 # ============================================================
 
 API_FOOTBALL_KEY = os.environ.get("API_FOOTBALL_KEY")
-API_FOOTBALL_BASE = "https://v3.football.api-sports.io"
+API_FOOTBALL_BASE = os.environ.get("API_FOOTBALL_BASE", "https://v3.football.api-sports.io")
 
 if API_FOOTBALL_KEY is None:
     print("⚠️  ATTENTION : la variable d'environnement API_FOOTBALL_KEY n'est pas définie.")
 
+# Résolution équipes / matchs de /find_fixture, alimentée par toutes les réponses /fixtures*
+fixture_cache = FixtureCache()
+upstream.observe("/fixtures", fixture_cache.observe_fixtures)
+upstream.observe("/fixtures/headtohead", fixture_cache.observe_fixtures)
+
 
 # ============================================================
 # MODELES DE REPONSE (comme ton app iOS attend)
@@ -35,11 +63,17 @@ class PredictionDTO(BaseModel):
     correct_score: Optional[str] = None
     top_scorers: Optional[List[str]] = None
 
+    # Renseignés si API-FOOTBALL est indisponible et qu'un résultat en cache est servi
+    stale: Optional[bool] = None
+    data_age_seconds: Optional[float] = None
+
 
 class FindFixtureResponse(BaseModel):
     status: str
     fixture_id: Optional[int]
     message: Optional[str]
+    stale: Optional[bool] = None
+    data_age_seconds: Optional[float] = None
 
 
 # ----------- MODELES POUR LA RECHERCHE D'EQUIPES -----------
@@ -56,6 +90,47 @@ class TeamSearchResponse(BaseModel):
     status: str
     teams: List[TeamShort]
     message: Optional[str] = None
+    stale: Optional[bool] = None
+    data_age_seconds: Optional[float] = None
+
+
+# ----------- MODELES POUR LES SELECTIONS NATIONALES (BATCH) -----------
+
+class InternationalFixture(BaseModel):
+    home: str
+    away: str
+    home_odds: Optional[float] = None
+    draw_odds: Optional[float] = None
+    away_odds: Optional[float] = None
+
+
+class InternationalBatchRequest(BaseModel):
+    fixtures: List[InternationalFixture]
+
+
+class InternationalPrediction(BaseModel):
+    home: str
+    away: str
+    prediction: str
+    p_home: float
+    p_draw: float
+    p_away: float
+
+    # Présents seulement si les 3 cotes sont fournies
+    value_home: Optional[float] = None
+    value_draw: Optional[float] = None
+    value_away: Optional[float] = None
+    stake_home: Optional[float] = None
+    stake_draw: Optional[float] = None
+    stake_away: Optional[float] = None
+
+
+class InternationalBatchResponse(BaseModel):
+    status: str
+    as_of: Optional[str] = None          # date du dernier match connu dans l'état des équipes
+    per_prediction_us: float = 0.0       # coût moyen par prono (µs)
+    predictions: List[InternationalPrediction]
+    message: Optional[str] = None
 
 
 # ============================================================
@@ -63,6 +138,19 @@ class TeamSearchResponse(BaseModel):
 # ============================================================
 
 app = FastAPI()
+# Chaque endpoint peut être échantillonné par le profileur (éteint par défaut, voir api/profiler.py)
+app.router.route_class = ProfiledRoute
+
+# Modèles rechargés à chaud (voir api/model_reload.py) ; l'ETag suit la version active
+models = ModelManager(on_swap=lambda ms: set_model_version(ms.version))
+app.add_middleware(ModelVersionMiddleware, manager=models)
+# Server-Timing par requête (spans api_*/cache_*/model), ajouté en dernier = le plus externe
+app.add_middleware(TracingMiddleware)
+
+
+@app.on_event("startup")
+def start_model_watcher():
+    models.start()
 
 
 @app.get("/")
@@ -70,6 +158,18 @@ def read_root():
     return {"status": "ok", "message": "IA Prono Foot API en ligne"}
 
 
+@app.get("/upstream_status")
+def upstream_status():
+    """Etat des disjoncteurs API-FOOTBALL par route."""
+    return {
+        "status": "ok",
+        "breakers": upstream.breakers_status(),
+        "live": live_hub.stats(),
+        "fixture_cache": fixture_cache.stats(),
+        "odds_bulk": odds_refresher.stats(),
+    }
+
+
 # ============================================================
 # UTILITAIRES API-FOOTBALL
 # ============================================================
@@ -86,27 +186,27 @@ def get_apifootball_headers() -> dict:
 def find_team_id(team_name: str) -> Optional[int]:
     """
     Cherche l'ID d'une équipe via /teams?search=...
-    Retourne l'ID ou None si introuvable.
+    Retourne l'ID ou None si introuvable (résultat gardé dans fixture_cache).
     """
+    with span("fixture_cache", lookup="team"):
+        team_id = fixture_cache.team_id(team_name)
+    if team_id is not None:
+        return team_id
+
     headers = get_apifootball_headers()
     params = {"search": team_name}
 
-    r = requests.get(f"{API_FOOTBALL_BASE}/teams", headers=headers, params=params, timeout=15)
-    r.raise_for_status()
-    data = r.json()
+    data = upstream.get(API_FOOTBALL_BASE, "/teams", headers, params)
 
     resp = data.get("response", [])
     if not resp:
         return None
 
     team_obj = resp[0].get("team", {})
-    return team_obj.get("id")
-
-
-def decimal_to_prob(odd: Optional[float]) -> Optional[float]:
-    if odd is None or odd <= 1.0:
-        return None
-    return 1.0 / odd
+    team_id = team_obj.get("id")
+    if team_id is not None:
+        fixture_cache.remember_team(team_name, team_id)
+    return team_id
 
 
 # ============================================================
@@ -114,7 +214,10 @@ def decimal_to_prob(odd: Optional[float]) -> Optional[float]:
 # ============================================================
 
 @app.get("/predict_one", response_model=PredictionDTO)
+@conditional("predict_one")
 def predict_one(
+    request: Request,
+    response: Response,
     home: str,
     away: str,
     odds_home: Optional[float] = None,
@@ -148,10 +251,12 @@ def predict_one(
     probs = {"1": p_home, "N": p_draw, "2": p_away}
     prediction = max(probs, key=probs.get)
 
-    # Petites heuristiques provisoires pour BTTS / Over / Score exact
-    btts_yes = min(0.85, max(0.25, (p_home + p_away) * 0.7))
-    over25 = min(0.85, max(0.25, (p_home + p_away) * 0.6))
-    correct_score = "2-1" if p_home >= p_away else "1-2"
+    # BTTS / Over 2.5 / Score exact dérivés de la même grille de scores Poisson
+    with span("model_goals"):
+        goals = goals_markets_from_1x2([p_home], [p_away])[0]
+    btts_yes = goals["btts_yes"]
+    over25 = goals["over2.5"]
+    correct_score = goals["correct_score"]
 
     return PredictionDTO(
         prediction=prediction,
@@ -172,7 +277,10 @@ def predict_one(
 # ============================================================
 
 @app.get("/teams_search", response_model=TeamSearchResponse)
-def teams_search(name: str):
+@conditional("teams_search", deps=lambda name, **_: [("/teams", {"search": name})])
+@with_staleness
+@with_deadline()
+def teams_search(name: str, request: Request, response: Response):
     """
     Wrap de /teams?search=... pour l'app iOS.
     Retourne une liste simplifiée d'équipes possibles.
@@ -181,30 +289,21 @@ def teams_search(name: str):
         headers = get_apifootball_headers()
         params = {"search": name}
 
-        r = requests.get(
-            f"{API_FOOTBALL_BASE}/teams",
-            headers=headers,
-            params=params,
-            timeout=15,
-        )
-        r.raise_for_status()
-        data = r.json()
+        data = upstream.get(API_FOOTBALL_BASE, "/teams", headers, params)
 
         resp = data.get("response", [])
-        teams: List[TeamShort] = []
+        teams: List[dict] = []
 
         for item in resp:
             team = item.get("team", {}) or {}
             league_info = item.get("league", {}) or item.get("country", {}) or {}
-            teams.append(
-                TeamShort(
-                    id=team.get("id"),
-                    name=team.get("name", ""),
-                    country=team.get("country"),
-                    league=league_info.get("name"),
-                    logo=team.get("logo"),
-                )
-            )
+            teams.append({
+                "id": team.get("id"),
+                "name": team.get("name", ""),
+                "country": team.get("country"),
+                "league": league_info.get("name"),
+                "logo": team.get("logo"),
+            })
 
         if not teams:
             return TeamSearchResponse(
@@ -213,9 +312,12 @@ def teams_search(name: str):
                 message=f"Aucune équipe trouvée pour '{name}' dans API-FOOTBALL.",
             )
 
+        if FAST_JSON:
+            return fast_response(request, {"status": "ok", "teams": teams, "message": None, **staleness_fields()})
+
         return TeamSearchResponse(
             status="ok",
-            teams=teams,
+            teams=[TeamShort(**t) for t in teams],
             message=None,
         )
 
@@ -238,11 +340,14 @@ def teams_search(name: str):
 # ============================================================
 
 @app.get("/find_fixture", response_model=FindFixtureResponse)
+@with_staleness
+@with_deadline()
 def find_fixture(home: str, away: str):
     """
     1) Cherche l'ID de l'équipe domicile via /teams?search=home
     2) Cherche l'ID de l'équipe extérieure via /teams?search=away
-    3) Essaye H2H (next, last) puis fixtures de la date du jour
+    3) Match à venir / en cours déjà connu pour cette paire (fixture_cache) : réponse sans appel amont
+    4) Sinon essaye H2H (next, last) puis fixtures de la date du jour
     """
     try:
         headers = get_apifootball_headers()
@@ -265,35 +370,39 @@ def find_fixture(home: str, away: str):
                 message=f"Équipe extérieure '{away}' introuvable dans API-FOOTBALL.",
             )
 
-        # Helper H2H deux sens
-        def call_h2h(extra_params: dict) -> Optional[int]:
+        # 3) Paire déjà résolue : match à venir / en cours, ou dernier match faute de prochain
+        with span("fixture_cache", lookup="pair"):
+            cached_id = fixture_cache.fixture_for(home_id, away_id)
+        if cached_id is not None:
+            return FindFixtureResponse(status="ok", fixture_id=cached_id, message=None)
+
+        # Helper H2H deux sens (renvoie le bloc "fixture" du premier match trouvé)
+        def call_h2h(extra_params: dict) -> Optional[dict]:
             for pair in (f"{home_id}-{away_id}", f"{away_id}-{home_id}"):
                 params = {"h2h": pair, "timezone": "Europe/Paris"}
                 params.update(extra_params)
 
-                r = requests.get(
-                    f"{API_FOOTBALL_BASE}/fixtures/headtohead",
-                    headers=headers,
-                    params=params,
-                    timeout=15,
-                )
-                r.raise_for_status()
-                data = r.json()
+                data = upstream.get(API_FOOTBALL_BASE, "/fixtures/headtohead", headers, params)
                 resp = data.get("response", [])
                 if not resp:
                     continue
                 fixture = resp[0].get("fixture", {})
-                fid = fixture.get("id")
-                if fid:
-                    return fid
+                if fixture.get("id"):
+                    return fixture
             return None
 
-        # 3a) prochain match à venir
-        fixture_id = call_h2h({"next": 1})
+        # 3a) prochain match à venir (mis en cache par l'observateur upstream)
+        fixture = call_h2h({"next": 1})
+        fixture_id = fixture.get("id") if fixture else None
 
-        # 3b) dernier match joué
+        # 3b) dernier match joué : seul cas où un match terminé est mis en cache
         if fixture_id is None:
-            fixture_id = call_h2h({"last": 1})
+            fixture = call_h2h({"last": 1})
+            if fixture:
+                fixture_id = fixture.get("id")
+                status = str((fixture.get("status") or {}).get("short") or "")
+                fixture_cache.remember_fixture(home_id, away_id, fixture_id, kickoff_of(fixture), status,
+                                               no_next=True)
 
         # 4) date du jour
         if fixture_id is None:
@@ -305,14 +414,7 @@ def find_fixture(home: str, away: str):
                     "date": today_str,
                     "timezone": "Europe/Paris",
                 }
-                r = requests.get(
-                    f"{API_FOOTBALL_BASE}/fixtures",
-                    headers=headers,
-                    params=params,
-                    timeout=15,
-                )
-                r.raise_for_status()
-                data = r.json()
+                data = upstream.get(API_FOOTBALL_BASE, "/fixtures", headers, params)
                 for item in data.get("response", []):
                     teams = item.get("teams", {})
                     home_t = teams.get("home", {}).get("id")
@@ -363,7 +465,10 @@ def find_fixture(home: str, away: str):
 # ============================================================
 
 @app.get("/predict_one_api_fixture", response_model=PredictionDTO)
-def predict_one_api_fixture(fixture_id: int):
+@conditional("predict_one_api_fixture", deps=lambda fixture_id, **_: [("/odds", odds_params(fixture_id))])
+@with_staleness
+@with_deadline()
+def predict_one_api_fixture(fixture_id: int, request: Request, response: Response):
     """
     Prono PRO à partir d'un fixture_id.
     Essaie d'utiliser les cotes API-FOOTBALL (1N2, BTTS, Over 2.5).
@@ -373,122 +478,23 @@ def predict_one_api_fixture(fixture_id: int):
     p_home = 0.45
     p_draw = 0.27
     p_away = 0.28
-    btts_yes = 0.60
-    over25 = 0.58
+    btts_yes = None   # cotes BTTS si dispo, sinon grille Poisson
+    over25 = None     # cotes Over 2.5 si dispo, sinon grille Poisson
     comment_parts: list[str] = []
 
     headers = get_apifootball_headers()
 
     try:
         # 1) On va chercher les cotes de ce fixture
-        params = {"fixture": fixture_id, "timezone": "Europe/Paris"}
-        r = requests.get(
-            f"{API_FOOTBALL_BASE}/odds",
-            headers=headers,
-            params=params,
-            timeout=15,
-        )
-        r.raise_for_status()
-        data = r.json()
+        data = upstream.get(API_FOOTBALL_BASE, "/odds", headers, odds_params(fixture_id))
 
-        resp = data.get("response", [])
-        if resp:
-            odds_block = resp[0]
-            bookmakers = odds_block.get("bookmakers", [])
-
-            if bookmakers:
-                bookmaker = bookmakers[0]
-                bets = bookmaker.get("bets", [])
-
-                used_1x2 = False
-                used_btts = False
-                used_over = False
-
-                odd_home = odd_draw = odd_away = None
-
-                for bet in bets:
-                    name = str(bet.get("name", "")).strip().lower()
-
-                    # --- Match Winner / 1X2 / Full Time Result ---
-                    if (not used_1x2 and
-                        name in ["match winner",
-                                 "1x2",
-                                 "full time result",
-                                 "match result"]):
-                        inv_home = inv_draw = inv_away = None
-
-                        for val in bet.get("values", []):
-                            label = str(val.get("value", "")).strip().lower()
-                            try:
-                                odd = float(val.get("odd"))
-                            except (TypeError, ValueError):
-                                continue
-
-                            if label in ("home", "1"):
-                                inv_home = decimal_to_prob(odd)
-                                odd_home = odd
-                            elif label in ("draw", "x", "n", "d"):
-                                inv_draw = decimal_to_prob(odd)
-                                odd_draw = odd
-                            elif label in ("away", "2"):
-                                inv_away = decimal_to_prob(odd)
-                                odd_away = odd
-
-                        if inv_home and inv_draw and inv_away:
-                            s = inv_home + inv_draw + inv_away
-                            p_home = inv_home / s
-                            p_draw = inv_draw / s
-                            p_away = inv_away / s
-                            used_1x2 = True
-                            comment_parts.append(
-                                "Probabilités PRO basées sur les cotes 1N2 de API-FOOTBALL "
-                                f"(1={odd_home}, N={odd_draw}, 2={odd_away})."
-                            )
-
-                    # --- Both Teams To Score ---
-                    if (not used_btts and
-                        ("both teams to score" in name or "btts" in name)):
-                        yes_prob = None
-                        for val in bet.get("values", []):
-                            label = str(val.get("value", "")).strip().lower()
-                            try:
-                                odd = float(val.get("odd"))
-                            except (TypeError, ValueError):
-                                continue
-                            if label == "yes":
-                                yes_prob = decimal_to_prob(odd)
-                        if yes_prob is not None:
-                            btts_yes = yes_prob
-                            used_btts = True
-                            comment_parts.append(
-                                "BTTS basé sur les cotes 'Both Teams To Score'."
-                            )
-
-                    # --- Over/Under buts (on cherche Over 2.5) ---
-                    if (not used_over and
-                        ("over/under" in name
-                         or "total goals" in name
-                         or "goals over/under" in name)):
-                        over_prob = None
-                        for val in bet.get("values", []):
-                            label = str(val.get("value", "")).lower()
-                            try:
-                                odd = float(val.get("odd"))
-                            except (TypeError, ValueError):
-                                continue
-
-                            # Formats possibles : "Over 2.5", "2.5", ">2.5"
-                            if "over" in label and "2.5" in label:
-                                over_prob = decimal_to_prob(odd)
-                            elif label == "2.5" and over_prob is None:
-                                over_prob = decimal_to_prob(odd)
-
-                        if over_prob is not None:
-                            over25 = over_prob
-                            used_over = True
-                            comment_parts.append(
-                                "Over 2.5 basé sur les cotes Over/Under."
-                            )
+        with span("parse_odds"):
+            odds = parse_odds(data)
+        if odds["p_home"] is not None:
+            p_home, p_draw, p_away = odds["p_home"], odds["p_draw"], odds["p_away"]
+        btts_yes = odds["btts_yes"]
+        over25 = odds["over25"]
+        comment_parts.extend(odds["comment_parts"])
 
         if not comment_parts:
             comment_parts.append(
@@ -508,6 +514,17 @@ def predict_one_api_fixture(fixture_id: int):
     probs = {"1": p_home, "N": p_draw, "2": p_away}
     prediction = max(probs, key=probs.get)
 
+    # Grille de scores Poisson calée sur le 1N2 retenu
+    with span("model_goals"):
+        goals = goals_markets_from_1x2([p_home], [p_away])[0]
+    if btts_yes is None:
+        btts_yes = goals["btts_yes"]
+    if over25 is None:
+        over25 = goals["over2.5"]
+    comment_parts.append(
+        f"Score exact via grille Poisson (xG {goals['lambda_home']:.2f} - {goals['lambda_away']:.2f})."
+    )
+
     comment = " ".join(comment_parts) + f" (fixture_id {fixture_id})."
 
     return PredictionDTO(
@@ -519,6 +536,293 @@ def predict_one_api_fixture(fixture_id: int):
         status="ok",
         btts_yes=btts_yes,
         over25=over25,
-        correct_score="2-1",  # TODO: futur modèle score exact
+        correct_score=goals["correct_score"],
         top_scorers=None,
-    )
\ No newline at end of file
+    )
+
+
+# ============================================================
+# ---------- /live/odds  (FLUX SSE) ----------
+# ============================================================
+
+def fetch_fixture_odds(fixture_id: int) -> dict:
+    # Flux temps réel : une cote déposée par l'ingestion en masse ne vaut que FRESH_TTL["/odds"]
+    return upstream.get(API_FOOTBALL_BASE, "/odds", get_apifootball_headers(), odds_params(fixture_id), seeded=False)
+
+
+def fetch_odds_page(params: dict) -> dict:
+    return upstream.get(API_FOOTBALL_BASE, "/odds", get_apifootball_headers(), params)
+
+
+odds_refresher = BulkRefresher(fetch_odds_page)
+
+
+@app.on_event("startup")
+def start_odds_refresher():
+    odds_refresher.start()
+
+
+@app.post("/odds/bulk")
+def odds_bulk(league: int, date: Optional[str] = None, season: Optional[int] = None):
+    """
+    Charge en une passe (pagination /odds?league&season&date) les cotes de tous
+    les matchs d'une ligue à une date dans le cache de /predict_one_api_fixture.
+    """
+    try:
+        summary = ingest_odds(fetch_odds_page, league, date, season)
+    except requests.HTTPError as e:
+        return {"status": "error", "message": f"Erreur API-FOOTBALL : {e}"}
+    except Exception as e:
+        return {"status": "error", "message": f"Erreur serveur interne : {e}"}
+    return {"status": "ok", **summary}
+
+
+live_hub = OddsHub(fetch_fixture_odds)
+
+
+@app.get("/live/odds")
+async def live_odds(fixtures: str, request: Request):
+    """
+    Flux Server-Sent Events des probabilités 1N2 / BTTS / Over 2.5 des fixtures
+    demandés (?fixtures=id1,id2). Un seul poll /odds par fixture, partagé
+    entre tous les abonnés ; seuls les changements sont poussés.
+    """
+    try:
+        ids = parse_fixture_ids(fixtures)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Paramètre fixtures invalide : {e}")
+    get_apifootball_headers()
+
+    return StreamingResponse(
+        event_stream(live_hub, request, ids),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+# ============================================================
+# ---------- /predict_international  (SELECTIONS, BATCH) ----------
+# ============================================================
+
+def get_international_predictor():
+    """
+    Modèle international + état des sélections de la version active.
+    Si un bundle models/mmap/current existe, poids et état sont mappés en lecture
+    seule (pages partagées entre workers) au lieu d'être dépicklés.
+    """
+    ms = models.current()
+    if ms.international is None:
+        raise RuntimeError(ms.errors.get("international", "non chargé"))
+    return ms.international
+
+
+@app.post("/predict_international", response_model=InternationalBatchResponse)
+def predict_international(req: InternationalBatchRequest, request: Request):
+    """
+    Pronos 1N2 pour un lot de matchs de sélections (jusqu'à plusieurs centaines).
+    Value (p * cote) et mise Kelly x0.25 si les 3 cotes sont fournies.
+    """
+    if not req.fixtures:
+        return InternationalBatchResponse(status="error", predictions=[], message="Aucun match fourni.")
+
+    try:
+        model, feature_cols, store = get_international_predictor()
+    except Exception as e:
+        return InternationalBatchResponse(
+            status="error",
+            predictions=[],
+            message=f"Modèle international indisponible : {e}",
+        )
+
+    fx = pd.DataFrame([f.model_dump() for f in req.fixtures])
+    with span("model", rows=len(fx)):
+        out, cost_us = score_batch(model, feature_cols, store, fx)
+
+    preds: List[dict] = []
+    for r in out.to_dict("records"):
+        probs = {"1": r["p_home"], "N": r["p_draw"], "2": r["p_away"]}
+        item = {
+            "home": r["home"],
+            "away": r["away"],
+            "prediction": max(probs, key=probs.get),
+            "p_home": r["p_home"],
+            "p_draw": r["p_draw"],
+            "p_away": r["p_away"],
+        }
+        has_odds = all(pd.notna(r.get(f"{side}_odds")) for side in ("home", "draw", "away"))
+        for side in ("home", "draw", "away"):
+            item[f"value_{side}"] = r[f"value_{side}"] if has_odds else None
+            item[f"stake_{side}"] = r[f"stake_{side}"] if has_odds else None
+        preds.append(item)
+
+    unknown = sorted((set(fx["home"]) | set(fx["away"])) - set(store.index))
+    message = None
+    if unknown:
+        message = "Sélections inconnues (Elo 1500, forme nulle) : " + ", ".join(unknown)
+
+    payload = {
+        "status": "ok",
+        "as_of": store.as_of,
+        "per_prediction_us": cost_us,
+        "predictions": preds,
+        "message": message,
+    }
+    if FAST_JSON:
+        return fast_response(request, payload)
+    return InternationalBatchResponse(**payload)
+
+
+# ============================================================
+# ---------- /predict_club  (CLUBS, MODELE PAR LIGUE) ----------
+# ============================================================
+
+def get_club_predictor():
+    """Registre des modèles par ligue (chargés à la demande, LRU) + état des équipes."""
+    ms = models.current()
+    if ms.club is None:
+        raise RuntimeError(ms.errors.get("club", "non chargé"))
+    return ms.club
+
+
+@app.get("/predict_club", response_model=PredictionDTO)
+def predict_club(league: str, home: str, away: str):
+    """
+    Prono 1N2 d'un match de clubs avec le modèle de sa ligue
+    (repli sur le modèle global si la ligue n'a pas le sien).
+    """
+    try:
+        registry, store = get_club_predictor()
+        with span("model_load", league=league):
+            model_name, model = registry.model_for(league)
+    except Exception as e:
+        return PredictionDTO(prediction="N", p_home=0.0, p_draw=0.0, p_away=0.0, status="error",
+                             comment=f"Modèle clubs indisponible : {e}")
+
+    with span("features"):
+        features = store.features(home, away)
+        X = pd.DataFrame([{col: features.get(col, 0) for col in registry.features}])
+    with span("model", model=model_name):
+        proba = model.predict_proba(X)[0]
+    out = {"home": 0.0, "draw": 0.0, "away": 0.0}
+    for cls, p in zip(model.classes_, proba):
+        out[str(cls)] = float(p)
+
+    probs = {"1": out["home"], "N": out["draw"], "2": out["away"]}
+    with span("model_goals"):
+        goals = goals_markets_from_1x2([out["home"]], [out["away"]])[0]
+    used = f"modèle {league}" if model_name == league else "modèle global"
+    return PredictionDTO(
+        prediction=max(probs, key=probs.get),
+        p_home=out["home"],
+        p_draw=out["draw"],
+        p_away=out["away"],
+        comment=f"Prono {home} vs {away} ({used}, registre {registry.version}).",
+        status="ok",
+        btts_yes=goals["btts_yes"],
+        over25=goals["over2.5"],
+        correct_score=goals["correct_score"],
+    )
+
+
+@app.get("/models_status")
+def models_status():
+    """Version active des modèles, rechargements, registre clubs et ligues en cache."""
+    ms = models.current()
+    return {
+        "status": "ok",
+        "active": models.stats(),
+        "club_registry": ms.club[0].stats() if ms.club is not None else None,
+    }
+
+
+# ============================================================
+# ---------- /jobs  (SCORING EN MASSE, ASYNCHRONE) ----------
+# ============================================================
+
+# Jobs persistés dans data/cache/jobs, repris au redémarrage (voir api/batch_jobs.py)
+jobs = JobQueue(get_models=models.current)
+
+
+@app.on_event("startup")
+def start_batch_jobs():
+    jobs.start()
+
+
+def _job_or_404(job_id: str) -> dict:
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job inconnu : {job_id}")
+    return job
+
+
+@app.post("/jobs/score")
+async def submit_score_job(request: Request, kind: str = "club"):
+    """
+    Soumet un fichier de matchs (corps CSV, comme data/fixtures/fixtures.csv) ou
+    un JSON {"fixtures": [...]} ; renvoie l'id du job à suivre sur /jobs/{id}.
+    """
+    if kind not in KINDS:
+        return {"status": "error", "message": f"Paramètre kind invalide : {kind!r} (valeurs : {', '.join(KINDS)})."}
+    body = await request.body()
+    try:
+        fixtures = await run_in_threadpool(parse_fixtures, body, request.headers.get("content-type", ""))
+        job = await run_in_threadpool(jobs.submit, fixtures, kind)
+    except OverflowError as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    except Exception as e:
+        return {"status": "error", "message": f"Fichier de matchs invalide : {e}"}
+    return {"status": "ok", "job": job}
+
+
+@app.get("/jobs")
+def list_jobs():
+    return {"status": "ok", **jobs.stats(), "items": jobs.list_jobs()}
+
+
+@app.get("/jobs/{job_id}")
+def job_status(job_id: str):
+    """Statut (queued, running, done, error, cancelled) et progression en lignes et morceaux."""
+    return {"status": "ok", "job": _job_or_404(job_id)}
+
+
+@app.get("/jobs/{job_id}/result")
+def job_result(job_id: str):
+    job = _job_or_404(job_id)
+    if job["status"] != "done":
+        raise HTTPException(status_code=409, detail=f"Job {job['status']} ({job['rows_done']}/{job['rows']} lignes)")
+    return FileResponse(jobs.result_path(job_id), media_type="text/csv", filename=f"predictions_{job_id}.csv")
+
+
+@app.delete("/jobs/{job_id}")
+def delete_job(job_id: str):
+    """Annule un job en cours (au prochain morceau) ou supprime un job terminé et ses fichiers."""
+    job = _job_or_404(job_id)
+    jobs.cancel(job_id)
+    action = "annulation demandée" if job["status"] in ("queued", "running") else "supprimé"
+    return {"status": "ok", "message": f"Job {job_id} : {action}."}
+
+
+# ============================================================
+# ---------- /admin/profile  (PROFILAGE, ADMIN_TOKEN) ----------
+# ============================================================
+
+@app.post("/admin/profile")
+def admin_profile(request: Request, seconds: float = 10, interval_ms: float = 5, format: str = "collapsed"):
+    """Piles de tout le process pendant `seconds` (bloquant)."""
+    check_admin(request)
+    return profile_response(profile_process(seconds, interval_ms), format)
+
+
+@app.post("/admin/profile/requests")
+def admin_profile_requests_start(request: Request, percent: float = 5, seconds: float = 60, interval_ms: float = 5):
+    """Démarre l'échantillonnage de `percent` % des requêtes pendant `seconds`."""
+    check_admin(request)
+    request_sampler.start(percent, seconds, interval_ms)
+    return {"status": "ok", **{k: v for k, v in request_sampler.snapshot().items() if k != "stacks"}}
+
+
+@app.get("/admin/profile/requests")
+def admin_profile_requests(request: Request, format: str = "collapsed"):
+    """Piles collectées par l'échantillonnage des requêtes (en cours ou terminé)."""
+    check_admin(request)
+    return profile_response(request_sampler.snapshot(), format)
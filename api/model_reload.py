@@ -0,0 +1,240 @@
+"""
+Rechargement à chaud des modèles, sans redémarrer l'API.
+
+Un thread de fond surveille toutes les MODEL_RELOAD_INTERVAL secondes
+(0 = désactivé) une empreinte de :
+  - models/mmap/current          (bundle mmap actif)
+  - models/registry/1x2/current  (registre des modèles par ligue)
+  - nom / taille / mtime des models/*.pkl
+
+Quand l'empreinte change (et reste stable pendant un intervalle, pour ne pas lire
+un fichier en cours d'écriture), la nouvelle version est chargée en arrière-plan,
+validée par une prédiction de test, préchauffée (mêmes ligues en cache que
+l'ancienne), puis substituée d'un seul coup : les requêtes en cours finissent
+avec l'ancienne version, les suivantes prennent la nouvelle. En cas d'échec,
+l'ancienne version reste active et l'erreur est exposée dans /models_status.
+"""
+
+import hashlib
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Optional
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from api.tracing import span
+from features import mmap_bundle
+from features.team_state import load_or_build
+from training import registry as model_registry
+from training.registry import ModelRegistry
+
+RELOAD_INTERVAL = float(os.environ.get("MODEL_RELOAD_INTERVAL", "5"))
+
+
+@dataclass
+class ModelSet:
+    """Une version cohérente de tout ce qui sert aux pronos."""
+    version: str
+    components: Dict[str, str]
+    international: Optional[tuple] = None     # (model, feature_cols, store)
+    club: Optional[tuple] = None              # (registry, store)
+    errors: Dict[str, str] = field(default_factory=dict)
+    loaded_at: str = field(default_factory=lambda: datetime.now(timezone.utc).isoformat())
+
+
+# ============================================================
+# EMPREINTE / CHARGEMENT / VALIDATION
+# ============================================================
+
+def fingerprint() -> str:
+    h = hashlib.blake2b(digest_size=6)
+    for link in (mmap_bundle.CURRENT, model_registry.CURRENT):
+        h.update((os.path.realpath(link) if link.is_symlink() else "-").encode())
+    for f in sorted(mmap_bundle.MODELS_DIR.glob("*.pkl")):
+        st = f.stat()
+        h.update(f"{f.name}:{st.st_size}:{st.st_mtime_ns};".encode())
+    return h.hexdigest()
+
+
+def load_model_set(version: str) -> ModelSet:
+    bundle = mmap_bundle.open_current()
+    components = {"bundle": bundle.version if bundle is not None else "-"}
+    ms = ModelSet(version=version, components=components)
+
+    try:
+        if bundle is not None:
+            ms.international = (
+                bundle.model("model_international"),
+                bundle.feature_columns("model_international"),
+                bundle.store("international"),
+            )
+        else:
+            ms.international = (
+                joblib.load(mmap_bundle.MODELS_DIR / "model_international.pkl"),
+                joblib.load(mmap_bundle.MODELS_DIR / "feature_columns_international.pkl"),
+                load_or_build("international", save=False),
+            )
+    except Exception as e:
+        ms.errors["international"] = str(e)
+
+    try:
+        registry = ModelRegistry.load()
+        store = bundle.store("club") if bundle is not None else load_or_build("club", save=False)
+        ms.club = (registry, store)
+        components["club_registry"] = registry.version
+    except Exception as e:
+        ms.errors["club"] = str(e)
+    return ms
+
+
+def _check_proba(model, feature_cols, features: Dict[str, float], what: str):
+    X = pd.DataFrame([{col: features.get(col, 0) for col in feature_cols}])
+    proba = np.asarray(model.predict_proba(X))
+    if proba.shape != (1, len(model.classes_)) or not np.isfinite(proba).all() or abs(proba.sum() - 1) > 1e-6:
+        raise ValueError(f"prédiction de test invalide ({what}) : {proba}")
+
+
+def smoke_test(ms: ModelSet, warm_leagues=()):
+    """Prédiction de test sur chaque composant chargé ; précharge les ligues demandées."""
+    if ms.international is not None:
+        model, feature_cols, store = ms.international
+        teams = (list(store.names[:2]) + ["?", "?"])[:2]
+        _check_proba(model, feature_cols, store.features(*teams), "international")
+    if ms.club is not None:
+        registry, store = ms.club
+        teams = (list(store.names[:2]) + ["?", "?"])[:2]
+        for league in (None, *warm_leagues):
+            name, model = registry.model_for(league)
+            _check_proba(model, registry.features, store.features(*teams), f"clubs/{name}")
+
+
+# ============================================================
+# GESTIONNAIRE
+# ============================================================
+
+class ModelManager:
+    def __init__(self, interval: float = RELOAD_INTERVAL, on_swap: Optional[Callable[[ModelSet], None]] = None):
+        self.interval = interval
+        self.on_swap = on_swap
+        self._active: Optional[ModelSet] = None
+        self._fingerprint: Optional[str] = None
+        self._pending: Optional[str] = None
+        self._rejected: Optional[str] = None
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self.reloads = 0
+        self.failures = 0
+        self.last_error: Optional[str] = None
+
+    @property
+    def version(self) -> Optional[str]:
+        return self._active.version if self._active is not None else None
+
+    def current(self) -> ModelSet:
+        """Version active (chargée au premier appel si le thread ne l'a pas déjà fait)."""
+        active = self._active
+        if active is None:
+            with self._lock:
+                if self._active is None:
+                    with span("model_init"):
+                        fp = fingerprint()
+                        self._swap(load_model_set(fp), fp)
+            active = self._active
+        return active
+
+    def _swap(self, ms: ModelSet, fp: str):
+        self._active = ms           # une seule affectation : atomique pour les lecteurs
+        self._fingerprint = fp
+        if self.on_swap is not None:
+            self.on_swap(ms)
+
+    def check(self) -> bool:
+        """Un tour de surveillance ; True si une nouvelle version a été activée."""
+        fp = fingerprint()
+        if fp in (self._fingerprint, self._rejected):
+            self._pending = None
+            return False
+        if fp != self._pending:
+            self._pending = fp          # attend une empreinte stable sur un intervalle
+            return False
+
+        old = self._active
+        warm = []
+        if old is not None and old.club is not None:
+            warm = [name for name in old.club[0].stats()["cached"] if name != model_registry.GLOBAL]
+        try:
+            ms = load_model_set(fp)
+            lost = [k for k in ms.errors if old is not None and k not in old.errors]
+            if lost:
+                raise RuntimeError("; ".join(f"{k} : {ms.errors[k]}" for k in lost))
+            smoke_test(ms, warm)
+        except Exception as e:
+            self.failures += 1
+            self.last_error = f"{datetime.now(timezone.utc).isoformat()} {e}"
+            self._pending = None
+            self._rejected = fp         # pas de nouvel essai tant que les fichiers ne changent pas
+            print(f"⚠️ Rechargement des modèles refusé : {e}")
+            return False
+
+        with self._lock:
+            self._swap(ms, fp)
+            self.reloads += 1
+        print(f"✅ Modèles rechargés : version {ms.version} {ms.components}")
+        return True
+
+    def _loop(self):
+        try:
+            self.current()
+        except Exception as e:
+            self.last_error = str(e)
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.check()
+            except Exception as e:      # le thread de surveillance ne doit jamais mourir
+                self.last_error = str(e)
+
+    def start(self):
+        if self.interval <= 0 or self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._loop, name="model-reload", daemon=True)
+        self._thread.start()
+
+    def stats(self) -> Dict[str, Any]:
+        active = self._active
+        return {
+            "version": active.version if active else None,
+            "components": active.components if active else None,
+            "loaded_at": active.loaded_at if active else None,
+            "errors": active.errors if active else None,
+            "reloads": self.reloads,
+            "failed_reloads": self.failures,
+            "last_error": self.last_error,
+            "watch_interval_s": self.interval,
+        }
+
+
+class ModelVersionMiddleware:
+    """Middleware ASGI : en-tête X-Model-Version (version active) sur chaque réponse."""
+
+    def __init__(self, app, manager: ModelManager):
+        self.app = app
+        self.manager = manager
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        async def send_with_version(message):
+            if message["type"] == "http.response.start":
+                version = self.manager.version
+                if version is not None:
+                    message["headers"] = list(message.get("headers", [])) + [(b"x-model-version", version.encode())]
+            await send(message)
+
+        await self.app(scope, receive, send_with_version)
@@ -0,0 +1,106 @@
+"""
+Lecture des cotes API-FOOTBALL (/odds) : 1N2, BTTS et Over 2.5 du premier
+bookmaker, converties en probabilités.
+
+Partagé par /predict_one_api_fixture, le flux temps réel (api/live_odds.py)
+et l'ingestion en masse (api/odds_bulk.py).
+"""
+
+from typing import Any, Dict, List, Optional
+
+NAMES_1X2 = ["match winner", "1x2", "full time result", "match result"]
+
+
+def odds_params(fixture_id: int) -> Dict[str, Any]:
+    """Paramètres /odds d'un match (clé du cache amont, partagée avec api/odds_bulk.py)."""
+    return {"fixture": fixture_id, "timezone": "Europe/Paris"}
+
+
+def decimal_to_prob(odd: Optional[float]) -> Optional[float]:
+    if odd is None or odd <= 1.0:
+        return None
+    return 1.0 / odd
+
+
+def _values(bet: Dict[str, Any]):
+    """(label en minuscules, cote) pour chaque valeur exploitable d'un pari."""
+    for val in bet.get("values", []):
+        try:
+            odd = float(val.get("odd"))
+        except (TypeError, ValueError):
+            continue
+        yield str(val.get("value", "")).strip().lower(), odd
+
+
+def parse_odds(data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Extrait les probabilités d'une réponse /odds.
+
+    Retourne un dict p_home / p_draw / p_away (None si pas de 1N2 exploitable,
+    marge du bookmaker retirée), btts_yes, over25 (None si absents),
+    odds_1x2 (cotes brutes) et comment_parts (phrases pour le commentaire).
+    """
+    out: Dict[str, Any] = {
+        "p_home": None, "p_draw": None, "p_away": None,
+        "btts_yes": None, "over25": None, "odds_1x2": None,
+    }
+    comment_parts: List[str] = []
+    out["comment_parts"] = comment_parts
+
+    resp = data.get("response", [])
+    if not resp:
+        return out
+    bookmakers = resp[0].get("bookmakers", [])
+    if not bookmakers:
+        return out
+
+    for bet in bookmakers[0].get("bets", []):
+        name = str(bet.get("name", "")).strip().lower()
+
+        # --- Match Winner / 1X2 / Full Time Result ---
+        if out["p_home"] is None and name in NAMES_1X2:
+            odd_home = odd_draw = odd_away = None
+            inv_home = inv_draw = inv_away = None
+            for label, odd in _values(bet):
+                if label in ("home", "1"):
+                    inv_home, odd_home = decimal_to_prob(odd), odd
+                elif label in ("draw", "x", "n", "d"):
+                    inv_draw, odd_draw = decimal_to_prob(odd), odd
+                elif label in ("away", "2"):
+                    inv_away, odd_away = decimal_to_prob(odd), odd
+
+            if inv_home and inv_draw and inv_away:
+                s = inv_home + inv_draw + inv_away
+                out["p_home"] = inv_home / s
+                out["p_draw"] = inv_draw / s
+                out["p_away"] = inv_away / s
+                out["odds_1x2"] = (odd_home, odd_draw, odd_away)
+                comment_parts.append(
+                    "Probabilités PRO basées sur les cotes 1N2 de API-FOOTBALL "
+                    f"(1={odd_home}, N={odd_draw}, 2={odd_away})."
+                )
+
+        # --- Both Teams To Score ---
+        if out["btts_yes"] is None and ("both teams to score" in name or "btts" in name):
+            yes_prob = None
+            for label, odd in _values(bet):
+                if label == "yes":
+                    yes_prob = decimal_to_prob(odd)
+            if yes_prob is not None:
+                out["btts_yes"] = yes_prob
+                comment_parts.append("BTTS basé sur les cotes 'Both Teams To Score'.")
+
+        # --- Over/Under buts (on cherche Over 2.5) ---
+        if out["over25"] is None and ("over/under" in name or "total goals" in name):
+            over_prob = None
+            for label, odd in _values(bet):
+                # Formats possibles : "Over 2.5", "2.5", ">2.5"
+                if "over" in label and "2.5" in label:
+                    over_prob = decimal_to_prob(odd)
+                elif label == "2.5" and over_prob is None:
+                    over_prob = decimal_to_prob(odd)
+            if over_prob is not None:
+                out["over25"] = over_prob
+                comment_parts.append("Over 2.5 basé sur les cotes Over/Under.")
+
+    return out
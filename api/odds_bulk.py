@@ -0,0 +1,214 @@
+"""
+Ingestion en masse des cotes : une ligue x une date en O(pages) appels au lieu
+d'un /odds?fixture=X par match.
+
+    /odds?league=61&season=2025&date=2025-11-15&page=N     (10 matchs par page)
+
+iter_odds_pages parcourt les pages en flux, dans l'ordre (les ODDS_BULK_PAGES_AHEAD
+pages suivantes sont demandées pendant qu'on traite la courante) ; chaque match est
+réduit à un enregistrement compact (premier bookmaker seulement, celui que lit
+parse_odds) puis déposé dans le cache amont sous la clé de /odds?fixture=X (upstream.seed),
+frais jusqu'au passage suivant (ODDS_BULK_TTL, par défaut ODDS_BULK_INTERVAL) :
+/predict_one_api_fixture et ses ETag le resservent sans appel, donc N matchs d'une
+ligue suivie coûtent ceil(N / 10) appels par intervalle au lieu de N.
+
+Le poller /live/odds lit ce cache avec upstream.get(seeded=False) : pour lui, une
+entrée déposée ne vaut que la fraîcheur normale de /odds (FRESH_TTL, 15 s), il
+suit donc les cotes au rythme d'un appel direct.
+
+Déclenchement : POST /odds/bulk?league=61&date=2025-11-15, ou en tâche de fond
+pour ODDS_BULK_LEAGUES (ex: "61,39,140") toutes les ODDS_BULK_INTERVAL secondes.
+"""
+
+import contextvars
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timezone
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from api import upstream
+from api.odds import odds_params, parse_odds
+from api.upstream import track_staleness
+
+BULK_LEAGUES = [x.strip() for x in os.environ.get("ODDS_BULK_LEAGUES", "").split(",") if x.strip()]
+BULK_INTERVAL = float(os.environ.get("ODDS_BULK_INTERVAL", "300"))
+BULK_TTL = float(os.environ.get("ODDS_BULK_TTL", str(BULK_INTERVAL)))
+PAGES_AHEAD = int(os.environ.get("ODDS_BULK_PAGES_AHEAD", "4"))
+MAX_PAGES = 50
+
+FetchPage = Callable[[Dict[str, Any]], Any]
+
+
+def current_season(day: date) -> int:
+    """
+    Saison API-FOOTBALL (année de début) : août-décembre -> année, janvier-juillet -> année - 1.
+    Juillet reste dans la saison précédente (les championnats européens reprennent en août) ;
+    passer season= explicitement pour les ligues qui démarrent plus tôt.
+    """
+    return day.year if day.month >= 8 else day.year - 1
+
+
+def compact_item(item: Dict[str, Any]) -> Dict[str, Any]:
+    """Un match de la réponse /odds réduit à ce que lit parse_odds."""
+    return {
+        "league": item.get("league", {}),
+        "fixture": item.get("fixture", {}),
+        "update": item.get("update"),
+        "bookmakers": (item.get("bookmakers") or [])[:1],
+    }
+
+
+def fixture_record(item: Dict[str, Any]) -> Dict[str, Any]:
+    """Enregistrement normalisé d'un match : id, ligue, bookmaker et probabilités."""
+    odds = parse_odds({"response": [item]})
+    bookmakers = item.get("bookmakers") or []
+    return {
+        "fixture_id": (item.get("fixture") or {}).get("id"),
+        "league_id": (item.get("league") or {}).get("id"),
+        "bookmaker": bookmakers[0].get("name") if bookmakers else None,
+        "p_home": odds["p_home"],
+        "p_draw": odds["p_draw"],
+        "p_away": odds["p_away"],
+        "btts_yes": odds["btts_yes"],
+        "over25": odds["over25"],
+        "odds_1x2": odds["odds_1x2"],
+    }
+
+
+# ============================================================
+# PAGES EN FLUX
+# ============================================================
+
+def _fetch_fresh(fetch_page: FetchPage, params: Dict[str, Any]) -> Tuple[Any, bool]:
+    """(page, servie depuis le secours périmé ?) dans un contexte isolé."""
+    ages = track_staleness()
+    data = fetch_page(params)
+    return data, bool(ages)
+
+
+def iter_odds_pages(fetch_page: FetchPage, league: Any, season: int, day: str,
+                    ahead: int = PAGES_AHEAD) -> Iterator[Tuple[int, int, List[Dict[str, Any]], bool]]:
+    """
+    (page, total, matchs, périmé) dans l'ordre des pages. La page 1 donne le
+    total ; jusqu'à `ahead` pages suivantes sont ensuite demandées en parallèle
+    pendant que l'appelant traite la page courante (0 = une page à la fois).
+    Au plus MAX_PAGES pages sont lues ; total reste celui annoncé par l'amont,
+    pour que l'appelant sache si la liste est tronquée.
+    """
+    base = {"league": league, "season": season, "date": day, "timezone": "Europe/Paris"}
+
+    def submit(pool, page: int):
+        ctx = contextvars.copy_context()     # garde trace et budget de la requête appelante
+        return pool.submit(ctx.run, _fetch_fresh, fetch_page, {**base, "page": page})
+
+    with ThreadPoolExecutor(max_workers=max(1, ahead), thread_name_prefix="odds-bulk") as pool:
+        pending = {1: submit(pool, 1)}
+        page, total, last, requested = 1, 1, 1, 1
+        while page <= last:
+            data, stale = pending.pop(page).result()
+            if page == 1:
+                total = int((data.get("paging") or {}).get("total") or 1)
+                last = min(total, MAX_PAGES)
+            while requested < last and requested - page < ahead:
+                requested += 1
+                pending[requested] = submit(pool, requested)
+            yield page, total, data.get("response") or [], stale
+            page += 1
+            if requested < page <= last:
+                requested = page
+                pending[page] = submit(pool, page)
+
+
+def iter_fixture_odds(fetch_page: FetchPage, league: Any, season: int, day: str) -> Iterator[Dict[str, Any]]:
+    """Enregistrements compacts, match par match, au fil des pages."""
+    for _, _, items, _ in iter_odds_pages(fetch_page, league, season, day):
+        for item in items:
+            yield fixture_record(item)
+
+
+def ingest(fetch_page: FetchPage, league: Any, day: Optional[str] = None,
+           season: Optional[int] = None, ttl: float = BULK_TTL) -> Dict[str, Any]:
+    """Remplit le cache /odds?fixture=X de tous les matchs de la ligue à cette date."""
+    day = day or datetime.now(timezone.utc).date().isoformat()
+    season = season or current_season(date.fromisoformat(day))
+    t0 = time.perf_counter()
+    pages = fixtures = with_1x2 = skipped = 0
+    pages_total = 0
+
+    for page, total, items, stale in iter_odds_pages(fetch_page, league, season, day):
+        pages += 1
+        pages_total = total
+        if stale:
+            skipped += len(items)      # page de secours : on ne la fait pas passer pour fraîche
+            continue
+        for item in items:
+            fid = (item.get("fixture") or {}).get("id")
+            if not fid:
+                continue
+            compact = compact_item(item)
+            payload = {"get": "odds", "parameters": odds_params(fid), "errors": [], "results": 1,
+                       "paging": {"current": 1, "total": 1}, "response": [compact]}
+            digest = hashlib.blake2b(json.dumps(compact, sort_keys=True).encode("utf-8"), digest_size=8).hexdigest()
+            upstream.seed("/odds", odds_params(fid), payload, digest, ttl)
+            fixtures += 1
+            with_1x2 += fixture_record(compact)["p_home"] is not None
+
+    # Au-delà de MAX_PAGES, les matchs non couverts n'ont pas d'entrée déposée :
+    # ils repassent par l'appel /odds?fixture=X habituel
+    truncated = pages_total > pages
+    if truncated:
+        print(f"⚠️ Cotes en masse {league} {day} : {pages_total} pages annoncées, seules {pages} lues "
+              f"(MAX_PAGES={MAX_PAGES}) ; les autres matchs restent en appel par match.")
+
+    return {
+        "league": league,
+        "season": season,
+        "date": day,
+        "pages": pages,
+        "pages_total": pages_total,
+        "complete": not truncated,
+        "fixtures": fixtures,
+        "with_1x2": with_1x2,
+        "skipped_stale": skipped,
+        "seconds": round(time.perf_counter() - t0, 3),
+    }
+
+
+# ============================================================
+# TACHE DE FOND
+# ============================================================
+
+class BulkRefresher:
+    """Ingestion périodique des cotes du jour pour une liste de ligues."""
+
+    def __init__(self, fetch_page: FetchPage, leagues: List[str] = BULK_LEAGUES, interval: float = BULK_INTERVAL):
+        self.fetch_page = fetch_page
+        self.leagues = leagues
+        self.interval = interval
+        self.last: Dict[str, Dict[str, Any]] = {}
+        self._thread: Optional[threading.Thread] = None
+
+    def run_once(self):
+        for league in self.leagues:
+            try:
+                self.last[league] = ingest(self.fetch_page, league, ttl=max(BULK_TTL, self.interval))
+            except Exception as e:
+                self.last[league] = {"league": league, "error": str(e)}
+
+    def _loop(self):
+        while True:
+            self.run_once()
+            time.sleep(self.interval)
+
+    def start(self):
+        if not self.leagues or self.interval <= 0 or self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._loop, name="odds-bulk", daemon=True)
+        self._thread.start()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"leagues": self.leagues, "interval_s": self.interval, "last": self.last}
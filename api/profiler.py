@@ -0,0 +1,232 @@
+"""
+Profilage à la demande en production, par échantillonnage de piles.
+
+Désactivé par défaut : les routes /admin/profile* répondent 404 tant que
+ADMIN_TOKEN n'est pas défini, puis exigent l'en-tête X-Admin-Token.
+
+Deux modes, sans dépendance externe (sys._current_frames toutes les interval_ms) :
+  - process : toutes les piles de tous les threads pendant N secondes
+        POST /admin/profile?seconds=10&interval_ms=5
+  - requêtes : un pourcentage des appels aux endpoints de api/main.py, pile
+    coupée à l'endpoint, pendant N secondes
+        POST /admin/profile/requests?percent=5&seconds=60    (démarre)
+        GET  /admin/profile/requests                          (résultat)
+
+Sortie "collapsed" (une ligne "racine;f1;f2 N" par pile) à donner à
+flamegraph.pl ou speedscope.app, ou format=json (fonctions les plus coûteuses).
+Coût : un thread qui lit les piles ~200 fois par seconde ; rien quand c'est éteint.
+"""
+
+import functools
+import hmac
+import inspect
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from fastapi import HTTPException, Request
+from fastapi.responses import PlainTextResponse
+from fastapi.routing import APIRoute
+
+ROOT = Path(__file__).resolve().parent.parent
+
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN")
+DEFAULT_INTERVAL_MS = 5.0
+MIN_INTERVAL_MS = 1.0
+MAX_SECONDS = 120
+MAX_DEPTH = 128
+
+
+def check_admin(request: Request):
+    """404 si le profilage n'est pas activé (ADMIN_TOKEN) ou si le jeton ne correspond pas."""
+    token = request.headers.get("x-admin-token", "")
+    if not ADMIN_TOKEN or not hmac.compare_digest(token.encode(), ADMIN_TOKEN.encode()):
+        raise HTTPException(status_code=404, detail="Not Found")
+
+
+# ============================================================
+# PILES
+# ============================================================
+
+_labels: Dict[Any, str] = {}
+
+
+def frame_label(code) -> str:
+    """'api/main.py:find_fixture' pour le code du dépôt, 'requests/sessions.py:send' sinon."""
+    label = _labels.get(code)
+    if label is None:
+        path = Path(code.co_filename)
+        try:
+            name = path.resolve().relative_to(ROOT).as_posix()
+        except ValueError:
+            name = f"{path.parent.name}/{path.name}"
+        label = _labels[code] = f"{name}:{code.co_name}"
+    return label
+
+
+def collapse(frame, stop_code=None) -> str:
+    """Pile de frame (de la racine vers la feuille), arrêtée à stop_code exclu."""
+    labels: List[str] = []
+    while frame is not None and len(labels) < MAX_DEPTH:
+        if frame.f_code is stop_code:
+            break
+        labels.append(frame_label(frame.f_code))
+        frame = frame.f_back
+    return ";".join(reversed(labels))
+
+
+def to_collapsed(stacks: Counter) -> str:
+    return "\n".join(f"{stack} {n}" for stack, n in stacks.most_common()) + "\n"
+
+
+def top_functions(stacks: Counter, limit: int = 30) -> List[Dict[str, Any]]:
+    """Fonctions par temps propre (feuille) et total (présentes dans la pile), en % des échantillons."""
+    total = sum(stacks.values()) or 1
+    own: Counter = Counter()
+    inclusive: Counter = Counter()
+    for stack, n in stacks.items():
+        frames = stack.split(";")
+        own[frames[-1]] += n
+        for f in set(frames[1:]):
+            inclusive[f] += n
+    return [
+        {"function": f, "self_pct": round(100 * own[f] / total, 2), "total_pct": round(100 * inclusive[f] / total, 2)}
+        for f, _ in own.most_common(limit)
+    ]
+
+
+def profile_response(result: Dict[str, Any], fmt: str = "collapsed"):
+    """Texte collapsed (flamegraph.pl / speedscope) ou résumé JSON des fonctions les plus coûteuses."""
+    stacks: Counter = result["stacks"]
+    if fmt == "json":
+        meta = {k: v for k, v in result.items() if k != "stacks"}
+        return {"status": "ok", **meta, "distinct_stacks": len(stacks), "top": top_functions(stacks)}
+    return PlainTextResponse(to_collapsed(stacks))
+
+
+# ============================================================
+# MODE PROCESS
+# ============================================================
+
+def profile_process(seconds: float, interval_ms: float = DEFAULT_INTERVAL_MS) -> Dict[str, Any]:
+    """Echantillonne tous les threads (sauf celui-ci) pendant `seconds` ; bloquant."""
+    interval = max(MIN_INTERVAL_MS, interval_ms) / 1000
+    me = threading.get_ident()
+    stacks: Counter = Counter()
+    samples = 0
+    deadline = time.perf_counter() + min(seconds, MAX_SECONDS)
+    while time.perf_counter() < deadline:
+        names = {t.ident: t.name for t in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident != me:
+                stacks[f"{names.get(ident, ident)};{collapse(frame)}"] += 1
+        samples += 1
+        time.sleep(interval)
+    return {"samples": samples, "interval_ms": interval * 1000, "stacks": stacks}
+
+
+# ============================================================
+# MODE REQUETES
+# ============================================================
+
+class RequestSampler:
+    """Echantillonne les piles des threads qui servent une requête tirée au sort."""
+
+    def __init__(self):
+        self.rate = 0.0
+        self.until = 0.0
+        self.interval = DEFAULT_INTERVAL_MS / 1000
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.requests = 0
+        self._active: Dict[int, tuple] = {}     # thread -> (endpoint, code du wrapper)
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return time.time() < self.until
+
+    def start(self, percent: float, seconds: float, interval_ms: float = DEFAULT_INTERVAL_MS):
+        with self._lock:
+            self.rate = max(0.0, min(percent, 100.0)) / 100
+            self.until = time.time() + min(seconds, MAX_SECONDS)
+            self.interval = max(MIN_INTERVAL_MS, interval_ms) / 1000
+            self.stacks = Counter()
+            self.samples = self.requests = 0
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._loop, name="profiler", daemon=True)
+                self._thread.start()
+
+    def stop(self):
+        self.until = 0.0
+
+    def should_sample(self) -> bool:
+        return self.until > 0 and self.running and random.random() < self.rate
+
+    def enter(self, endpoint: str, stop_code):
+        with self._lock:
+            self._active[threading.get_ident()] = (endpoint, stop_code)
+            self.requests += 1
+
+    def exit(self):
+        with self._lock:
+            self._active.pop(threading.get_ident(), None)
+
+    def _loop(self):
+        while self.running:
+            with self._lock:
+                active = dict(self._active)
+            if active:
+                frames = sys._current_frames()
+                for ident, (endpoint, stop_code) in active.items():
+                    frame = frames.get(ident)
+                    if frame is None:
+                        continue
+                    stack = collapse(frame, stop_code)
+                    self.stacks[f"{endpoint};{stack}" if stack else endpoint] += 1
+                self.samples += 1
+            time.sleep(self.interval)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "running": self.running,
+            "percent": self.rate * 100,
+            "remaining_s": round(max(0.0, self.until - time.time()), 1),
+            "interval_ms": self.interval * 1000,
+            "sampled_requests": self.requests,
+            "samples": self.samples,
+            "stacks": self.stacks,
+        }
+
+
+request_sampler = RequestSampler()
+
+
+def profiled(endpoint: Callable) -> Callable:
+    """Enveloppe un endpoint synchrone : ses requêtes tirées au sort sont échantillonnées."""
+    if inspect.iscoroutinefunction(endpoint):
+        return endpoint
+
+    @functools.wraps(endpoint)
+    def wrapper(*args, **kwargs):
+        if not request_sampler.should_sample():
+            return endpoint(*args, **kwargs)
+        request_sampler.enter(endpoint.__name__, wrapper.__code__)
+        try:
+            return endpoint(*args, **kwargs)
+        finally:
+            request_sampler.exit()
+    return wrapper
+
+
+class ProfiledRoute(APIRoute):
+    """Classe de route (app.router.route_class) : chaque endpoint passe par profiled()."""
+
+    def __init__(self, path: str, endpoint: Callable, **kwargs):
+        super().__init__(path, profiled(endpoint), **kwargs)
@@ -0,0 +1,122 @@
+"""
+Traçage léger par requête : spans nommés -> en-tête Server-Timing (+ log JSON échantillonné).
+
+Chaque appel API-FOOTBALL (api_<route>), lecture de cache (cache_<route>) et
+inférence de modèle (model, features...) enregistre un span dans la trace de la
+requête en cours. Le middleware renvoie leur somme par nom :
+
+    Server-Timing: cache_teams;dur=0.0, api_fixtures_headtohead;dur=412.3;desc="x2", model;dur=1.2, app;dur=420.8
+
+Réglages :
+  - SERVER_TIMING=0       : pas d'en-tête (et pas de trace si rien n'est journalisé)
+  - TRACE_SAMPLE_RATE=0.01: proportion des requêtes journalisées en JSON sur stdout
+    (détail de chaque span : début, durée, attributs)
+"""
+
+import json
+import os
+import random
+import re
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional
+
+SERVER_TIMING = os.environ.get("SERVER_TIMING", "1") == "1"
+SAMPLE_RATE = float(os.environ.get("TRACE_SAMPLE_RATE", "0"))
+
+
+class Trace:
+    """Spans d'une requête ; partagée par les threads qui la servent (list.append est atomique)."""
+
+    def __init__(self, method: str, path: str):
+        self.method = method
+        self.path = path
+        self.t0 = time.perf_counter()
+        self.spans: List[Dict[str, Any]] = []
+        self.finished = False
+
+    def add(self, name: str, start: float, seconds: float, attrs: Dict[str, Any]):
+        self.spans.append({"name": name, "start_ms": round((start - self.t0) * 1000, 2),
+                           "dur_ms": round(seconds * 1000, 2), **attrs})
+
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self.t0) * 1000
+
+    def server_timing(self) -> str:
+        totals: Dict[str, List[float]] = {}
+        for s in self.spans:
+            totals.setdefault(s["name"], []).append(s["dur_ms"])
+        parts = []
+        for name, durations in totals.items():
+            part = f"{name};dur={sum(durations):.1f}"
+            if len(durations) > 1:
+                part += f';desc="x{len(durations)}"'
+            parts.append(part)
+        parts.append(f"app;dur={self.elapsed_ms():.1f}")
+        return ", ".join(parts)
+
+
+_trace: ContextVar[Optional[Trace]] = ContextVar("trace", default=None)
+
+
+def route_token(route: str) -> str:
+    """'/fixtures/headtohead' -> 'fixtures_headtohead' (nom valide pour Server-Timing)."""
+    return re.sub(r"[^A-Za-z0-9]+", "_", route).strip("_") or "root"
+
+
+@contextmanager
+def span(name: str, /, **attrs: Any) -> Iterator[Dict[str, Any]]:
+    """
+    Mesure le bloc dans la trace courante (no-op hors requête tracée, ou si la
+    requête est terminée : tâche de fond lancée depuis son contexte).
+    Le dict produit peut être complété pendant le bloc (ex: outcome="stale").
+    """
+    trace = _trace.get()
+    start = time.perf_counter()
+    try:
+        yield attrs
+    finally:
+        if trace is not None and not trace.finished:
+            trace.add(name, start, time.perf_counter() - start, attrs)
+
+
+class TracingMiddleware:
+    """Middleware ASGI : ouvre une trace par requête HTTP, ajoute Server-Timing, journalise l'échantillon."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        sampled = SAMPLE_RATE > 0 and random.random() < SAMPLE_RATE
+        if scope["type"] != "http" or not (SERVER_TIMING or sampled):
+            return await self.app(scope, receive, send)
+
+        trace = Trace(scope.get("method", ""), scope.get("path", ""))
+        token = _trace.set(trace)     # copié dans le contexte du threadpool : même objet Trace
+        status = {"code": None}
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                if SERVER_TIMING:
+                    message["headers"] = list(message.get("headers", [])) + [
+                        (b"server-timing", trace.server_timing().encode())
+                    ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            trace.finished = True
+            _trace.reset(token)
+            if sampled:
+                print(json.dumps({
+                    "type": "trace",
+                    "method": trace.method,
+                    "path": trace.path,
+                    "query": scope.get("query_string", b"").decode("latin-1"),
+                    "status": status["code"],
+                    "total_ms": round(trace.elapsed_ms(), 2),
+                    "spans": trace.spans,
+                }, ensure_ascii=False), flush=True)
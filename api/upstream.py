@@ -0,0 +1,455 @@
+"""
+Appels API-FOOTBALL centralisés : session HTTP partagée, disjoncteur par route
+et dernier résultat valide en secours.
+
+Disjoncteur (un par route : /teams, /fixtures, /fixtures/headtohead, /odds...) :
+  - fermé  : les requêtes passent ; FAILURE_THRESHOLD erreurs consécutives
+             (timeout, connexion, HTTP 5xx / 429) l'ouvrent ;
+  - ouvert : échec immédiat, sans attendre le timeout. Un thread de fond
+             rejoue la dernière requête en échec toutes les PROBE_INTERVAL
+             secondes et referme le circuit dès qu'elle réussit.
+
+Tant que le circuit est ouvert (ou si l'appel échoue), on sert le dernier
+résultat valide connu pour la même requête, marqué comme périmé : les
+endpoints l'exposent via les champs stale / data_age_seconds.
+
+Observateurs (observe) : chaque réponse fraîche d'une route leur est transmise,
+pour alimenter des caches dérivés (api/fixture_cache.py).
+
+Fraîcheur : un résultat plus jeune que FRESH_TTL[route] est resservi sans appel
+amont. Chaque résultat garde une empreinte de son contenu (data_version) qui
+sert aux ETag des endpoints (api/conditional.py).
+
+Budget de temps par requête : un endpoint décoré par with_deadline() fixe une
+échéance ; chaque appel amont ne reçoit que le temps restant (au plus son
+timeout propre), et plus aucun appel n'est lancé une fois le budget épuisé.
+
+Hedging (opt-in, UPSTREAM_HEDGE=1) : si un GET n'a pas répondu après le p95
+de latence observé sur sa route, une seconde requête identique part et la
+première réponse gagne. Limité à HEDGE_MAX_RATIO des appels pour préserver le quota.
+"""
+
+import functools
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from api.tracing import route_token, span
+
+FAILURE_THRESHOLD = int(os.environ.get("UPSTREAM_FAILURE_THRESHOLD", "5"))
+PROBE_INTERVAL = float(os.environ.get("UPSTREAM_PROBE_INTERVAL", "10"))
+LAST_GOOD_SIZE = int(os.environ.get("UPSTREAM_LAST_GOOD_SIZE", "2048"))
+DEFAULT_TIMEOUT = 15
+
+# Durée (s) pendant laquelle un résultat est resservi tel quel, par route
+FRESH = os.environ.get("UPSTREAM_FRESH", "1") == "1"
+FRESH_TTL = {
+    "/teams": 86400,
+    "/fixtures/headtohead": 600,
+    "/fixtures": 300,
+    "/odds": 15,
+}
+
+REQUEST_DEADLINE = float(os.environ.get("REQUEST_DEADLINE_S", "12"))
+MIN_CALL_BUDGET = 0.05     # en dessous, on ne lance plus d'appel
+
+HEDGE = os.environ.get("UPSTREAM_HEDGE", "0") == "1"
+HEDGE_MIN_SAMPLES = 20
+HEDGE_MIN_DELAY = 0.05
+HEDGE_MAX_RATIO = float(os.environ.get("UPSTREAM_HEDGE_MAX_RATIO", "0.1"))
+
+session = requests.Session()
+session.mount("https://", HTTPAdapter(pool_connections=8, pool_maxsize=32))
+session.mount("http://", HTTPAdapter(pool_connections=8, pool_maxsize=32))
+
+_hedge_pool = ThreadPoolExecutor(max_workers=16, thread_name_prefix="upstream")
+
+
+class CircuitOpenError(requests.HTTPError):
+    """Circuit ouvert sur cette route et aucun résultat en cache."""
+
+
+class DeadlineExceeded(requests.HTTPError):
+    """Budget de temps de la requête épuisé avant l'appel amont."""
+
+
+def _is_upstream_failure(exc: Exception) -> bool:
+    if isinstance(exc, (requests.Timeout, requests.ConnectionError)):
+        return True
+    if isinstance(exc, requests.HTTPError) and exc.response is not None:
+        return exc.response.status_code >= 500 or exc.response.status_code == 429
+    return False
+
+
+# ============================================================
+# DISJONCTEUR
+# ============================================================
+
+class CircuitBreaker:
+    def __init__(self, route: str, threshold: int = FAILURE_THRESHOLD, probe_interval: float = PROBE_INTERVAL):
+        self.route = route
+        self.threshold = threshold
+        self.probe_interval = probe_interval
+        self.failures = 0
+        self.state = "closed"
+        self.opened_at: Optional[float] = None
+        self._probe: Optional[Callable[[], Any]] = None
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self) -> bool:
+        return self.state == "open"
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.state = "closed"
+            self.opened_at = None
+
+    def record_failure(self, probe: Callable[[], Any]):
+        with self._lock:
+            self.failures += 1
+            self._probe = probe
+            if self.state == "closed" and self.failures >= self.threshold:
+                self.state = "open"
+                self.opened_at = time.monotonic()
+                threading.Thread(target=self._probe_loop, name=f"probe{self.route}", daemon=True).start()
+
+    def _probe_loop(self):
+        while self.is_open:
+            time.sleep(self.probe_interval)
+            probe = self._probe
+            try:
+                probe()
+            except Exception:
+                continue
+            self.record_success()
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "failures": self.failures,
+            "open_for_s": round(time.monotonic() - self.opened_at, 1) if self.opened_at else None,
+        }
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def breaker_for(route: str) -> CircuitBreaker:
+    with _breakers_lock:
+        if route not in _breakers:
+            _breakers[route] = CircuitBreaker(route)
+        return _breakers[route]
+
+
+def breakers_status() -> Dict[str, Dict[str, Any]]:
+    status = {route: b.snapshot() for route, b in _breakers.items()}
+    for route, tracker in _latency.items():
+        p95 = tracker.p95()
+        status.setdefault(route, {}).update({
+            "p95_ms": round(p95 * 1000, 1) if p95 is not None else None,
+            "calls": tracker.calls,
+            "hedges": tracker.hedges,
+        })
+    return status
+
+
+# ============================================================
+# DERNIER RESULTAT VALIDE
+# ============================================================
+
+# clé -> (données, stocké à, empreinte, durée de fraîcheur propre ou None = FRESH_TTL[route])
+_last_good: "OrderedDict[Tuple, Tuple[Any, float, str, Optional[float]]]" = OrderedDict()
+_last_good_lock = threading.Lock()
+
+
+def _cache_key(path: str, params: Dict[str, Any]) -> Tuple:
+    return (path, tuple(sorted((k, str(v)) for k, v in params.items())))
+
+
+def _remember(key: Tuple, data: Any, digest: str, ttl: Optional[float] = None):
+    with _last_good_lock:
+        _last_good[key] = (data, time.time(), digest, ttl)
+        _last_good.move_to_end(key)
+        while len(_last_good) > LAST_GOOD_SIZE:
+            _last_good.popitem(last=False)
+
+
+def _recall(key: Tuple) -> Optional[Tuple[Any, float, str, Optional[float]]]:
+    with _last_good_lock:
+        return _last_good.get(key)
+
+
+def _is_fresh(route: str, stored_at: float, ttl: Optional[float] = None) -> bool:
+    return FRESH and time.time() - stored_at < (FRESH_TTL.get(route, 0) if ttl is None else ttl)
+
+
+def seed(path: str, params: Dict[str, Any], data: Any, digest: str, ttl: Optional[float] = None):
+    """
+    Dépose un résultat obtenu autrement (ex: ingestion en masse des cotes) comme
+    réponse de (path, params) : get() le resservira sans appel pendant ttl secondes
+    (sauf get(seeded=False), qui s'en tient à FRESH_TTL[route]).
+    """
+    _remember(_cache_key("/" + path.strip("/"), params), data, digest, ttl)
+
+
+def data_version(path: str, params: Dict[str, Any], fresh_only: bool = False) -> Optional[str]:
+    """
+    Empreinte du dernier résultat connu pour cette requête (None si inconnu,
+    ou si fresh_only et qu'il devra être redemandé à l'amont).
+    """
+    route = "/" + path.strip("/")
+    cached = _recall(_cache_key(route, params))
+    if cached is None:
+        return None
+    _, stored_at, digest, ttl = cached
+    if fresh_only and not _is_fresh(route, stored_at, ttl):
+        return None
+    return digest
+
+
+# ============================================================
+# PERIME OU PAS : SUIVI PAR REQUETE
+# ============================================================
+
+_stale_ages: ContextVar[Optional[List[float]]] = ContextVar("stale_ages", default=None)
+
+
+def track_staleness() -> List[float]:
+    """A appeler en début de requête : collecte l'âge des résultats périmés servis."""
+    ages: List[float] = []
+    _stale_ages.set(ages)
+    return ages
+
+
+def staleness_fields() -> Dict[str, Any]:
+    ages = _stale_ages.get()
+    if not ages:
+        return {"stale": None, "data_age_seconds": None}
+    return {"stale": True, "data_age_seconds": round(max(ages), 1)}
+
+
+def with_staleness(endpoint):
+    """
+    Décorateur d'endpoint : remplit stale / data_age_seconds sur la réponse
+    Pydantic si un résultat de secours a été utilisé.
+    """
+    @functools.wraps(endpoint)
+    def wrapper(*args, **kwargs):
+        track_staleness()
+        resp = endpoint(*args, **kwargs)
+        fields = staleness_fields()
+        if fields["stale"] and hasattr(resp, "stale"):
+            resp.stale = fields["stale"]
+            resp.data_age_seconds = fields["data_age_seconds"]
+        return resp
+    return wrapper
+
+
+# ============================================================
+# BUDGET DE TEMPS
+# ============================================================
+
+_deadline: ContextVar[Optional[float]] = ContextVar("deadline", default=None)
+
+
+def remaining_budget() -> Optional[float]:
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def with_deadline(seconds: Optional[float] = None):
+    """Décorateur d'endpoint : échéance globale partagée par tous ses appels amont."""
+    budget = REQUEST_DEADLINE if seconds is None else seconds
+
+    def decorator(endpoint):
+        @functools.wraps(endpoint)
+        def wrapper(*args, **kwargs):
+            _deadline.set(time.monotonic() + budget)
+            return endpoint(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+# ============================================================
+# LATENCES PAR ROUTE + HEDGING
+# ============================================================
+
+class LatencyTracker:
+    """Fenêtre glissante des latences réussies d'une route (p95 pour le hedging)."""
+
+    def __init__(self, size: int = 200):
+        self.samples = deque(maxlen=size)
+        self.calls = 0
+        self.hedges = 0
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float):
+        with self._lock:
+            self.samples.append(seconds)
+
+    def p95(self) -> Optional[float]:
+        with self._lock:
+            if len(self.samples) < HEDGE_MIN_SAMPLES:
+                return None
+            ordered = sorted(self.samples)
+        return ordered[int(0.95 * (len(ordered) - 1))]
+
+    def count_call(self):
+        with self._lock:
+            self.calls += 1
+
+    def take_hedge(self) -> bool:
+        """Réserve un doublon si le ratio hedges / appels reste sous HEDGE_MAX_RATIO."""
+        with self._lock:
+            if self.hedges >= HEDGE_MAX_RATIO * max(self.calls, 1):
+                return False
+            self.hedges += 1
+            return True
+
+
+_latency: Dict[str, LatencyTracker] = {}
+
+
+def latency_for(route: str) -> LatencyTracker:
+    with _breakers_lock:
+        if route not in _latency:
+            _latency[route] = LatencyTracker()
+        return _latency[route]
+
+
+# ============================================================
+# GET
+# ============================================================
+
+def _fetch(url: str, headers: Dict[str, str], params: Dict[str, Any], timeout: float) -> Tuple[Any, str]:
+    """(JSON, empreinte du corps brut)."""
+    r = session.get(url, headers=headers, params=params, timeout=timeout)
+    r.raise_for_status()
+    return r.json(), hashlib.blake2b(r.content, digest_size=8).hexdigest()
+
+
+def _fetch_hedged(route: str, url: str, headers: Dict[str, str], params: Dict[str, Any],
+                  timeout: float) -> Tuple[Any, str]:
+    """
+    Appel principal ; au-delà du p95 de la route, un doublon part en parallèle
+    et la première réponse valide l'emporte.
+    """
+    tracker = latency_for(route)
+    tracker.count_call()
+    t0 = time.monotonic()
+    delay = tracker.p95() if HEDGE else None
+
+    if delay is None or delay + HEDGE_MIN_DELAY >= timeout:
+        result = _fetch(url, headers, params, timeout)
+        tracker.record(time.monotonic() - t0)
+        return result
+
+    delay = max(delay, HEDGE_MIN_DELAY)
+    pending = {_hedge_pool.submit(_fetch, url, headers, params, timeout)}
+    done, pending = wait(pending, timeout=delay)
+    if not done and tracker.take_hedge():
+        pending.add(_hedge_pool.submit(_fetch, url, headers, params, timeout - delay))
+
+    error: Optional[BaseException] = None
+    while done or pending:
+        for fut in done:
+            if fut.exception() is None:
+                tracker.record(time.monotonic() - t0)
+                return fut.result()
+            error = fut.exception()
+        if not pending:
+            break
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+    raise error
+
+
+# Observateurs : reçoivent chaque réponse amont fraîche d'une route (ex: cache des fixtures)
+_observers: Dict[str, List[Callable[[Dict[str, Any], Any], None]]] = {}
+
+
+def observe(route: str, callback: Callable[[Dict[str, Any], Any], None]):
+    _observers.setdefault("/" + route.strip("/"), []).append(callback)
+
+
+def _notify(route: str, params: Dict[str, Any], data: Any):
+    for callback in _observers.get(route, ()):
+        try:
+            callback(params, data)
+        except Exception as e:        # un observateur ne doit jamais casser l'appel
+            print(f"⚠️ Observateur {route} en échec : {e}")
+
+
+def get(base: str, path: str, headers: Dict[str, str], params: Dict[str, Any],
+        timeout: float = DEFAULT_TIMEOUT, seeded: bool = True) -> Any:
+    """
+    GET JSON sur API-FOOTBALL avec disjoncteur par route et secours périmé.
+    seeded=False : la durée propre d'un résultat déposé par seed() est ignorée,
+    seule la fraîcheur de la route (FRESH_TTL) compte.
+    Lève requests.HTTPError (ou CircuitOpenError) si rien ne peut être servi.
+    """
+    route = "/" + path.strip("/")
+    breaker = breaker_for(route)
+    key = _cache_key(route, params)
+    url = f"{base}{route}"
+
+    def serve_stale(exc: Exception) -> Any:
+        cached = _recall(key)
+        if cached is None:
+            raise exc
+        data, stored_at = cached[0], cached[1]
+        ages = _stale_ages.get()
+        if ages is not None:
+            ages.append(time.time() - stored_at)
+        return data
+
+    token = route_token(route)
+    with span(f"cache_{token}") as cache_span:
+        cached = _recall(key)
+        cache_span["outcome"] = "miss" if cached is None else (
+            "hit" if _is_fresh(route, cached[1], cached[3] if seeded else None) else "expired")
+    if cache_span["outcome"] == "hit":
+        return cached[0]
+
+    with span(f"api_{token}") as call_span:
+        if breaker.is_open:
+            call_span["outcome"] = "circuit_open"
+            return serve_stale(CircuitOpenError(f"circuit ouvert sur {route} (API-FOOTBALL indisponible)"))
+
+        # Le timeout de l'appel est borné par le temps restant de la requête
+        call_timeout = timeout
+        remaining = remaining_budget()
+        if remaining is not None:
+            if remaining < MIN_CALL_BUDGET:
+                call_span["outcome"] = "no_budget"
+                return serve_stale(DeadlineExceeded(f"budget de temps épuisé avant l'appel {route}"))
+            call_timeout = min(timeout, remaining)
+
+        try:
+            data, digest = _fetch_hedged(route, url, headers, params, call_timeout)
+        except Exception as e:
+            call_span["outcome"] = type(e).__name__
+            # Un timeout dû à notre propre budget raccourci n'est pas une panne amont
+            truncated = call_timeout < timeout and isinstance(e, requests.Timeout)
+            if _is_upstream_failure(e) and not truncated:
+                breaker.record_failure(lambda: _fetch(url, headers, params, timeout))
+                return serve_stale(e)
+            if truncated:
+                return serve_stale(DeadlineExceeded(f"budget de temps épuisé pendant l'appel {route}"))
+            raise
+        call_span["outcome"] = "ok"
+
+    breaker.record_success()
+    _remember(key, data, digest)
+    _notify(route, params, data)
+    return data
@@ -1,3 +1,5 @@
+import numpy as np
+
 def kelly_fraction(p: float, odds: float, b_mult: float = 0.25) -> float:
     b = odds - 1.0
     if b <= 0:
@@ -5,3 +7,12 @@ def kelly_fraction(p: float, odds: float, b_mult: float = 0.25) -> float:
     f = (p * b - (1 - p)) / b
     f = max(0.0, min(f, 1.0))
     return f * b_mult
+
+def kelly_fraction_array(p, odds, b_mult: float = 0.25):
+    """Version vectorisée de kelly_fraction (NaN -> 0)."""
+    p = np.asarray(p, dtype=float)
+    b = np.asarray(odds, dtype=float) - 1.0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        f = (p * b - (1 - p)) / b
+    f = np.where(b > 0, np.clip(f, 0.0, 1.0), 0.0)
+    return np.nan_to_num(f) * b_mult
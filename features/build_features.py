@@ -1,5 +1,5 @@
 import pandas as pd
-from .elo import compute_elo_table
+from .elo_history import EloHistory
 
 def last_n_stats(df, team, date, n=5):
     past = df[
@@ -48,28 +48,25 @@ def last_n_stats(df, team, date, n=5):
         "form_points": sum(pts),
     })
 
-def build_features(df):
+def compute_elo_history(df, k=20, home_adv=60):
+    """Elo des clubs (avantage domicile), séries par équipe interrogeables à une date."""
     df = df.copy()
     df["date"] = pd.to_datetime(df["date"])
-    elo = compute_elo_table(df)
+    return EloHistory.from_matches(df, k=k, home_adv=home_adv)
 
-    # merge ELO home
-    df = df.merge(
-        elo[["date","league","team","elo"]],
-        left_on=["date","league","home"],
-        right_on=["date","league","team"],
-        how="left"
-    ).rename(columns={"elo":"elo_home"}).drop(columns=["team"])
+def build_features(df, elo=None):
+    df = df.copy()
+    df["date"] = pd.to_datetime(df["date"])
+    # Index 0..n-1 dans l'ordre des dates : les stats de forme sont concaténées par position
+    df = df.sort_values("date", kind="mergesort").reset_index(drop=True)
+    if elo is None:
+        elo = compute_elo_history(df)
 
-    # merge ELO away
-    df = df.merge(
-        elo[["date","league","team","elo"]],
-        left_on=["date","league","away"],
-        right_on=["date","league","team"],
-        how="left"
-    ).rename(columns={"elo":"elo_away"}).drop(columns=["team"])
+    # ELO lu strictement avant le jour du match (jointure as-of, une ligne par match)
+    df["elo_home"] = elo.ratings_as_of(df["home"], df["date"], strict=True)
+    df["elo_away"] = elo.ratings_as_of(df["away"], df["date"], strict=True)
 
-    df["f_elo_diff"] = (df["elo_home"] - df["elo_away"]).fillna(0.0)
+    df["f_elo_diff"] = df["elo_home"] - df["elo_away"]
 
     # Features de forme
     stats_home = []
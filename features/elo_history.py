@@ -0,0 +1,222 @@
+"""
+Historique Elo compact : une série de points de changement par équipe.
+
+compute_elo_table produit deux lignes (date, league, team, elo) par match, avec
+les chaînes répétées partout, puis les pronos filtrent cette table par masques
+booléens. Ici :
+  - team / league encodés par dictionnaire (int32 / int16),
+  - pour chaque équipe, un bloc contigu trié par jour :
+        days[offsets[t]:offsets[t+1]]     int32  (jours depuis 1970)
+        ratings[offsets[t]:offsets[t+1]]  float32 (Elo après le dernier match du jour)
+        leagues[offsets[t]:offsets[t+1]]  int16
+    un seul point par (équipe, jour), et seulement si l'Elo a changé.
+
+Requêtes "as of" par recherche dichotomique (np.searchsorted), vectorisées sur
+des lots (équipe, date), et parcours de plage pour les graphes.
+
+    python -m features.elo_history     # empreinte mémoire vs table longue
+"""
+
+import json
+import shutil
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+EPOCH = np.datetime64("1970-01-01", "D")
+
+_ARRAYS = ("offsets", "days", "ratings", "leagues")
+
+
+def to_days(dates) -> np.ndarray:
+    """Dates (str, Timestamp, datetime64...) -> jours depuis 1970 (int32)."""
+    values = pd.to_datetime(pd.Series(np.atleast_1d(dates))).to_numpy().astype("datetime64[D]")
+    return (values - EPOCH).astype(np.int32)
+
+
+def _key(team: np.ndarray, days: np.ndarray) -> np.ndarray:
+    """(équipe, jour) -> int64 croissant (les jours avant 1970 sont négatifs)."""
+    return (team.astype(np.int64) << 32) + (days.astype(np.int64) + 2 ** 31)
+
+
+class EloHistory:
+    """Séries Elo par équipe, triées par jour, interrogées par dichotomie."""
+
+    def __init__(self, teams: List[str], leagues: List[str], offsets: np.ndarray, days: np.ndarray,
+                 ratings: np.ndarray, league_codes: np.ndarray, base: float = 1500.0):
+        self.teams = list(teams)
+        self.leagues = list(leagues)
+        self.team_index: Dict[str, int] = {t: i for i, t in enumerate(self.teams)}
+        self.league_index: Dict[str, int] = {lg: i for i, lg in enumerate(self.leagues)}
+        self.offsets = offsets
+        self.days = days
+        self.ratings = ratings
+        self.league_codes = league_codes
+        self.base = float(base)
+        # clé globale triée (équipe, jour) pour les requêtes vectorisées
+        team_of_entry = np.repeat(np.arange(len(self.teams), dtype=np.int64), np.diff(offsets))
+        self._keys = _key(team_of_entry, days)
+
+    # ---------- construction ----------
+
+    @classmethod
+    def from_matches(cls, df: pd.DataFrame, base: float = 1500.0, k: float = 20.0,
+                     home_adv: float = 0.0) -> "EloHistory":
+        """
+        Rejoue l'Elo sur df (date, home, away, home_goals, away_goals[, league]),
+        dans le même ordre que compute_elo_table.
+        """
+        df = df.sort_values("date")
+        teams = sorted(set(df["home"].astype(str)) | set(df["away"].astype(str)))
+        index = {t: i for i, t in enumerate(teams)}
+        home = df["home"].astype(str).map(index).to_numpy()
+        away = df["away"].astype(str).map(index).to_numpy()
+        gh = df["home_goals"].to_numpy(dtype=float)
+        ga = df["away_goals"].to_numpy(dtype=float)
+        days = to_days(df["date"].to_numpy())
+        if "league" in df.columns:
+            league_codes, leagues = pd.factorize(df["league"].astype(str), sort=True)
+            leagues = list(leagues)
+        else:
+            league_codes, leagues = np.zeros(len(df), dtype=np.int64), [""]
+
+        rating = np.full(len(teams), float(base))
+        n = len(df)
+        out_rating = np.empty(2 * n)
+        for i in range(n):
+            a, b = home[i], away[i]
+            ra, rb = rating[a], rating[b]
+            ea = 1 / (1 + 10 ** (-(((ra + home_adv) - rb) / 400)))
+            sa = 1.0 if gh[i] > ga[i] else (0.0 if gh[i] < ga[i] else 0.5)
+            rating[a] = ra + k * (sa - ea)
+            rating[b] = rb + k * ((1 - sa) - (1 - ea))
+            out_rating[2 * i] = rating[a]
+            out_rating[2 * i + 1] = rating[b]
+
+        team_e = np.empty(2 * n, dtype=np.int64)
+        team_e[0::2], team_e[1::2] = home, away
+        day_e = np.repeat(days, 2)
+        league_e = np.repeat(np.asarray(league_codes), 2)
+        return cls._from_entries(teams, leagues, team_e, day_e, out_rating, league_e, base)
+
+    @classmethod
+    def _from_entries(cls, teams, leagues, team_e, day_e, rating_e, league_e, base) -> "EloHistory":
+        """Entrées chronologiques -> blocs par équipe, un point par jour, changements seulement."""
+        order = np.argsort(team_e, kind="stable")      # garde l'ordre chronologique dans chaque équipe
+        team_e, day_e, rating_e, league_e = team_e[order], day_e[order], rating_e[order], league_e[order]
+
+        # dernier point de chaque (équipe, jour)
+        last_of_day = np.ones(len(team_e), dtype=bool)
+        last_of_day[:-1] = (team_e[1:] != team_e[:-1]) | (day_e[1:] != day_e[:-1])
+        team_e, day_e, rating_e, league_e = (a[last_of_day] for a in (team_e, day_e, rating_e, league_e))
+
+        # on ne garde que les changements de valeur (ou de ligue) au sein d'une équipe
+        changed = np.ones(len(team_e), dtype=bool)
+        changed[1:] = (team_e[1:] != team_e[:-1]) | (rating_e[1:] != rating_e[:-1]) | (league_e[1:] != league_e[:-1])
+        team_e, day_e, rating_e, league_e = (a[changed] for a in (team_e, day_e, rating_e, league_e))
+
+        offsets = np.zeros(len(teams) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(team_e, minlength=len(teams)), out=offsets[1:])
+        return cls(teams, leagues, offsets, day_e.astype(np.int32), rating_e.astype(np.float32),
+                   league_e.astype(np.int16), base)
+
+    # ---------- requêtes ----------
+
+    def _slice(self, team: str) -> Optional[slice]:
+        t = self.team_index.get(team)
+        return None if t is None else slice(self.offsets[t], self.offsets[t + 1])
+
+    def rating_as_of(self, team: str, date, strict: bool = False, league: Optional[str] = None) -> float:
+        """
+        Elo de l'équipe après ses matchs du jour `date` inclus (strict=True : avant ce jour).
+        league : ne considère que les matchs de cette ligue (comme le filtre de predict_fixtures).
+        """
+        sl = self._slice(team)
+        if sl is None:
+            return self.base
+        days, ratings = self.days[sl], self.ratings[sl]
+        if league is not None:
+            code = self.league_index.get(league)
+            if code is None:
+                return self.base
+            mask = self.league_codes[sl] == code
+            days, ratings = days[mask], ratings[mask]
+        day = int(to_days(date)[0])
+        pos = np.searchsorted(days, day, side="left" if strict else "right")
+        return float(ratings[pos - 1]) if pos > 0 else self.base
+
+    def ratings_as_of(self, teams: Sequence[str], dates, strict: bool = False) -> np.ndarray:
+        """Version vectorisée (toutes ligues) : un Elo par couple (équipe, date)."""
+        t = np.array([self.team_index.get(str(x), -1) for x in teams], dtype=np.int64)
+        days = to_days(dates).astype(np.int64)
+        if len(days) == 1 and len(t) > 1:
+            days = np.repeat(days, len(t))
+        keys = _key(np.maximum(t, 0), days)
+        pos = np.searchsorted(self._keys, keys, side="left" if strict else "right") - 1
+        start = self.offsets[np.maximum(t, 0)]
+        found = (t >= 0) & (pos >= start)
+        out = np.full(len(t), self.base, dtype=np.float64)
+        out[found] = self.ratings[pos[found]]
+        return out
+
+    def range(self, team: str, start=None, end=None) -> Tuple[np.ndarray, np.ndarray]:
+        """(dates datetime64[D], Elo) de l'équipe entre start et end inclus, pour les graphes."""
+        sl = self._slice(team)
+        if sl is None:
+            return np.array([], dtype="datetime64[D]"), np.array([], dtype=np.float32)
+        days = self.days[sl]
+        lo = 0 if start is None else np.searchsorted(days, int(to_days(start)[0]), side="left")
+        hi = len(days) if end is None else np.searchsorted(days, int(to_days(end)[0]), side="right")
+        return EPOCH + days[lo:hi].astype("timedelta64[D]"), self.ratings[sl][lo:hi]
+
+    def current(self, team: str) -> float:
+        sl = self._slice(team)
+        if sl is None or sl.start == sl.stop:
+            return self.base
+        return float(self.ratings[sl.stop - 1])
+
+    @property
+    def nbytes(self) -> int:
+        return int(sum(getattr(self, a).nbytes for a in ("offsets", "days", "ratings", "league_codes")))
+
+    # ---------- persistance ----------
+
+    def save(self, path: Path):
+        tmp = path.with_name(path.name + ".tmp")
+        if tmp.exists():
+            shutil.rmtree(tmp)
+        tmp.mkdir(parents=True)
+        np.save(tmp / "offsets.npy", self.offsets)
+        np.save(tmp / "days.npy", self.days)
+        np.save(tmp / "ratings.npy", self.ratings)
+        np.save(tmp / "leagues.npy", self.league_codes)
+        meta = {"teams": self.teams, "leagues": self.leagues, "base": self.base}
+        (tmp / "meta.json").write_text(json.dumps(meta, ensure_ascii=False), encoding="utf-8")
+        if path.exists():
+            shutil.rmtree(path)
+        tmp.rename(path)
+
+    @classmethod
+    def load(cls, path: Path, mmap_mode: Optional[str] = None) -> "EloHistory":
+        meta = json.loads((path / "meta.json").read_text(encoding="utf-8"))
+        arrays = {name: np.load(path / f"{name}.npy", mmap_mode=mmap_mode) for name in _ARRAYS}
+        return cls(meta["teams"], meta["leagues"], arrays["offsets"], arrays["days"], arrays["ratings"],
+                   arrays["leagues"], meta["base"])
+
+
+def main():
+    from features.elo import compute_elo_table
+
+    root = Path(__file__).resolve().parent.parent
+    df = pd.read_csv(root / "data" / "raw" / "international.csv", parse_dates=["date"])
+    df["league"] = df["competition"]
+    hist = EloHistory.from_matches(df, home_adv=60.0)
+    table = compute_elo_table(df)
+    print(f"Table longue : {len(table)} lignes, {table.memory_usage(deep=True).sum() / 1e6:.1f} Mo")
+    print(f"EloHistory   : {len(hist.days)} points, {hist.nbytes / 1e6:.2f} Mo ({len(hist.teams)} équipes)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+"""
+Moteur de buts : buts attendus par équipe -> grille de probabilités des scores.
+
+Pour un lot de N matchs on construit un tenseur (N, G+1, G+1) :
+    grid[n, i, j] = P(home marque i, away marque j)
+avec deux lois de Poisson indépendantes (produit broadcasté NumPy).
+1N2, BTTS, Over/Under (n'importe quelle ligne) et scores les plus probables
+sont tous dérivés de cette même grille.
+
+Les grilles des couples (λ_home, λ_away) déjà vus sont gardées en cache (LRU).
+Quand on n'a que des probabilités 1N2 (cotes du marché), fit_lambdas retrouve
+les λ qui reproduisent ces probabilités.
+"""
+
+import math
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+
+MAX_GOALS = 10
+GRID_DECIMALS = 2          # arrondi des λ pour la clé de cache
+GRID_CACHE_SIZE = 4096
+LOG_LAMBDA_MIN, LOG_LAMBDA_MAX = np.log(0.05), np.log(6.0)
+
+_K = np.arange(MAX_GOALS + 1)
+_LOG_FACT = np.array([math.lgamma(k + 1) for k in _K])
+_HOME_WIN = _K[:, None] > _K[None, :]
+_AWAY_WIN = _K[:, None] < _K[None, :]
+_TOTALS = _K[:, None] + _K[None, :]
+
+_cache: "OrderedDict[Tuple[float, float], np.ndarray]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+# ============================================================
+# GRILLES
+# ============================================================
+
+def _poisson_pmf(lam: np.ndarray) -> np.ndarray:
+    lam = np.clip(np.asarray(lam, dtype=float), 1e-6, None)[:, None]
+    return np.exp(_K * np.log(lam) - lam - _LOG_FACT)
+
+
+def _compute_grids(lam_home: np.ndarray, lam_away: np.ndarray) -> np.ndarray:
+    grid = _poisson_pmf(lam_home)[:, :, None] * _poisson_pmf(lam_away)[:, None, :]
+    # La masse au-delà de MAX_GOALS est négligeable : on renormalise
+    return grid / grid.sum(axis=(1, 2), keepdims=True)
+
+
+def score_grid(lam_home, lam_away, use_cache: bool = True) -> np.ndarray:
+    """
+    Grilles (N, G+1, G+1) pour N couples (λ_home, λ_away).
+    Avec cache : λ arrondis à GRID_DECIMALS, seuls les couples absents sont calculés.
+    """
+    lh = np.atleast_1d(np.asarray(lam_home, dtype=float))
+    la = np.atleast_1d(np.asarray(lam_away, dtype=float))
+    if not use_cache:
+        return _compute_grids(lh, la)
+
+    keys = np.round(np.stack([lh, la], axis=1), GRID_DECIMALS)
+    uniq, inverse = np.unique(keys, axis=0, return_inverse=True)
+    grids = np.empty((len(uniq), MAX_GOALS + 1, MAX_GOALS + 1))
+
+    missing = []
+    with _cache_lock:
+        for i, key in enumerate(map(tuple, uniq)):
+            g = _cache.get(key)
+            if g is None:
+                missing.append(i)
+            else:
+                _cache.move_to_end(key)
+                grids[i] = g
+
+    if missing:
+        new = _compute_grids(uniq[missing, 0], uniq[missing, 1])
+        grids[missing] = new
+        with _cache_lock:
+            for i, g in zip(missing, new):
+                _cache[tuple(uniq[i])] = g
+            while len(_cache) > GRID_CACHE_SIZE:
+                _cache.popitem(last=False)
+
+    return grids[inverse.reshape(-1)]
+
+
+def cache_info() -> Dict[str, int]:
+    return {"size": len(_cache), "max_size": GRID_CACHE_SIZE}
+
+
+# ============================================================
+# MARCHES DERIVES DE LA GRILLE
+# ============================================================
+
+def markets(grid: np.ndarray, lines: Iterable[float] = (2.5,), top_n: int = 3) -> Dict[str, object]:
+    """
+    Tous les marchés à partir des mêmes grilles (N, G+1, G+1).
+    Retourne des tableaux de taille N (et des listes pour les scores exacts).
+    """
+    n = grid.shape[0]
+    out: Dict[str, object] = {
+        "p_home": (grid * _HOME_WIN).sum(axis=(1, 2)),
+        "p_draw": np.trace(grid, axis1=1, axis2=2),
+        "p_away": (grid * _AWAY_WIN).sum(axis=(1, 2)),
+        "btts_yes": grid[:, 1:, 1:].sum(axis=(1, 2)),
+        "xg_home": grid.sum(axis=2) @ _K,
+        "xg_away": grid.sum(axis=1) @ _K,
+    }
+    for line in lines:
+        out[f"over{line}"] = (grid * (_TOTALS > line)).sum(axis=(1, 2))
+
+    flat = grid.reshape(n, -1)
+    top = np.argsort(-flat, axis=1)[:, :top_n]
+    size = MAX_GOALS + 1
+    out["top_scores"] = [
+        [(f"{idx // size}-{idx % size}", float(flat[r, idx])) for idx in top[r]]
+        for r in range(n)
+    ]
+    return out
+
+
+# ============================================================
+# λ A PARTIR D'UN FIT DIXON-COLES (training/fit_dixon_coles.py)
+# ============================================================
+
+def expected_goals(dc_fit: Dict[str, object], homes, aways, neutral=False) -> Tuple[np.ndarray, np.ndarray]:
+    """λ_home, λ_away pour un lot de matchs ; équipe inconnue -> force moyenne (0)."""
+    index = {t: i for i, t in enumerate(dc_fit["teams"])}
+    att = np.append(dc_fit["attack"], 0.0)
+    dfn = np.append(dc_fit["defence"], 0.0)
+    unknown = len(dc_fit["teams"])
+    h = np.fromiter((index.get(t, unknown) for t in homes), dtype=np.int64)
+    a = np.fromiter((index.get(t, unknown) for t in aways), dtype=np.int64)
+    is_home = 1.0 - np.broadcast_to(np.asarray(neutral, dtype=float), h.shape)
+
+    lam_home = np.exp(dc_fit["mu"] + dc_fit["home_adv"] * is_home + att[h] - dfn[a])
+    lam_away = np.exp(dc_fit["mu"] + att[a] - dfn[h])
+    return lam_home, lam_away
+
+
+def apply_rho(grid: np.ndarray, lam_home, lam_away, rho: float) -> np.ndarray:
+    """Correction Dixon-Coles des scores 0-0, 0-1, 1-0, 1-1 (copie renormalisée)."""
+    lh = np.asarray(lam_home, dtype=float)
+    la = np.asarray(lam_away, dtype=float)
+    g = grid.copy()
+    g[:, 0, 0] *= 1 - lh * la * rho
+    g[:, 0, 1] *= 1 + lh * rho
+    g[:, 1, 0] *= 1 + la * rho
+    g[:, 1, 1] *= 1 - rho
+    g = np.clip(g, 0.0, None)
+    return g / g.sum(axis=(1, 2), keepdims=True)
+
+
+# ============================================================
+# λ A PARTIR DES PROBABILITES 1N2
+# ============================================================
+
+def fit_lambdas(p_home, p_away, iters: int = 30) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Trouve (λ_home, λ_away) tels que la grille Poisson reproduise p_home et p_away
+    (p_draw = 1 - p_home - p_away). Gauss-Newton vectorisé sur log λ,
+    jacobien par différences finies : tout le lot avance en même temps.
+    """
+    ph = np.atleast_1d(np.asarray(p_home, dtype=float))
+    pa = np.atleast_1d(np.asarray(p_away, dtype=float))
+    target = np.stack([ph, pa], axis=1)
+
+    # Point de départ : moyenne de ligue ~1.4 / 1.1, décalée selon le favori
+    x = np.stack([np.log(1.3) + (ph - pa), np.log(1.3) - (ph - pa)], axis=1)
+    eps = 1e-4
+
+    def f(x):
+        m = markets(_compute_grids(np.exp(x[:, 0]), np.exp(x[:, 1])), lines=(), top_n=1)
+        return np.stack([m["p_home"], m["p_away"]], axis=1)
+
+    for _ in range(iters):
+        fx = f(x)
+        r = fx - target
+        if np.abs(r).max() < 1e-7:
+            break
+        J = np.empty((len(x), 2, 2))
+        for j in range(2):
+            dx = x.copy()
+            dx[:, j] += eps
+            J[:, :, j] = (f(dx) - fx) / eps
+        # Levenberg léger pour les cas mal conditionnés
+        JT = np.transpose(J, (0, 2, 1))
+        A = JT @ J + 1e-9 * np.eye(2)
+        step = np.clip(np.linalg.solve(A, (JT @ r[:, :, None]))[:, :, 0], -1.0, 1.0)
+
+        # Recherche linéaire par match : on garde le pas qui réduit le plus le résidu
+        best_x = x
+        best_err = (r ** 2).sum(axis=1)
+        for alpha in (1.0, 0.5, 0.25, 0.125):
+            cand = np.clip(x - alpha * step, LOG_LAMBDA_MIN, LOG_LAMBDA_MAX)
+            err = ((f(cand) - target) ** 2).sum(axis=1)
+            better = err < best_err
+            best_x = np.where(better[:, None], cand, best_x)
+            best_err = np.where(better, err, best_err)
+        if np.array_equal(best_x, x):
+            break
+        x = best_x
+
+    return np.exp(x[:, 0]), np.exp(x[:, 1])
+
+
+def goals_markets_from_1x2(p_home, p_away, lines: Iterable[float] = (2.5,), top_n: int = 3) -> List[Dict[str, object]]:
+    """
+    Raccourci pour l'API : probabilités 1N2 -> λ -> grille -> marchés, par match.
+    """
+    lh, la = fit_lambdas(p_home, p_away)
+    m = markets(score_grid(lh, la), lines=lines, top_n=top_n)
+    keys = [k for k in m if k != "top_scores"]
+    rows = []
+    for i in range(len(lh)):
+        row = {k: float(m[k][i]) for k in keys}
+        row["lambda_home"] = float(lh[i])
+        row["lambda_away"] = float(la[i])
+        row["top_scores"] = m["top_scores"][i]
+        row["correct_score"] = m["top_scores"][i][0][0]
+        rows.append(row)
+    return rows
@@ -0,0 +1,360 @@
+"""
+Bundle de données mappables en mémoire, partagé entre workers uvicorn.
+
+Avec N workers, chaque process dépicklait sa copie des modèles, de l'état des
+équipes et de l'historique. Ici tout est écrit en .npy dans un dossier versionné,
+puis ouvert en lecture seule avec np.load(mmap_mode="r") : les workers
+partagent les mêmes pages physiques (page cache de l'OS).
+
+    models/mmap/<version>/
+        manifest.json
+        model_international/   scale.npy coef.npy intercept.npy meta.json
+        model_1x2/             (si le modèle est une logistique exportable, + cal_a.npy cal_b.npy si calibrée)
+        state_international/   format TeamStateStore.save
+        state_club/
+        history_international/ date_days.npy home.npy away.npy home_goals.npy away_goals.npy meta.json
+        elo_international/     format EloHistory.save (séries Elo par équipe)
+    models/mmap/current -> <version>   (lien symbolique, basculé par rename atomique)
+
+Construction et bascule :
+    python -m features.mmap_bundle build
+"""
+
+import json
+import os
+import shutil
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from features.elo_history import EloHistory
+from features.team_state import TeamStateStore, load_or_build
+
+ROOT = Path(__file__).resolve().parent.parent
+MODELS_DIR = ROOT / "models"
+BUNDLE_DIR = MODELS_DIR / "mmap"
+CURRENT = BUNDLE_DIR / "current"
+
+EPOCH = np.datetime64("1970-01-01", "D")
+
+# modèle -> fichier de ses colonnes de features
+MODEL_FILES = {
+    "model_international": "feature_columns_international.pkl",
+    "model_1x2": "feature_columns.pkl",
+}
+
+
+# ============================================================
+# MODELE LINEAIRE SANS PICKLE
+# ============================================================
+
+class LinearModel:
+    """
+    Equivalent numpy de Pipeline(StandardScaler(with_mean=False), LogisticRegression) :
+    mêmes predict_proba / classes_, poids lus depuis des .npy (mappables).
+    """
+
+    def __init__(self, scale: np.ndarray, coef: np.ndarray, intercept: np.ndarray, classes):
+        self.scale = scale
+        self.coef = coef
+        self.intercept = intercept
+        self.classes_ = np.asarray(classes)
+
+    def decision_function(self, X) -> np.ndarray:
+        X = np.asarray(X, dtype=float)
+        return (X / self.scale) @ self.coef.T + self.intercept
+
+    def predict_proba(self, X) -> np.ndarray:
+        z = self.decision_function(X)
+        if z.shape[1] == 1:
+            p = 1 / (1 + np.exp(-z[:, 0]))
+            return np.stack([1 - p, p], axis=1)
+        z = z - z.max(axis=1, keepdims=True)
+        e = np.exp(z)
+        return e / e.sum(axis=1, keepdims=True)
+
+    @classmethod
+    def from_pipeline(cls, pipe) -> Optional["LinearModel"]:
+        """None si le modèle n'a pas la forme scaler + logistique."""
+        steps = getattr(pipe, "named_steps", None)
+        if not steps or set(steps) != {"scaler", "clf"}:
+            return None
+        scaler, clf = steps["scaler"], steps["clf"]
+        if getattr(scaler, "with_mean", False) or not hasattr(clf, "coef_"):
+            return None
+        scale = scaler.scale_ if scaler.scale_ is not None else np.ones(clf.coef_.shape[1])
+        return cls(np.asarray(scale, dtype=float), clf.coef_.astype(float), clf.intercept_.astype(float), clf.classes_)
+
+    def save(self, path: Path, meta: Optional[Dict[str, Any]] = None):
+        path.mkdir(parents=True, exist_ok=True)
+        np.save(path / "scale.npy", self.scale)
+        np.save(path / "coef.npy", self.coef)
+        np.save(path / "intercept.npy", self.intercept)
+        meta = {"classes": [str(c) for c in self.classes_], **(meta or {})}
+        (path / "meta.json").write_text(json.dumps(meta), encoding="utf-8")
+
+    @classmethod
+    def load(cls, path: Path, mmap_mode: Optional[str] = "r") -> "LinearModel":
+        meta = json.loads((path / "meta.json").read_text(encoding="utf-8"))
+        arrays = [np.load(path / f"{name}.npy", mmap_mode=mmap_mode) for name in ("scale", "coef", "intercept")]
+        if meta.get("calibration") == "sigmoid":
+            return CalibratedLinearModel(*arrays, meta["classes"],
+                                         np.load(path / "cal_a.npy", mmap_mode=mmap_mode),
+                                         np.load(path / "cal_b.npy", mmap_mode=mmap_mode))
+        return cls(*arrays, meta["classes"])
+
+
+class CalibratedLinearModel(LinearModel):
+    """
+    Logistique + une seule calibration sigmoïde par classe (format de CalibratedClassifierCV,
+    method="sigmoid") : p_k = 1 / (1 + exp(a_k * z_k + b_k)), puis normalisation.
+    Voir training/calibration.py pour la réduction d'un ensemble calibré à ce modèle.
+    """
+
+    def __init__(self, scale: np.ndarray, coef: np.ndarray, intercept: np.ndarray, classes,
+                 cal_a: np.ndarray, cal_b: np.ndarray):
+        super().__init__(scale, coef, intercept, classes)
+        self.cal_a = cal_a
+        self.cal_b = cal_b
+
+    def predict_proba(self, X) -> np.ndarray:
+        z = self.decision_function(X)
+        p = 1 / (1 + np.exp(z * self.cal_a + self.cal_b))
+        if z.shape[1] == 1:
+            return np.concatenate([1 - p, p], axis=1)
+        total = p.sum(axis=1, keepdims=True)
+        return np.divide(p, total, out=np.full_like(p, 1 / p.shape[1]), where=total > 0)
+
+    def save(self, path: Path, meta: Optional[Dict[str, Any]] = None):
+        super().save(path, {"calibration": "sigmoid", **(meta or {})})
+        np.save(path / "cal_a.npy", self.cal_a)
+        np.save(path / "cal_b.npy", self.cal_b)
+
+
+# ============================================================
+# HISTORIQUE EN COLONNES
+# ============================================================
+
+# colonne texte -> clé du dictionnaire dans meta.json
+HISTORY_CATEGORIES = {"competition": "competitions", "country": "countries"}
+
+
+def _days(dates) -> np.ndarray:
+    return (pd.to_datetime(dates).to_numpy().astype("datetime64[D]") - EPOCH).astype(np.int32)
+
+
+def _neutral(values) -> np.ndarray:
+    return pd.Series(values).astype(str).str.lower().isin(["true", "1"]).to_numpy()
+
+
+def _write_history(path: Path, arrays: Dict[str, np.ndarray], meta: Dict[str, Any]):
+    """Ecrit les colonnes dans un dossier temporaire puis le substitue à path."""
+    tmp = path.with_name(path.name + ".tmp")
+    if tmp.exists():
+        shutil.rmtree(tmp)
+    tmp.mkdir(parents=True)
+    for name, arr in arrays.items():
+        np.save(tmp / f"{name}.npy", arr)
+    (tmp / "meta.json").write_text(json.dumps(meta, ensure_ascii=False), encoding="utf-8")
+    if path.exists():
+        shutil.rmtree(path)
+    tmp.rename(path)
+
+
+def save_history_columns(df: pd.DataFrame, path: Path):
+    """
+    Historique en colonnes typées : jours depuis 1970 (int32), équipes et
+    compétitions / pays encodés par dictionnaire (int32 / int16), buts (int16),
+    terrain neutre (bool).
+    """
+    df = df.sort_values("date", kind="mergesort")
+    teams = sorted(set(df["home"].astype(str)) | set(df["away"].astype(str)))
+    team_index = {t: i for i, t in enumerate(teams)}
+
+    arrays = {
+        "date_days": _days(df["date"]),
+        "home": df["home"].astype(str).map(team_index).to_numpy(dtype=np.int32),
+        "away": df["away"].astype(str).map(team_index).to_numpy(dtype=np.int32),
+        "home_goals": df["home_goals"].to_numpy(dtype=np.int16),
+        "away_goals": df["away_goals"].to_numpy(dtype=np.int16),
+    }
+    meta: Dict[str, Any] = {"teams": teams, "rows": int(len(df))}
+    for col, key in HISTORY_CATEGORIES.items():
+        if col in df.columns:
+            values = sorted(df[col].astype(str).unique())
+            index = {v: i for i, v in enumerate(values)}
+            arrays[col] = df[col].astype(str).map(index).to_numpy(dtype=np.int16)
+            meta[key] = values
+    if "neutral" in df.columns:
+        arrays["neutral"] = _neutral(df["neutral"])
+    path.mkdir(parents=True, exist_ok=True)
+    _write_history(path, arrays, meta)
+
+
+def append_history_columns(new: pd.DataFrame, path: Path):
+    """
+    Ajoute des matchs (postérieurs au dernier stocké) : les dictionnaires sont
+    étendus en fin de liste, les codes existants ne bougent pas.
+    """
+    cols = load_history_columns(path, mmap_mode=None)
+    meta = {k: v for k, v in cols.items() if not isinstance(v, np.ndarray)}
+    new = new.sort_values("date", kind="mergesort")
+
+    def extend(key: str, values: pd.Series) -> np.ndarray:
+        table = meta[key]
+        index = {v: i for i, v in enumerate(table)}
+        for v in values.astype(str).unique():
+            if v not in index:
+                index[v] = len(table)
+                table.append(v)
+        return values.astype(str).map(index).to_numpy()
+
+    added = {
+        "date_days": _days(new["date"]),
+        "home": extend("teams", new["home"]).astype(np.int32),
+        "away": extend("teams", new["away"]).astype(np.int32),
+        "home_goals": new["home_goals"].to_numpy(dtype=np.int16),
+        "away_goals": new["away_goals"].to_numpy(dtype=np.int16),
+    }
+    for col, key in HISTORY_CATEGORIES.items():
+        if col in cols:
+            added[col] = extend(key, new[col]).astype(np.int16)
+    if "neutral" in cols:
+        added["neutral"] = _neutral(new["neutral"])
+
+    arrays = {name: np.concatenate([cols[name], added[name]]) for name in added}
+    meta["rows"] = int(len(arrays["date_days"]))
+    _write_history(path, arrays, meta)
+
+
+def load_history_columns(path: Path, mmap_mode: Optional[str] = "r") -> Dict[str, Any]:
+    """Dict colonne -> tableau mappé, plus les dictionnaires 'teams' / 'competitions'."""
+    meta = json.loads((path / "meta.json").read_text(encoding="utf-8"))
+    cols: Dict[str, Any] = {name: np.load(f, mmap_mode=mmap_mode) for name, f in
+                            ((f.stem, f) for f in sorted(path.glob("*.npy")))}
+    cols.update(meta)
+    return cols
+
+
+# ============================================================
+# CONSTRUCTION / BASCULE / OUVERTURE
+# ============================================================
+
+def build(version: Optional[str] = None) -> Path:
+    """Ecrit un nouveau bundle versionné (sans basculer current)."""
+    version = version or datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+    target = BUNDLE_DIR / version
+    tmp = BUNDLE_DIR / f".{version}.tmp"
+    if tmp.exists():
+        shutil.rmtree(tmp)
+    tmp.mkdir(parents=True)
+
+    manifest: Dict[str, Any] = {"version": version, "created_at": datetime.now(timezone.utc).isoformat(), "models": {}}
+
+    for name, feat_file in MODEL_FILES.items():
+        src = MODELS_DIR / f"{name}.pkl"
+        if not src.exists():
+            continue
+        features = [str(c) for c in joblib.load(MODELS_DIR / feat_file)]
+        model = joblib.load(src)
+        linear = model if isinstance(model, LinearModel) else LinearModel.from_pipeline(model)
+        if linear is None:
+            # Modèle non linéaire (ex: calibration en ensemble) : pickle versionné avec le bundle
+            shutil.copy2(src, tmp / f"{name}.pkl")
+            manifest["models"][name] = {"format": "pickle", "features": features}
+            continue
+        linear.save(tmp / name)
+        manifest["models"][name] = {"format": "npy", "features": features}
+
+    for kind in ("international", "club"):
+        load_or_build(kind, save=False).save(tmp / f"state_{kind}")
+
+    hist = ROOT / "data" / "raw" / "international.csv"
+    if hist.exists():
+        df_hist = pd.read_csv(hist, parse_dates=["date"]).sort_values("date")
+        save_history_columns(df_hist, tmp / "history_international")
+        EloHistory.from_matches(df_hist).save(tmp / "elo_international")
+
+    (tmp / "manifest.json").write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+    tmp.rename(target)
+    return target
+
+
+def activate(version_dir: Path):
+    """Bascule atomique : nouveau lien symbolique puis rename par-dessus 'current'."""
+    link_tmp = BUNDLE_DIR / "current.tmp"
+    if link_tmp.is_symlink() or link_tmp.exists():
+        link_tmp.unlink()
+    os.symlink(version_dir.name, link_tmp)
+    os.replace(link_tmp, CURRENT)
+
+
+def prune(keep: int = 3):
+    """
+    Supprime les vieilles versions. Un worker qui mappe encore une version
+    supprimée continue de la lire (l'inode vit jusqu'au dernier munmap).
+    """
+    active = os.path.realpath(CURRENT) if CURRENT.is_symlink() else None
+    versions = sorted(p for p in BUNDLE_DIR.iterdir() if p.is_dir() and not p.is_symlink() and not p.name.startswith("."))
+    for old in versions[:-keep]:
+        if str(old.resolve()) != active:
+            shutil.rmtree(old)
+
+
+class Bundle:
+    """
+    Vue en lecture seule d'une version. Le lien 'current' est résolu une fois
+    à l'ouverture : un process garde une version cohérente jusqu'à réouverture.
+    """
+
+    def __init__(self, path: Path = CURRENT):
+        self.path = Path(os.path.realpath(path))
+        self.manifest = json.loads((self.path / "manifest.json").read_text(encoding="utf-8"))
+        self.version = self.manifest["version"]
+
+    def model(self, name: str):
+        info = self.manifest["models"].get(name)
+        if info is None:
+            raise FileNotFoundError(f"Modèle {name} absent du bundle {self.version}")
+        if info["format"] == "npy":
+            return LinearModel.load(self.path / name)
+        return joblib.load(self.path / f"{name}.pkl")
+
+    def feature_columns(self, name: str):
+        return list(self.manifest["models"][name]["features"])
+
+    def store(self, kind: str) -> TeamStateStore:
+        return TeamStateStore.load(self.path / f"state_{kind}", mmap_mode="r")
+
+    def history(self, kind: str = "international") -> Dict[str, Any]:
+        return load_history_columns(self.path / f"history_{kind}")
+
+    def elo_history(self, kind: str = "international") -> EloHistory:
+        return EloHistory.load(self.path / f"elo_{kind}", mmap_mode="r")
+
+
+def open_current() -> Optional[Bundle]:
+    return Bundle(CURRENT) if (CURRENT / "manifest.json").exists() else None
+
+
+def main():
+    cmd = sys.argv[1] if len(sys.argv) > 1 else "build"
+    if cmd == "build":
+        target = build()
+        activate(target)
+        prune()
+        print(f"✅ Bundle {target.name} construit et activé → {CURRENT}")
+    elif cmd == "activate" and len(sys.argv) > 2:
+        activate(BUNDLE_DIR / sys.argv[2])
+        print(f"✅ current → {sys.argv[2]}")
+    else:
+        print("Usage : python -m features.mmap_bundle [build | activate <version>]")
+
+
+if __name__ == "__main__":
+    main()
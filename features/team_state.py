@@ -0,0 +1,284 @@
+"""
+Store en ligne de l'état des équipes : Elo courant + forme des N derniers matchs.
+
+Au lieu de recalculer l'Elo sur tout l'historique (51k matchs pour les
+sélections) ou de rescanner l'historique à chaque prono, on matérialise :
+  - rating[i]        : Elo courant de l'équipe i
+  - gf/ga/pts[i, :]  : buffer circulaire des N derniers matchs
+  - pos[i], count[i] : position d'écriture et nombre de matchs vus
+
+Lecture en O(1) via un dict nom -> index, mise à jour en place à chaque
+nouveau résultat, et snapshot sur disque (fichiers .npy) pour redémarrer vite.
+
+Construction des snapshots :
+    python -m features.team_state
+"""
+
+import hashlib
+import json
+import shutil
+from pathlib import Path
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent.parent
+STATE_DIR = ROOT / "models" / "state"
+
+# Paramètres Elo alignés sur features/elo.py (clubs) et train_international.py (sélections)
+CLUB_PARAMS = {"base": 1500.0, "k": 20.0, "home_adv": 60.0, "n_form": 5}
+INTERNATIONAL_PARAMS = {"base": 1500.0, "k": 20.0, "home_adv": 0.0, "n_form": 5}
+
+SOURCES = {
+    "club": (ROOT / "data" / "raw" / "matches.csv", CLUB_PARAMS),
+    "international": (ROOT / "data" / "raw" / "international.csv", INTERNATIONAL_PARAMS),
+}
+
+_ARRAYS = ("rating", "gf", "ga", "pts", "pos", "count")
+
+
+class TeamStateStore:
+    """
+    Etat courant par équipe. Le rating est global par équipe (comme la table
+    de compute_elo_table, qui ne remet pas l'Elo à zéro en changeant de ligue).
+    """
+
+    def __init__(self, base=1500.0, k=20.0, home_adv=0.0, n_form=5, capacity=64):
+        self.base = float(base)
+        self.k = float(k)
+        self.home_adv = float(home_adv)
+        self.n_form = int(n_form)
+        self.as_of: Optional[str] = None
+        self.source_sha256: Optional[str] = None
+
+        self.index: Dict[str, int] = {}
+        self.names = []
+        self._alloc(capacity)
+
+    def _alloc(self, capacity: int):
+        n = self.n_form
+        self.rating = np.full(capacity, self.base, dtype=np.float64)
+        self.gf = np.zeros((capacity, n), dtype=np.float32)
+        self.ga = np.zeros((capacity, n), dtype=np.float32)
+        self.pts = np.zeros((capacity, n), dtype=np.float32)
+        self.pos = np.zeros(capacity, dtype=np.int32)
+        self.count = np.zeros(capacity, dtype=np.int32)
+
+    def _grow(self):
+        old = {name: getattr(self, name) for name in _ARRAYS}
+        size = len(self.names)
+        self._alloc(max(64, 2 * old["rating"].shape[0]))
+        for name, arr in old.items():
+            getattr(self, name)[:size] = arr[:size]
+
+    def _team_index(self, team: str) -> int:
+        idx = self.index.get(team)
+        if idx is None:
+            idx = len(self.names)
+            if idx >= self.rating.shape[0]:
+                self._grow()
+            self.index[team] = idx
+            self.names.append(team)
+        return idx
+
+    # ============================================================
+    # LECTURES O(1)
+    # ============================================================
+
+    def __contains__(self, team: str) -> bool:
+        return team in self.index
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def rating_of(self, team: str) -> float:
+        idx = self.index.get(team)
+        return float(self.rating[idx]) if idx is not None else self.base
+
+    def form(self, team: str) -> Dict[str, float]:
+        """Même convention que last_n_stats : buts / n, points cumulés."""
+        idx = self.index.get(team)
+        if idx is None or self.count[idx] == 0:
+            return {"form_goals_for": 0.0, "form_goals_against": 0.0, "form_points": 0.0}
+        n = self.n_form
+        return {
+            "form_goals_for": float(self.gf[idx].sum()) / n,
+            "form_goals_against": float(self.ga[idx].sum()) / n,
+            "form_points": float(self.pts[idx].sum()),
+        }
+
+    def features(self, home: str, away: str) -> Dict[str, float]:
+        """Features du modèle 1X2 pour un match home vs away."""
+        hs = self.form(home)
+        as_ = self.form(away)
+        return {
+            "f_elo_diff": self.rating_of(home) - self.rating_of(away),
+            "home_form_goals_for": hs["form_goals_for"],
+            "home_form_goals_against": hs["form_goals_against"],
+            "home_form_points": hs["form_points"],
+            "away_form_goals_for": as_["form_goals_for"],
+            "away_form_goals_against": as_["form_goals_against"],
+            "away_form_points": as_["form_points"],
+        }
+
+    def features_batch(self, homes, aways) -> Dict[str, np.ndarray]:
+        """Version vectorisée de features() : un gather NumPy par colonne."""
+        size = len(self.names)
+        n = self.n_form
+        # Ligne supplémentaire en fin de tableau = équipe inconnue (Elo de base, forme nulle)
+        rating = np.append(self.rating[:size], self.base)
+        gf = np.append(self.gf[:size].sum(axis=1) / n, 0.0)
+        ga = np.append(self.ga[:size].sum(axis=1) / n, 0.0)
+        pts = np.append(self.pts[:size].sum(axis=1), 0.0)
+
+        h = np.fromiter((self.index.get(t, size) for t in homes), dtype=np.int64)
+        a = np.fromiter((self.index.get(t, size) for t in aways), dtype=np.int64)
+        return {
+            "f_elo_diff": rating[h] - rating[a],
+            "home_form_goals_for": gf[h],
+            "home_form_goals_against": ga[h],
+            "home_form_points": pts[h],
+            "away_form_goals_for": gf[a],
+            "away_form_goals_against": ga[a],
+            "away_form_points": pts[a],
+        }
+
+    # ============================================================
+    # MISE A JOUR EN PLACE
+    # ============================================================
+
+    def _push(self, idx: int, gfor: float, gagn: float):
+        p = self.pos[idx]
+        self.gf[idx, p] = gfor
+        self.ga[idx, p] = gagn
+        self.pts[idx, p] = 3 if gfor > gagn else (1 if gfor == gagn else 0)
+        self.pos[idx] = (p + 1) % self.n_form
+        self.count[idx] += 1
+
+    def record_result(self, home: str, away: str, home_goals: float, away_goals: float, date=None):
+        """Applique un résultat : mise à jour Elo + buffers de forme des deux équipes."""
+        h = self._team_index(home)
+        a = self._team_index(away)
+        ra, rb = self.rating[h], self.rating[a]
+
+        ea = 1 / (1 + 10 ** (-(((ra + self.home_adv) - rb) / 400)))
+        if home_goals > away_goals:
+            sa = 1.0
+        elif home_goals < away_goals:
+            sa = 0.0
+        else:
+            sa = 0.5
+
+        self.rating[h] = ra + self.k * (sa - ea)
+        self.rating[a] = rb + self.k * ((1 - sa) - (1 - ea))
+
+        self._push(h, home_goals, away_goals)
+        self._push(a, away_goals, home_goals)
+
+        if date is not None:
+            self.as_of = str(pd.Timestamp(date).date())
+
+    @classmethod
+    def from_history(cls, df: pd.DataFrame, **params) -> "TeamStateStore":
+        """Rejoue l'historique une seule fois, dans le même ordre que EloHistory.from_matches."""
+        store = cls(**params)
+        df = df.assign(date=pd.to_datetime(df["date"])).sort_values("date")
+        cols = zip(df["home"].astype(str), df["away"].astype(str),
+                   df["home_goals"].astype(float), df["away_goals"].astype(float))
+        for h, a, gh, ga in cols:
+            store.record_result(h, a, gh, ga)
+        if len(df):
+            store.as_of = str(df["date"].iloc[-1].date())
+        return store
+
+    # ============================================================
+    # SNAPSHOT DISQUE
+    # ============================================================
+
+    def save(self, path: Path):
+        """Ecrit le snapshot dans un dossier temporaire puis le met en place."""
+        path = Path(path)
+        tmp = path.with_name(path.name + ".tmp")
+        if tmp.exists():
+            shutil.rmtree(tmp)
+        tmp.mkdir(parents=True)
+
+        size = len(self.names)
+        for name in _ARRAYS:
+            np.save(tmp / f"{name}.npy", getattr(self, name)[:size])
+        meta = {
+            "base": self.base,
+            "k": self.k,
+            "home_adv": self.home_adv,
+            "n_form": self.n_form,
+            "as_of": self.as_of,
+            "source_sha256": self.source_sha256,
+            "teams": self.names,
+        }
+        (tmp / "meta.json").write_text(json.dumps(meta, ensure_ascii=False), encoding="utf-8")
+
+        old = path.with_name(path.name + ".old")
+        if path.exists():
+            path.rename(old)
+        tmp.rename(path)
+        if old.exists():
+            shutil.rmtree(old)
+
+    @classmethod
+    def load(cls, path: Path, mmap_mode: Optional[str] = None) -> "TeamStateStore":
+        """
+        mmap_mode="r" : tableaux mappés en lecture seule, pages partagées entre
+        process (record_result lève alors une erreur) ; "c" : copie à l'écriture.
+        """
+        path = Path(path)
+        meta = json.loads((path / "meta.json").read_text(encoding="utf-8"))
+        store = cls(base=meta["base"], k=meta["k"], home_adv=meta["home_adv"], n_form=meta["n_form"], capacity=1)
+        for name in _ARRAYS:
+            setattr(store, name, np.load(path / f"{name}.npy", mmap_mode=mmap_mode))
+        store.names = list(meta["teams"])
+        store.index = {t: i for i, t in enumerate(store.names)}
+        store.as_of = meta.get("as_of")
+        store.source_sha256 = meta.get("source_sha256")
+        return store
+
+
+def _sha256_file(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def load_or_build(kind: str, save: bool = True) -> TeamStateStore:
+    """
+    Charge le snapshot 'club' ou 'international' s'il correspond à l'historique
+    actuel, sinon le reconstruit depuis le CSV (et le sauvegarde).
+    """
+    src, params = SOURCES[kind]
+    path = STATE_DIR / kind
+    sha = _sha256_file(src)
+
+    if (path / "meta.json").exists():
+        store = TeamStateStore.load(path)
+        if store.source_sha256 == sha:
+            return store
+
+    # Même chargement que les scripts (tri puis re-tri) pour un ordre identique des matchs du même jour
+    df = pd.read_csv(src, parse_dates=["date"]).sort_values("date")
+    store = TeamStateStore.from_history(df, **params)
+    store.source_sha256 = sha
+    if save:
+        store.save(path)
+    return store
+
+
+def main():
+    for kind in SOURCES:
+        store = load_or_build(kind)
+        print(f"✅ Snapshot {kind} : {len(store)} équipes, à jour au {store.as_of} → {STATE_DIR / kind}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""
+Scoring vectorisé d'un lot de matchs à partir d'un modèle déjà chargé et du
+store d'état des équipes (features/team_state.py).
+
+Une seule construction de matrice X et un seul predict_proba pour tout le lot,
+puis value (p * cote) et mise Kelly calculées en colonnes.
+
+Les matchs datés au plus tard au jour de l'état (store.as_of) sont déjà couverts
+par l'historique : comme le mode interactif, leurs features sont recalculées à
+la date du match (Elo as-of + forme des 5 matchs précédents) via AsOfHistory.
+La colonne features_date indique la date des features de chaque ligne.
+"""
+
+import time
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from betting.kelly import kelly_fraction_array
+from features.elo_history import EloHistory, to_days
+from features.team_state import SOURCES, TeamStateStore
+
+ODDS_COLS = ["home_odds", "draw_odds", "away_odds"]
+SIDES = ["home", "draw", "away"]
+
+
+# ============================================================
+# FEATURES A LA DATE DU MATCH
+# ============================================================
+
+class AsOfHistory:
+    """
+    Historique des résultats interrogeable à une date, mêmes conventions que
+    last_n_stats (matchs strictement avant le jour, buts / n, points cumulés)
+    et qu'EloHistory.rating_as_of(strict=True).
+    """
+
+    def __init__(self, matches: pd.DataFrame, elo: EloHistory, n_form: int = 5, by_league: bool = False):
+        self.elo = elo
+        self.n_form = n_form
+        self.by_league = by_league      # clubs : Elo filtré par ligue, comme fixtures/predict_fixtures.py
+
+        df = matches.sort_values("date", kind="mergesort")      # garde l'ordre donné des matchs du même jour
+        teams = sorted(set(df["home"].astype(str)) | set(df["away"].astype(str)))
+        self.index = {t: i for i, t in enumerate(teams)}
+        hg = df["home_goals"].to_numpy(dtype=float)
+        ag = df["away_goals"].to_numpy(dtype=float)
+        days = to_days(df["date"]).astype(np.int64)
+
+        # une ligne par (équipe, match), triée par équipe puis jour
+        team = np.concatenate([df["home"].astype(str).map(self.index), df["away"].astype(str).map(self.index)])
+        gf = np.concatenate([hg, ag])
+        ga = np.concatenate([ag, hg])
+        row = np.tile(np.arange(len(df)), 2)
+        order = np.lexsort((row, np.tile(days, 2), team))
+        self._keys = self._key(team[order], np.tile(days, 2)[order])
+        self._start = np.searchsorted(team[order], np.arange(len(teams) + 1))
+        pts = np.where(gf > ga, 3.0, np.where(gf == ga, 1.0, 0.0))
+        self._cum = {name: np.concatenate([[0.0], np.cumsum(v[order])])
+                     for name, v in (("gf", gf), ("ga", ga), ("pts", pts))}
+
+    @staticmethod
+    def _key(team: np.ndarray, days: np.ndarray) -> np.ndarray:
+        return (team.astype(np.int64) << 32) + (days.astype(np.int64) + 2 ** 31)
+
+    @classmethod
+    def load(cls, kind: str) -> "AsOfHistory":
+        """Historique 'club' ou 'international' (mêmes paramètres Elo que l'état des équipes)."""
+        src, params = SOURCES[kind]
+        df = pd.read_csv(src, parse_dates=["date"]).sort_values("date")
+        elo = EloHistory.from_matches(df, base=params["base"], k=params["k"], home_adv=params["home_adv"])
+        return cls(df, elo, n_form=params["n_form"], by_league=kind == "club")
+
+    def _form(self, teams: Sequence[str], days: np.ndarray) -> Dict[str, np.ndarray]:
+        t = np.fromiter((self.index.get(str(x), -1) for x in teams), dtype=np.int64, count=len(teams))
+        known = t >= 0
+        tt = np.maximum(t, 0)
+        pos = np.searchsorted(self._keys, self._key(tt, days), side="left")     # matchs avant ce jour
+        lo = np.maximum(self._start[tt], pos - self.n_form)
+        out = {}
+        for name, cum in self._cum.items():
+            total = np.where(known, cum[pos] - cum[lo], 0.0)
+            out[name] = total if name == "pts" else total / self.n_form
+        return out
+
+    def features_batch(self, homes, aways, dates, leagues=None) -> Dict[str, np.ndarray]:
+        homes = [str(x) for x in homes]
+        aways = [str(x) for x in aways]
+        days = to_days(dates).astype(np.int64)
+        if self.by_league and leagues is not None:
+            elo_home = np.array([self.elo.rating_as_of(h, d, strict=True, league=str(lg))
+                                 for h, d, lg in zip(homes, dates, leagues)])
+            elo_away = np.array([self.elo.rating_as_of(a, d, strict=True, league=str(lg))
+                                 for a, d, lg in zip(aways, dates, leagues)])
+        else:
+            elo_home = self.elo.ratings_as_of(homes, dates, strict=True)
+            elo_away = self.elo.ratings_as_of(aways, dates, strict=True)
+        hs = self._form(homes, days)
+        as_ = self._form(aways, days)
+        return {
+            "f_elo_diff": elo_home - elo_away,
+            "home_form_goals_for": hs["gf"],
+            "home_form_goals_against": hs["ga"],
+            "home_form_points": hs["pts"],
+            "away_form_goals_for": as_["gf"],
+            "away_form_goals_against": as_["ga"],
+            "away_form_points": as_["pts"],
+        }
+
+
+def past_mask(store: TeamStateStore, fixtures: pd.DataFrame) -> np.ndarray:
+    """Matchs datés au plus tard au jour de l'état : features à recalculer à leur date."""
+    if "date" not in fixtures.columns or not store.as_of:
+        return np.zeros(len(fixtures), dtype=bool)
+    dates = pd.to_datetime(fixtures["date"], errors="coerce")
+    return (dates <= pd.Timestamp(store.as_of)).to_numpy()
+
+
+# ============================================================
+# SCORING
+# ============================================================
+
+def score_batch(model, feature_cols, store: TeamStateStore, fixtures: pd.DataFrame,
+                b_mult: float = 0.25, history: Optional[AsOfHistory] = None) -> Tuple[pd.DataFrame, float]:
+    """
+    fixtures : colonnes home, away (+ optionnellement league, date, home_odds, draw_odds, away_odds).
+    history : requis si des matchs sont datés au plus tard à store.as_of (ValueError sinon).
+    Retourne (DataFrame des pronos, coût moyen par prédiction en microsecondes).
+    """
+    t0 = time.perf_counter()
+    n = len(fixtures)
+    out = fixtures.reset_index(drop=True).copy()
+    if n == 0:
+        for side in SIDES:
+            out[f"p_{side}"] = []
+        return out, 0.0
+
+    feats = store.features_batch(out["home"].astype(str), out["away"].astype(str))
+    past = past_mask(store, out)
+    out["features_date"] = store.as_of
+    if past.any():
+        if history is None:
+            raise ValueError(f"{int(past.sum())} match(s) daté(s) au plus tard au {store.as_of} : "
+                             "historique requis pour les features à la date du match")
+        rows = out[past]
+        dates = pd.to_datetime(rows["date"])
+        leagues = rows["league"] if "league" in rows.columns else None
+        old = history.features_batch(rows["home"], rows["away"], dates, leagues)
+        for col, values in old.items():
+            feats[col] = np.asarray(feats[col], dtype=float).copy()
+            feats[col][past] = values
+        out.loc[past, "features_date"] = dates.dt.strftime("%Y-%m-%d").to_numpy()
+    X = pd.DataFrame({col: feats.get(col, np.zeros(n)) for col in feature_cols})
+
+    proba = model.predict_proba(X)
+    classes = [str(c) for c in model.classes_]
+    for side in SIDES:
+        out[f"p_{side}"] = proba[:, classes.index(side)] if side in classes else 0.0
+
+    if all(c in out.columns for c in ODDS_COLS):
+        for side in SIDES:
+            odds = pd.to_numeric(out[f"{side}_odds"], errors="coerce").to_numpy(dtype=float)
+            p = out[f"p_{side}"].to_numpy(dtype=float)
+            out[f"value_{side}"] = p * odds
+            out[f"stake_{side}"] = kelly_fraction_array(p, odds, b_mult=b_mult)
+
+    elapsed_us = (time.perf_counter() - t0) * 1e6
+    return out, elapsed_us / n
@@ -1,8 +1,9 @@
 import pandas as pd
-import joblib
 from pathlib import Path
-from features.elo import compute_elo_table
+from features.elo_history import EloHistory
+from features.team_state import load_or_build
 from betting.kelly import kelly_fraction
+from training.registry import ModelRegistry
 
 FIXTURES = Path("data/fixtures/fixtures.csv")
 HISTO    = Path("data/raw/matches.csv")
@@ -37,11 +38,14 @@ def main():
     if not HISTO.exists():
         raise SystemExit("Fichier manquant: data/raw/matches.csv (ingestion requise)")
 
-    model = joblib.load("models/model_1x2.pkl")
-    feature_cols = joblib.load("models/feature_columns.pkl")
+    # Modèle de la ligue si le registre en a un, sinon modèle global
+    registry = ModelRegistry.load()
+    feature_cols = registry.features
 
-    histo = pd.read_csv(HISTO, parse_dates=["date"]).sort_values("date")
-    elo = compute_elo_table(histo)
+    # Etat courant des équipes : lecture O(1) pour les matchs à venir
+    store = load_or_build("club")
+    as_of = pd.Timestamp(store.as_of) if store.as_of else None
+    histo = elo = None
 
     fx = pd.read_csv(FIXTURES, parse_dates=["date"])
     rows = []
@@ -54,31 +58,31 @@ def main():
             str(r["away"]),
         )
 
-        def last_elo(team):
-            s = elo[
-                (elo["league"] == league)
-                & (elo["team"] == team)
-                & (elo["date"] <= date)
-            ].sort_values("date").tail(1)["elo"]
-
-            return float(s.squeeze()) if not s.empty else 1500.0
-
-        elo_home = last_elo(home)
-        elo_away = last_elo(away)
-
-        hstats = last_n_stats(histo, home, date)
-        astats = last_n_stats(histo, away, date)
-
-        features = {
-            "f_elo_diff": elo_home - elo_away,
-            "home_form_goals_for": hstats["form_goals_for"],
-            "home_form_goals_against": hstats["form_goals_against"],
-            "home_form_points": hstats["form_points"],
-            "away_form_goals_for": astats["form_goals_for"],
-            "away_form_goals_against": astats["form_goals_against"],
-            "away_form_points": astats["form_points"],
-        }
-
+        if as_of is not None and date > as_of:
+            features = store.features(home, away)
+        else:
+            # Match déjà couvert par l'historique : calcul à la date (chargé une seule fois)
+            if histo is None:
+                histo = pd.read_csv(HISTO, parse_dates=["date"]).sort_values("date")
+                elo = EloHistory.from_matches(histo, k=20, home_adv=60)
+
+            elo_home = elo.rating_as_of(home, date, strict=True, league=league)
+            elo_away = elo.rating_as_of(away, date, strict=True, league=league)
+
+            hstats = last_n_stats(histo, home, date)
+            astats = last_n_stats(histo, away, date)
+
+            features = {
+                "f_elo_diff": elo_home - elo_away,
+                "home_form_goals_for": hstats["form_goals_for"],
+                "home_form_goals_against": hstats["form_goals_against"],
+                "home_form_points": hstats["form_points"],
+                "away_form_goals_for": astats["form_goals_for"],
+                "away_form_goals_against": astats["form_goals_against"],
+                "away_form_points": astats["form_points"],
+            }
+
+        _, model = registry.model_for(league)
         X = pd.DataFrame([{col: features.get(col, 0) for col in feature_cols}])
         proba = model.predict_proba(X)[0]
         classes = list(model.classes_)
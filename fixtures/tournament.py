@@ -0,0 +1,385 @@
+"""
+Simulation Monte Carlo d'un tournoi de sélections (Coupe du Monde, Euro) :
+probabilité de chaque nation d'atteindre chaque tour.
+
+    python -m fixtures.tournament data/tournaments/euro2024.json -n 200000 --workers 4
+
+Structure (JSON) :
+    groups       {"A": ["Germany", "Scotland", ...], ...}      groupes de même taille, round-robin
+    tiebreakers  ["points", "goal_diff", "goals_for"]           puis tirage au sort
+    best_thirds  4                                               meilleurs 3es qualifiés (0 = aucun)
+    knockout     [["1B", "3ADEF"], ["1A", "2C"], ...]            premier tour, dans l'ordre du tableau :
+                                                                 le vainqueur du match 2k affronte celui du 2k+1
+    third_place_table  {"CDEF": {"1B": "F", "1C": "E", ...}}     table officielle : pour chaque combinaison de
+                                                                 groupes dont le 3e se qualifie, groupe du 3e
+                                                                 opposé à chaque adversaire ("1B" affronte 3F)
+  "1A" = premier du groupe A, "2C" = deuxième du groupe C, "3ADEF" = un meilleur
+  3e venant d'un des groupes A, D, E ou F. Sans third_place_table, les 3es sont
+  affectés par appariement dans l'ordre des groupes (valide, mais pas forcément
+  le tableau officiel).
+
+Départage : les critères sont appliqués sur l'ensemble des matchs de poule.
+La confrontation directe (premier critère à l'Euro et à la Coupe du Monde) n'est
+pas modélisée : entre équipes à égalité de points, elle est approchée par la
+différence de buts générale, puis les buts marqués, les victoires et le tirage.
+
+Calcul :
+  - une seule fois : P(victoire, nul, défaite) pour chaque couple de nations
+    (model_international.pkl + état des sélections, un predict_proba pour N² lignes),
+    symétrisée (terrain neutre), puis λ de Poisson par couple (features.goals.fit_lambdas)
+    pour les scores des matchs de poule ;
+  - par lot de CHUNK tournois : buts tirés d'un bloc (S, matchs), points et
+    différence de buts par produit matriciel, classement par argsort, tableau
+    à élimination directe en gathers NumPy (nul -> prolongation/tirs au but au
+    prorata des probabilités de victoire) ;
+  - les lots sont répartis sur --workers process (graines indépendantes).
+"""
+
+import argparse
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from itertools import combinations
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from features.goals import fit_lambdas
+from features.team_state import TeamStateStore, load_or_build
+
+ROOT = Path(__file__).resolve().parent.parent
+MODEL_PATH = ROOT / "models" / "model_international.pkl"
+FEAT_PATH = ROOT / "models" / "feature_columns_international.pkl"
+
+CHUNK = 25_000
+TIEBREAKERS = ("points", "goal_diff", "goals_for", "wins")
+ROUND_NAMES = {64: "round_of_64", 32: "round_of_32", 16: "round_of_16", 8: "quarter_final",
+               4: "semi_final", 2: "final"}
+
+
+# ============================================================
+# STRUCTURE
+# ============================================================
+
+@dataclass
+class Tournament:
+    name: str
+    teams: List[str]                 # dans l'ordre des groupes
+    group_names: List[str]
+    group_size: int
+    tiebreakers: List[str]
+    best_thirds: int
+    slots: List[Tuple[str, int, str]]        # ("pos", rang, groupe) ou ("third", 0, groupes autorisés)
+    third_table: Optional[np.ndarray] = None  # (2**n_groupes, n_slots_3e) -> groupe, -1 si impossible
+
+    @property
+    def n_groups(self) -> int:
+        return len(self.group_names)
+
+    def rounds(self) -> List[str]:
+        names, n = [], len(self.slots)
+        while n >= 2:
+            names.append(ROUND_NAMES.get(n, f"last_{n}"))
+            n //= 2
+        return names + ["champion"]
+
+
+def _parse_slot(token: str, group_names: Sequence[str]) -> Tuple[str, int, str]:
+    token = token.strip().upper()
+    rank, groups = token[:1], token[1:]
+    if rank == "3" and len(groups) > 1:
+        return "third", 0, groups
+    if not rank.isdigit() or groups not in group_names:
+        raise ValueError(f"Emplacement de tableau invalide : {token!r} (ex: 1A, 2C, 3ADEF)")
+    return "pos", int(rank) - 1, groups
+
+
+def _third_table(slots, group_names: Sequence[str], best_thirds: int) -> np.ndarray:
+    """
+    Pour chaque combinaison de groupes dont le 3e se qualifie, groupe affecté à chaque
+    emplacement 3e (premier appariement trouvé dans l'ordre des groupes : repli quand
+    le JSON ne donne pas de third_place_table).
+    """
+    allowed = [set(g) for kind, _, g in slots if kind == "third"]
+    table = np.full((2 ** len(group_names), len(allowed)), -1, dtype=np.int64)
+
+    def assign(k: int, free: List[str]) -> Optional[List[str]]:
+        if k == len(allowed):
+            return []
+        for g in free:
+            if g in allowed[k]:
+                rest = assign(k + 1, [x for x in free if x != g])
+                if rest is not None:
+                    return [g] + rest
+        return None
+
+    for combo in combinations(range(len(group_names)), best_thirds):
+        picked = assign(0, [group_names[i] for i in combo])
+        if picked is None:
+            raise ValueError(f"Aucune affectation des 3es pour les groupes {[group_names[i] for i in combo]}")
+        mask = sum(1 << i for i in combo)
+        table[mask] = [group_names.index(g) for g in picked]
+    return table
+
+
+def _official_third_table(spec_table: Dict[str, Dict[str, str]], matches: List[List[str]],
+                          group_names: Sequence[str], best_thirds: int) -> np.ndarray:
+    """third_place_table du JSON -> même tableau que _third_table, contrôlé contre le tableau."""
+    opponents = []                                  # adversaire de chaque emplacement 3e, dans l'ordre
+    for match in matches:
+        tokens = [tok.strip().upper() for tok in match]
+        for i, tok in enumerate(tokens):
+            if tok[:1] == "3" and len(tok) > 2:
+                opponents.append((tokens[1 - i], set(tok[1:])))
+
+    table = np.full((2 ** len(group_names), len(opponents)), -1, dtype=np.int64)
+    rows = {"".join(sorted(k.strip().upper())): v for k, v in spec_table.items()}
+    for combo in combinations(range(len(group_names)), best_thirds):
+        qualified = "".join(sorted(group_names[i] for i in combo))
+        row = {k.strip().upper(): str(v).strip().upper().removeprefix("3") for k, v in rows.get(qualified, {}).items()}
+        picked = [row.get(opp) for opp, _ in opponents]
+        if sorted(g for g in picked if g) != sorted(qualified):
+            raise ValueError(f"third_place_table : ligne {qualified} absente ou incomplète ({row}).")
+        for (opp, allowed), g in zip(opponents, picked):
+            if g not in allowed:
+                raise ValueError(f"third_place_table : {opp} ne peut pas affronter 3{g} (3{''.join(sorted(allowed))}).")
+        table[sum(1 << i for i in combo)] = [group_names.index(g) for g in picked]
+    return table
+
+
+def load_tournament(path: Path) -> Tournament:
+    spec = json.loads(Path(path).read_text(encoding="utf-8"))
+    groups: Dict[str, List[str]] = spec["groups"]
+    group_names = list(groups)
+    sizes = {len(t) for t in groups.values()}
+    if len(sizes) != 1:
+        raise ValueError("Tous les groupes doivent avoir la même taille.")
+    teams = [t for g in group_names for t in groups[g]]
+    if len(set(teams)) != len(teams):
+        raise ValueError("Une sélection apparaît dans plusieurs groupes.")
+
+    tiebreakers = spec.get("tiebreakers", ["points", "goal_diff", "goals_for"])
+    unknown = set(tiebreakers) - set(TIEBREAKERS)
+    if unknown:
+        raise ValueError(f"Critères non gérés : {sorted(unknown)} (disponibles : {', '.join(TIEBREAKERS)})")
+
+    slots = [_parse_slot(tok, group_names) for match in spec["knockout"] for tok in match]
+    n = len(slots)
+    if n < 2 or n & (n - 1):
+        raise ValueError(f"Le premier tour à élimination directe doit compter 2^k équipes (reçu {n}).")
+    best_thirds = int(spec.get("best_thirds", 0))
+    n_third_slots = sum(kind == "third" for kind, _, _ in slots)
+    if n_third_slots != best_thirds:
+        raise ValueError(f"{n_third_slots} emplacements 3e dans le tableau pour best_thirds={best_thirds}.")
+
+    t = Tournament(spec.get("name", Path(path).stem), teams, group_names, sizes.pop(),
+                   list(tiebreakers), best_thirds, slots)
+    if best_thirds and spec.get("third_place_table"):
+        t.third_table = _official_third_table(spec["third_place_table"], spec["knockout"], group_names, best_thirds)
+    elif best_thirds:
+        t.third_table = _third_table(slots, group_names, best_thirds)
+    return t
+
+
+# ============================================================
+# PROBABILITES PAR COUPLE (UNE SEULE FOIS)
+# ============================================================
+
+def outcome_matrix(model, feature_cols, store: TeamStateStore, teams: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    (P_win, P_draw) de taille (N, N) en terrain neutre : moyenne de i reçoit j et
+    j reçoit i (P_win[i, j] = P(i bat j), P_draw symétrique).
+    """
+    n = len(teams)
+    ii, jj = np.meshgrid(np.arange(n), np.arange(n), indexing="ij")
+    homes = np.asarray(teams, dtype=object)[ii.ravel()]
+    aways = np.asarray(teams, dtype=object)[jj.ravel()]
+    feats = store.features_batch(pd.Series(homes).astype(str), pd.Series(aways).astype(str))
+    X = pd.DataFrame({col: feats.get(col, np.zeros(n * n)) for col in feature_cols})
+    proba = model.predict_proba(X)
+    classes = [str(c) for c in model.classes_]
+    p_home = proba[:, classes.index("home")].reshape(n, n)
+    p_draw = proba[:, classes.index("draw")].reshape(n, n)
+    p_away = proba[:, classes.index("away")].reshape(n, n)
+
+    p_win = (p_home + p_away.T) / 2
+    p_tie = (p_draw + p_draw.T) / 2
+    np.fill_diagonal(p_win, 0.0)
+    np.fill_diagonal(p_tie, 0.0)
+    return p_win, p_tie
+
+
+def goal_rates(p_win: np.ndarray) -> np.ndarray:
+    """λ[i, j] = buts attendus de i contre j, tels que la grille Poisson reproduise P_win."""
+    n = len(p_win)
+    lam = np.zeros((n, n))
+    i, j = np.triu_indices(n, k=1)
+    lh, la = fit_lambdas(p_win[i, j], p_win[j, i])
+    lam[i, j], lam[j, i] = lh, la
+    return lam
+
+
+def advance_matrix(p_win: np.ndarray, p_tie: np.ndarray) -> np.ndarray:
+    """P(i passe contre j) en élimination directe : le nul se partage au prorata des victoires."""
+    decisive = p_win + p_win.T
+    share = np.divide(p_win, decisive, out=np.full_like(p_win, 0.5), where=decisive > 0)
+    return p_win + p_tie * share
+
+
+# ============================================================
+# SIMULATION VECTORISEE
+# ============================================================
+
+def _group_stage(t: Tournament, lam: np.ndarray, rng: np.random.Generator, s: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Classements (S, n_groupes, taille) en indices globaux d'équipes, et clé de tri des équipes (S, N)."""
+    g, size = t.n_groups, t.group_size
+    local = list(combinations(range(size), 2))
+    a = np.array([grp * size + x for grp in range(g) for x, _ in local])
+    b = np.array([grp * size + y for grp in range(g) for _, y in local])
+    n_teams = g * size
+
+    goals_a = rng.poisson(lam[a, b], size=(s, len(a)))
+    goals_b = rng.poisson(lam[b, a], size=(s, len(a)))
+
+    # incidence match -> équipe : les cumuls par équipe deviennent des produits matriciels
+    inc_a = np.zeros((len(a), n_teams))
+    inc_b = np.zeros((len(a), n_teams))
+    inc_a[np.arange(len(a)), a] = 1
+    inc_b[np.arange(len(a)), b] = 1
+
+    win_a = (goals_a > goals_b).astype(float)
+    win_b = (goals_b > goals_a).astype(float)
+    draw = 1.0 - win_a - win_b
+    stats = {
+        "points": (3 * win_a + draw) @ inc_a + (3 * win_b + draw) @ inc_b,
+        "goals_for": goals_a @ inc_a + goals_b @ inc_b,
+        "wins": win_a @ inc_a + win_b @ inc_b,
+    }
+    stats["goal_diff"] = stats["goals_for"] - (goals_b @ inc_a + goals_a @ inc_b)
+
+    key = np.zeros((s, n_teams))
+    for crit in t.tiebreakers:
+        key = key * 256 + stats[crit] + (128 if crit == "goal_diff" else 0)
+    key += rng.random((s, n_teams))          # tirage au sort en dernier recours
+
+    order = np.argsort(-key.reshape(s, g, size), axis=2)
+    standings = order + (np.arange(g) * size)[None, :, None]
+    return standings, key
+
+
+def _bracket(t: Tournament, standings: np.ndarray, key: np.ndarray) -> np.ndarray:
+    """Equipes (S, emplacements) du premier tour à élimination directe."""
+    s = standings.shape[0]
+    slots = np.empty((s, len(t.slots)), dtype=np.int64)
+    group_index = {name: i for i, name in enumerate(t.group_names)}
+
+    thirds = None
+    if t.best_thirds:
+        third_teams = standings[:, :, 2]                                      # (S, G)
+        third_keys = np.take_along_axis(key, third_teams, axis=1)
+        best = np.argsort(-third_keys, axis=1)[:, :t.best_thirds]            # groupes qualifiés
+        mask = (1 << best).sum(axis=1)
+        groups = t.third_table[mask]                                          # (S, emplacements 3e)
+        thirds = np.take_along_axis(third_teams, groups, axis=1)
+
+    k = 0
+    for col, (kind, rank, grp) in enumerate(t.slots):
+        if kind == "third":
+            slots[:, col] = thirds[:, k]
+            k += 1
+        else:
+            slots[:, col] = standings[:, group_index[grp], rank]
+    return slots
+
+
+def simulate_chunk(t: Tournament, lam: np.ndarray, p_adv: np.ndarray, s: int, seed) -> np.ndarray:
+    """Compteurs (N, tours) : nombre de tournois où chaque équipe atteint chaque tour."""
+    rng = np.random.default_rng(seed)
+    n_teams = len(t.teams)
+    rounds = t.rounds()
+    counts = np.zeros((n_teams, 1 + len(rounds)), dtype=np.int64)
+
+    standings, key = _group_stage(t, lam, rng, s)
+    counts[:, 0] = np.bincount(standings[:, :, 0].ravel(), minlength=n_teams)      # premier de groupe
+    alive = _bracket(t, standings, key)
+    for r in range(len(rounds)):
+        counts[:, 1 + r] = np.bincount(alive.ravel(), minlength=n_teams)
+        if alive.shape[1] == 1:
+            break
+        home, away = alive[:, 0::2], alive[:, 1::2]
+        home_wins = rng.random(home.shape) < p_adv[home, away]
+        alive = np.where(home_wins, home, away)
+    return counts
+
+
+def _run_chunk(args):
+    return simulate_chunk(*args)
+
+
+def simulate(t: Tournament, p_win: np.ndarray, p_tie: np.ndarray, n: int = 100_000,
+             workers: Optional[int] = None, seed: Optional[int] = None, chunk: int = CHUNK) -> pd.DataFrame:
+    """Probabilités d'atteindre chaque tour, une ligne par sélection (triées par titre)."""
+    lam = goal_rates(p_win)
+    p_adv = advance_matrix(p_win, p_tie)
+    sizes = [min(chunk, n - i) for i in range(0, n, chunk)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    tasks = [(t, lam, p_adv, size, sd) for size, sd in zip(sizes, seeds)]
+
+    if workers == 1 or len(tasks) == 1:
+        parts = list(map(_run_chunk, tasks))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parts = list(pool.map(_run_chunk, tasks))
+
+    counts = np.sum(parts, axis=0)
+    columns = ["group_winner"] + t.rounds()
+    out = pd.DataFrame(counts / n, columns=columns)
+    out.insert(0, "group", [t.group_names[i // t.group_size] for i in range(len(t.teams))])
+    out.insert(0, "team", t.teams)
+    return out.sort_values(["champion", "final"], ascending=False).reset_index(drop=True)
+
+
+# ============================================================
+# CLI
+# ============================================================
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulation Monte Carlo d'un tournoi de sélections.")
+    parser.add_argument("structure", type=Path, help="JSON du tournoi (ex: data/tournaments/euro2024.json)")
+    parser.add_argument("-n", "--simulations", type=int, default=100_000)
+    parser.add_argument("--workers", type=int, default=None, help="process (défaut : nombre de CPU)")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--out", type=Path, help="CSV de sortie (sinon affichage)")
+    args = parser.parse_args()
+
+    t = load_tournament(args.structure)
+    model = joblib.load(MODEL_PATH)
+    feature_cols = joblib.load(FEAT_PATH)
+    store = load_or_build("international")
+
+    unknown = [team for team in t.teams if team not in store]
+    if unknown:
+        print("⚠️ Sélections absentes de l'historique (Elo 1500, forme nulle) :", ", ".join(unknown))
+
+    t0 = time.perf_counter()
+    p_win, p_tie = outcome_matrix(model, feature_cols, store, t.teams)
+    t1 = time.perf_counter()
+    out = simulate(t, p_win, p_tie, n=args.simulations, workers=args.workers, seed=args.seed)
+    t2 = time.perf_counter()
+
+    if args.out:
+        args.out.parent.mkdir(parents=True, exist_ok=True)
+        out.to_csv(args.out, index=False)
+        print("✅ OK →", args.out, f"({len(out)} sélections)")
+    else:
+        print(out.to_string(index=False, float_format=lambda x: f"{x * 100:.1f}%"))
+    print(f"{t.name} : {args.simulations} tournois en {t2 - t1:.2f}s "
+          f"(probabilités par couple {1000 * (t1 - t0):.0f} ms, état des équipes au {store.as_of})")
+
+
+if __name__ == "__main__":
+    main()
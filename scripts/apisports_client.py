@@ -8,7 +8,7 @@ import requests
 # CONFIG API-FOOTBALL
 # ============================
 APISPORTS_KEY = os.environ.get("APISPORTS_KEY")
-API_BASE_URL = "https://v3.football.api-sports.io"
+API_BASE_URL = os.environ.get("API_FOOTBALL_BASE", "https://v3.football.api-sports.io")
 TIMEOUT = 10
 
 session = requests.Session()
@@ -1,4 +1,5 @@
 import sys
+import argparse
 from pathlib import Path
 import pandas as pd
 import joblib
@@ -7,47 +8,15 @@ ROOT = Path(__file__).resolve().parent.parent
 sys.path.append(str(ROOT))
 
 from betting.kelly import kelly_fraction  # type: ignore
+from features.elo_history import EloHistory  # type: ignore
+from features.team_state import load_or_build  # type: ignore
+from fixtures.batch import AsOfHistory, past_mask, score_batch  # type: ignore
 
 INT_DATA = ROOT / "data" / "raw" / "international.csv"
 MODEL_PATH = ROOT / "models" / "model_international.pkl"
 FEAT_PATH = ROOT / "models" / "feature_columns_international.pkl"
 
 
-def build_elo_table(df: pd.DataFrame, k: float = 20.0) -> pd.DataFrame:
-    """Elo simple pour les sélections nationales."""
-    df = df.copy()
-    df["date"] = pd.to_datetime(df["date"])
-    df = df.sort_values("date")
-
-    teams = sorted(set(df["home"]).union(df["away"]))
-    elo = {t: 1500.0 for t in teams}
-
-    rows = []
-    for _, r in df.iterrows():
-        h, a = r["home"], r["away"]
-        gh, ga = r["home_goals"], r["away_goals"]
-
-        ra, rb = elo[h], elo[a]
-        ea = 1 / (1 + 10 ** ((rb - ra) / 400))
-        eb = 1 / (1 + 10 ** ((ra - rb) / 400))
-
-        if gh > ga:
-            sa, sb = 1.0, 0.0
-        elif gh < ga:
-            sa, sb = 0.0, 1.0
-        else:
-            sa, sb = 0.5, 0.5
-
-        elo[h] = ra + k * (sa - ea)
-        elo[a] = rb + k * (sb - eb)
-
-        rows.append({"date": r["date"], "team": h, "elo": elo[h]})
-        rows.append({"date": r["date"], "team": a, "elo": elo[a]})
-
-    elo_df = pd.DataFrame(rows)
-    return elo_df
-
-
 def last_n_stats(df, team, date, n=5):
     past = df[
         ((df["home"] == team) | (df["away"] == team))
@@ -78,7 +47,61 @@ def pct(x: float) -> str:
     return f"{x*100:.1f}%"
 
 
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Prono sélections nationales. Sans argument : mode interactif."
+    )
+    parser.add_argument("--fixtures", type=Path,
+                        help="CSV avec colonnes home,away[,date,home_odds,draw_odds,away_odds]")
+    parser.add_argument("--match", action="append", default=[], metavar="HOME:AWAY",
+                        help="match à pronostiquer (répétable), ex: --match France:Espagne")
+    parser.add_argument("--out", type=Path, help="CSV de sortie (sinon affichage)")
+    return parser.parse_args()
+
+
+def run_batch(args):
+    """Mode batch : modèle et état des équipes chargés une seule fois pour tout le lot."""
+    parts = []
+    if args.fixtures:
+        parts.append(pd.read_csv(args.fixtures))
+    if args.match:
+        pairs = []
+        for m in args.match:
+            if ":" not in m:
+                print(f"❌ Format attendu HOME:AWAY, reçu '{m}'.")
+                return
+            home, away = m.split(":", 1)
+            pairs.append({"home": home.strip(), "away": away.strip()})
+        parts.append(pd.DataFrame(pairs))
+    fx = pd.concat(parts, ignore_index=True)
+
+    model = joblib.load(MODEL_PATH)
+    feature_cols = joblib.load(FEAT_PATH)
+    store = load_or_build("international")
+
+    unknown = sorted((set(fx["home"]) | set(fx["away"])) - set(store.index))
+    if unknown:
+        print("⚠️ Sélections absentes de l'historique (Elo 1500, forme nulle) :", ", ".join(map(str, unknown)))
+
+    # Matchs déjà couverts par l'historique : features à leur date, comme le mode interactif
+    history = AsOfHistory.load("international") if past_mask(store, fx).any() else None
+    out, cost_us = score_batch(model, feature_cols, store, fx, history=history)
+
+    if args.out:
+        args.out.parent.mkdir(parents=True, exist_ok=True)
+        out.to_csv(args.out, index=False)
+        print("✅ OK →", args.out, f"({len(out)} lignes)")
+    else:
+        print(out.to_string(index=False))
+    print(f"État des équipes au {store.as_of} — {cost_us:.1f} µs / prédiction")
+
+
 def main():
+    args = parse_args()
+    if args.fixtures or args.match:
+        run_batch(args)
+        return
+
     if not INT_DATA.exists():
         print("❌ Historique international introuvable :", INT_DATA)
         return
@@ -103,31 +126,31 @@ def main():
     model = joblib.load(MODEL_PATH)
     feature_cols = joblib.load(FEAT_PATH)
 
-    # Charge historique + Elo
-    df = pd.read_csv(INT_DATA, parse_dates=["date"]).sort_values("date")
-    elo_tab = build_elo_table(df)
-
-    def last_elo(team: str) -> float:
-        s = elo_tab[
-            (elo_tab["team"] == team) & (elo_tab["date"] <= date)
-        ].sort_values("date").tail(1)["elo"]
-        return float(s.squeeze()) if not s.empty else 1500.0
-
-    elo_home = last_elo(home)
-    elo_away = last_elo(away)
-
-    home_stats = last_n_stats(df, home, date)
-    away_stats = last_n_stats(df, away, date)
-
-    features = {
-        "f_elo_diff": elo_home - elo_away,
-        "home_form_goals_for": home_stats["form_goals_for"],
-        "home_form_goals_against": home_stats["form_goals_against"],
-        "home_form_points": home_stats["form_points"],
-        "away_form_goals_for": away_stats["form_goals_for"],
-        "away_form_goals_against": away_stats["form_goals_against"],
-        "away_form_points": away_stats["form_points"],
-    }
+    # Etat courant des sélections (snapshot, reconstruit si l'historique a changé)
+    store = load_or_build("international")
+
+    if store.as_of is not None and date > pd.Timestamp(store.as_of):
+        features = store.features(home, away)
+    else:
+        # Match passé : on recalcule l'Elo et la forme à la date demandée
+        df = pd.read_csv(INT_DATA, parse_dates=["date"]).sort_values("date")
+        elo = EloHistory.from_matches(df)
+
+        elo_home = elo.rating_as_of(home, date, strict=True)
+        elo_away = elo.rating_as_of(away, date, strict=True)
+
+        home_stats = last_n_stats(df, home, date)
+        away_stats = last_n_stats(df, away, date)
+
+        features = {
+            "f_elo_diff": elo_home - elo_away,
+            "home_form_goals_for": home_stats["form_goals_for"],
+            "home_form_goals_against": home_stats["form_goals_against"],
+            "home_form_points": home_stats["form_points"],
+            "away_form_goals_for": away_stats["form_goals_for"],
+            "away_form_goals_against": away_stats["form_goals_against"],
+            "away_form_points": away_stats["form_points"],
+        }
 
     X = pd.DataFrame([{col: features.get(col, 0) for col in feature_cols}])
     proba = model.predict_proba(X)[0]
@@ -0,0 +1,70 @@
+"""Jobs de scoring : un job interrompu après son premier morceau reprend au redémarrage."""
+
+import time
+
+import pandas as pd
+import pytest
+
+from api import batch_jobs
+from api.batch_jobs import JobQueue, parse_fixtures
+
+CSV = b"league,date,home,away\n" + b"".join(
+    f"FRA1,2030-01-{d:02d},Team{d},Team{d + 10}\n".encode() for d in range(1, 6)
+)
+
+
+class Crash(BaseException):
+    """Arrêt brutal du process (non rattrapé par le job, comme un kill)."""
+
+
+class FakeModels:
+    version = "v1"
+
+
+def _wait(queue: JobQueue, job_id: str, timeout: float = 10.0) -> dict:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = queue.get(job_id)
+        if job["status"] not in ("queued", "running"):
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"job toujours actif : {queue.get(job_id)}")
+
+
+def test_job_resumes_after_restart(tmp_path, monkeypatch):
+    scored = []
+
+    def fake_score(model_set, kind, chunk):
+        if len(scored) == 1:                 # parts/00000.csv est déjà écrit
+            scored.append("crash")
+            raise Crash()
+        scored.append(chunk["home"].tolist())
+        out = chunk.copy()
+        out["p_home"], out["p_draw"], out["p_away"] = 0.5, 0.3, 0.2
+        out["model"] = kind
+        return out
+
+    monkeypatch.setattr(batch_jobs, "score_chunk", fake_score)
+    first = JobQueue(FakeModels, root=tmp_path, workers=1, chunk_size=2)
+    job_id = first.submit(parse_fixtures(CSV, "text/csv"))["id"]
+    first._pool.shutdown(wait=True)
+
+    # Interrompu après le premier morceau : état "running" sur disque, un seul morceau écrit
+    assert scored[-1] == "crash"
+    assert first.get(job_id)["status"] == "running"
+    assert [p.name for p in (tmp_path / job_id / "parts").glob("*.csv")] == ["00000.csv"]
+
+    second = JobQueue(FakeModels, root=tmp_path, workers=1, chunk_size=2)
+    second.start()
+    job = _wait(second, job_id)
+
+    assert job["status"] == "done" and job["chunks_done"] == 3 and job["rows_done"] == 5
+    assert scored.count(["Team1", "Team2"]) == 1             # premier morceau pas rescoré
+    result = pd.read_csv(second.result_path(job_id))
+    assert result["home"].tolist() == [f"Team{d}" for d in range(1, 6)]
+    assert result["p_home"].eq(0.5).all()
+
+
+def test_unknown_kind_rejected():
+    with pytest.raises(ValueError, match="kind"):
+        JobQueue(FakeModels, workers=1).submit(pd.DataFrame({"home": ["A"], "away": ["B"]}), kind="clubs")
@@ -0,0 +1,47 @@
+"""Conversion incrémentale : un match programmé (score NA) ne doit ni s'écrire ni bloquer les suivants."""
+
+import pandas as pd
+
+from tooling.convert_international import update, write_full
+
+HEADER = "date,home_team,away_team,home_score,away_score,tournament,city,country,neutral\n"
+
+
+def _write_source(path, rows):
+    path.write_text(HEADER + "".join(r + "\n" for r in rows), encoding="utf-8")
+
+
+def test_scheduled_fixture_does_not_advance_watermark(tmp_path):
+    src, dst = tmp_path / "brut.csv", tmp_path / "international.csv"
+    played = "2024-06-01,France,Luxembourg,3,0,Friendly,Metz,France,False"
+    scheduled = "2024-06-20,Spain,Italy,NA,NA,UEFA Euro,Gelsenkirchen,Germany,True"
+    _write_source(src, [played, scheduled])
+    write_full(src, dst)
+    _write_source(src, [played, scheduled])
+    assert update(src, dst).empty
+
+    # Le dump gagne un résultat antérieur au match programmé, puis le score de celui-ci
+    late = "2024-06-14,Germany,Scotland,5,1,UEFA Euro,Munich,Germany,False"
+    _write_source(src, [played, late, scheduled])
+    update(src, dst)
+    _write_source(src, [played, late, scheduled.replace("NA,NA", "1,0")])
+    update(src, dst)
+
+    out = pd.read_csv(dst, parse_dates=["date"])
+    assert list(zip(out["home"], out["away"])) == [("France", "Luxembourg"), ("Germany", "Scotland"), ("Spain", "Italy")]
+    assert out["home_goals"].tolist() == [3, 5, 1]
+    assert out["home_goals"].notna().all() and out["away_goals"].notna().all()
+
+
+def test_missing_destination_columns_warn_only_when_values_are_dropped(tmp_path, capsys):
+    src, dst = tmp_path / "brut.csv", tmp_path / "international.csv"
+    dst.write_text("date,home,away,home_goals,away_goals,competition\n"
+                   "2024-06-01,France,Luxembourg,3,0,Friendly\n", encoding="utf-8")
+    _write_source(src, ["2024-06-01,France,Luxembourg,3,0,Friendly,Metz,France,False"])
+    assert update(src, dst).empty
+    assert "--full" not in capsys.readouterr().out            # rien d'ajouté, rien de perdu
+
+    _write_source(src, ["2024-06-01,France,Luxembourg,3,0,Friendly,Metz,France,False",
+                        "2024-06-05,Spain,Andorra,5,0,Friendly,Badajoz,Spain,False"])
+    assert len(update(src, dst)) == 1
+    assert "--full" in capsys.readouterr().out
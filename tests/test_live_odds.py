@@ -0,0 +1,60 @@
+"""Base de comparaison du poller /live/odds : les abonnés ne doivent pas dériver du serveur."""
+
+import asyncio
+
+from api.live_odds import OddsHub, diff
+
+
+def _poll(hub: OddsHub, snaps):
+    """Fait tourner poll_once sur une suite de snapshots ; renvoie les événements reçus par un abonné."""
+    async def run():
+        queue: asyncio.Queue = asyncio.Queue()
+        hub.subscribers[1] = {queue}
+        for snap in snaps:
+            hub._snapshot = lambda fid, snap=snap: snap
+            await hub.poll_once()
+        return [queue.get_nowait() for _ in range(queue.qsize())]
+    return asyncio.run(run())
+
+
+def test_diff_ignores_small_moves():
+    previous = {"p_home": 0.5, "p_draw": 0.3}
+    assert diff(previous, {"p_home": 0.5009, "p_draw": 0.31}, min_delta=0.001) == {"p_draw": 0.31}
+    assert diff(None, previous) == previous
+
+
+def test_small_moves_accumulate_until_pushed():
+    hub = OddsHub(fetch=lambda fid: {}, interval=0)
+    snaps = [{"p_home": round(0.5 + 0.0009 * i, 4), "p_draw": round(0.3 + 0.01 * i, 4)} for i in range(11)]
+    events = _poll(hub, snaps)
+
+    # Etat vu par l'abonné = snapshot initial + deltas successifs
+    client = {}
+    for _, payload in events:
+        client.update({k: v for k, v in payload.items() if k in ("p_home", "p_draw")})
+
+    assert events[0][0] == "snapshot"
+    assert any("p_home" in payload for kind, payload in events[1:])       # la dérive finit par partir
+    assert abs(client["p_home"] - snaps[-1]["p_home"]) < 0.001
+    assert hub.last[1] == client
+
+
+def test_poller_does_not_write_into_subscriber_trace():
+    from api import tracing
+
+    def fetch(fid):
+        with tracing.span("api_odds"):
+            return {}
+
+    async def run():
+        trace = tracing.Trace("GET", "/live/odds")
+        tracing._trace.set(trace)             # contexte de la requête qui abonne
+        hub = OddsHub(fetch=fetch, interval=0)
+        queue = hub.subscribe([1])
+        while hub.polls < 3:
+            await asyncio.sleep(0.01)
+        hub.unsubscribe(queue, [1])
+        await hub._task
+        return trace
+
+    assert asyncio.run(run()).spans == []
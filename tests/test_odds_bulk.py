@@ -0,0 +1,90 @@
+"""Ingestion en masse : N matchs d'une ligue suivie coûtent ceil(N / 10) appels /odds par intervalle."""
+
+import math
+import time
+from collections import OrderedDict
+
+import pytest
+
+from api import odds_bulk, upstream
+from api.odds import odds_params
+from api.odds_bulk import BulkRefresher
+
+BASE = "http://mock"
+PER_PAGE = 10
+N_FIXTURES = 25
+
+
+def _item(fid):
+    values = [{"value": "Home", "odd": "2.10"}, {"value": "Draw", "odd": "3.30"}, {"value": "Away", "odd": "3.60"}]
+    return {"league": {"id": 61}, "fixture": {"id": fid}, "update": "2025-11-15T10:00:00+00:00",
+            "bookmakers": [{"id": 8, "name": "Bet365", "bets": [{"name": "Match Winner", "values": values}]}]}
+
+
+@pytest.fixture
+def server(monkeypatch):
+    """Mock /odds (pages ligue/date ou match seul) qui compte les appels amont, horloge contrôlée."""
+    calls = []
+    now = [1_000_000.0]
+
+    def fake_fetch(route, url, headers, params, timeout):
+        calls.append(dict(params))
+        if "fixture" in params:
+            body = {"response": [_item(int(params["fixture"]))], "paging": {"current": 1, "total": 1}}
+        else:
+            page = int(params.get("page", 1))
+            items = [_item(fid) for fid in range(1, N_FIXTURES + 1)][(page - 1) * PER_PAGE: page * PER_PAGE]
+            body = {"response": items, "paging": {"current": page, "total": math.ceil(N_FIXTURES / PER_PAGE)}}
+        return body, f"d{len(calls)}"
+
+    monkeypatch.setattr(upstream, "_fetch_hedged", fake_fetch)
+    monkeypatch.setattr(upstream, "_last_good", OrderedDict())
+    monkeypatch.setattr(time, "time", lambda: now[0])
+    return calls, now
+
+
+def _fetch_page(params):
+    return upstream.get(BASE, "/odds", {}, params)
+
+
+def test_fixture_reads_served_from_bulk_pages_for_whole_interval(server):
+    calls, now = server
+    start = now[0]
+    refresher = BulkRefresher(_fetch_page, leagues=["61"], interval=300)
+    refresher.run_once()
+    assert len(calls) == math.ceil(N_FIXTURES / PER_PAGE)
+    assert refresher.last["61"]["fixtures"] == N_FIXTURES
+
+    # /predict_one_api_fixture lit chaque match jusqu'à la fin de l'intervalle sans appel amont
+    for elapsed in (0, 60, 299):
+        now[0] = start + elapsed
+        for fid in range(1, N_FIXTURES + 1):
+            upstream.get(BASE, "/odds", {}, odds_params(fid))
+    assert len(calls) == math.ceil(N_FIXTURES / PER_PAGE)
+
+
+def test_live_poller_ignores_bulk_ttl(server):
+    calls, now = server
+    BulkRefresher(_fetch_page, leagues=["61"], interval=300).run_once()
+    pages = len(calls)
+
+    upstream.get(BASE, "/odds", {}, odds_params(1), seeded=False)
+    assert len(calls) == pages                  # encore dans les 15 s de /odds
+
+    now[0] += upstream.FRESH_TTL["/odds"] + 1
+    upstream.get(BASE, "/odds", {}, odds_params(1), seeded=False)
+    assert len(calls) == pages + 1
+    assert calls[-1] == odds_params(1)
+
+
+def test_truncated_ingest_is_flagged_and_uncovered_fixtures_fall_back(server, monkeypatch, capsys):
+    calls, _ = server
+    monkeypatch.setattr(odds_bulk, "MAX_PAGES", 2)
+    summary = odds_bulk.ingest(_fetch_page, 61, day="2025-11-15")
+
+    assert summary["pages"] == 2 and summary["pages_total"] == 3 and not summary["complete"]
+    assert "MAX_PAGES" in capsys.readouterr().out
+    pages = len(calls)
+    upstream.get(BASE, "/odds", {}, odds_params(20))            # couvert par la page 2
+    upstream.get(BASE, "/odds", {}, odds_params(N_FIXTURES))    # page 3 non lue : appel par match
+    assert len(calls) == pages + 1 and calls[-1] == odds_params(N_FIXTURES)
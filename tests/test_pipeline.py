@@ -0,0 +1,33 @@
+"""Empreintes du pipeline : seul le code réellement référencé par une étape compte."""
+
+from tooling import pipeline
+from training import train_international
+
+
+def test_feature_stage_ignores_training_code():
+    sources = pipeline.code_sources(train_international.build_features)
+    assert "training.train_international.compute_elo_history" in sources     # helper appelé
+    assert "features.elo_history.EloHistory" in sources
+    assert "training.train_international.train" not in sources
+    assert not any(name.startswith("training.stage_report") for name in sources)
+
+
+def test_constants_read_by_the_stage_are_hashed():
+    sources = pipeline.code_sources(train_international.train)
+    assert sources["training.train_international.ALL_LABELS"] == repr(train_international.ALL_LABELS)
+
+
+def test_deploy_recorded_only_when_something_was_written(tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr(pipeline, "CACHE_DIR", tmp_path)
+    monkeypatch.setattr(pipeline, "MANIFEST", tmp_path / "manifest.json")
+    stages = [
+        pipeline.Stage(name="skipped", build=lambda inp: 1, deploy=lambda artifact, prov: False),
+        pipeline.Stage(name="written", build=lambda inp: 2, deploy=lambda artifact, prov: True),
+    ]
+    fps = pipeline.run(stages)
+
+    manifest = pipeline.load_manifest()
+    assert "deployed" not in manifest["stages"]["skipped"]
+    assert manifest["stages"]["written"]["deployed"] == fps["written"]
+    out = capsys.readouterr().out
+    assert "skipped déployée" not in out and "written déployée" in out
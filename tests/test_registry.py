@@ -0,0 +1,33 @@
+"""Registre des modèles : deux publications dans la même seconde ne se marchent pas dessus."""
+
+import json
+
+import pytest
+
+from training import registry
+
+
+@pytest.fixture
+def registry_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(registry, "REGISTRY_DIR", tmp_path)
+    monkeypatch.setattr(registry, "CURRENT", tmp_path / "current")
+    return tmp_path
+
+
+def _publish(version=None):
+    version, tmp = registry.new_version_dir(version)
+    (tmp / "__global__.pkl").write_bytes(b"model")
+    return registry.publish(tmp, version, {"features": [], "models": {}})
+
+
+def test_back_to_back_publishes_get_distinct_versions(registry_dir):
+    first, second = _publish(), _publish()
+    assert first != second and first.exists() and second.exists()
+    assert (registry_dir / "current").resolve() == second.resolve()
+
+
+def test_same_explicit_version_is_bumped(registry_dir):
+    first, second = _publish("20250101T000000"), _publish("20250101T000000")
+    assert second.name == "20250101T000000-1"
+    assert json.loads((second / "manifest.json").read_text())["version"] == second.name
+    assert (first / "__global__.pkl").read_bytes() == b"model"
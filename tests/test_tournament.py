@@ -0,0 +1,44 @@
+"""Tableau de l'Euro 2024 : affectation des meilleurs 3es selon la table officielle."""
+
+import json
+
+import pytest
+
+from fixtures.tournament import ROOT, load_tournament
+
+EURO = ROOT / "data" / "tournaments" / "euro2024.json"
+
+
+def _opponents_of_thirds(path, qualified):
+    """{adversaire: groupe du 3e} pour une combinaison de groupes qualifiés."""
+    t = load_tournament(path)
+    mask = sum(1 << t.group_names.index(g) for g in qualified)
+    groups = iter(t.third_table[mask])
+    spec = json.loads(path.read_text(encoding="utf-8"))
+    out = {}
+    for a, b in spec["knockout"]:
+        if b.startswith("3"):
+            out[a] = t.group_names[next(groups)]
+    return out
+
+
+def test_euro2024_uses_official_third_place_table():
+    # Euro 2024 réel : 3es de C, D, E, F -> Espagne-Géorgie (3F), Angleterre-Slovaquie (3E)
+    assert _opponents_of_thirds(EURO, "CDEF") == {"1B": "F", "1F": "C", "1E": "D", "1C": "E"}
+
+
+def test_first_fit_fallback_without_table(tmp_path):
+    spec = json.loads(EURO.read_text(encoding="utf-8"))
+    del spec["third_place_table"]
+    path = tmp_path / "euro.json"
+    path.write_text(json.dumps(spec), encoding="utf-8")
+    assert _opponents_of_thirds(path, "CDEF") == {"1B": "E", "1F": "C", "1E": "D", "1C": "F"}
+
+
+def test_incomplete_table_is_rejected(tmp_path):
+    spec = json.loads(EURO.read_text(encoding="utf-8"))
+    del spec["third_place_table"]["CDEF"]
+    path = tmp_path / "euro.json"
+    path.write_text(json.dumps(spec), encoding="utf-8")
+    with pytest.raises(ValueError, match="CDEF"):
+        load_tournament(path)
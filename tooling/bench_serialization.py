@@ -0,0 +1,88 @@
+"""
+Benchmark du coût de sérialisation par item : chemin FastAPI par défaut
+(Pydantic + re-validation response_model + jsonable_encoder + json.dumps)
+contre le chemin rapide de api/fast_response.py (dicts + orjson [+ gzip]).
+
+Usage :
+    python tooling/bench_serialization.py
+"""
+
+import gzip
+import json
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT))
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+
+from api.fast_response import dumps, orjson  # noqa: E402
+from api.main import InternationalBatchResponse, TeamSearchResponse  # noqa: E402
+
+SIZES = (10, 100, 1000)
+REPEAT = 20
+
+
+def international_payload(n: int) -> dict:
+    preds = []
+    for i in range(n):
+        preds.append({
+            "home": f"Home {i}", "away": f"Away {i}", "prediction": "1",
+            "p_home": 0.45 + i * 1e-6, "p_draw": 0.27, "p_away": 0.28 - i * 1e-6,
+            "value_home": 1.02, "value_draw": 0.88, "value_away": 0.91,
+            "stake_home": 0.004, "stake_draw": 0.0, "stake_away": 0.0,
+        })
+    return {"status": "ok", "as_of": "2025-11-14", "per_prediction_us": 12.5, "predictions": preds, "message": None}
+
+
+def teams_payload(n: int) -> dict:
+    teams = [
+        {"id": i, "name": f"Team {i}", "country": "France", "league": "Ligue 1",
+         "logo": f"https://media.api-sports.io/football/teams/{i}.png"}
+        for i in range(n)
+    ]
+    return {"status": "ok", "teams": teams, "message": None}
+
+
+def default_path(model_cls, payload: dict) -> bytes:
+    obj = model_cls(**payload)                                   # construction validée dans l'endpoint
+    validated = model_cls.model_validate(obj.model_dump())       # re-validation response_model
+    content = jsonable_encoder(validated)
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+def fast_path(payload: dict) -> bytes:
+    return dumps(payload)
+
+
+def fast_path_gzip(payload: dict) -> bytes:
+    return gzip.compress(dumps(payload), compresslevel=5)
+
+
+def bench(fn, *args) -> float:
+    fn(*args)  # échauffement
+    t0 = time.perf_counter()
+    for _ in range(REPEAT):
+        fn(*args)
+    return (time.perf_counter() - t0) / REPEAT
+
+
+def main():
+    print(f"Encodeur rapide : {'orjson' if orjson is not None else 'json (orjson non installé)'}")
+    print(f"{'endpoint':<22}{'items':>7}{'défaut µs/item':>17}{'rapide µs/item':>17}{'+gzip µs/item':>16}{'gain':>8}")
+    for label, model_cls, make in (
+        ("predict_international", InternationalBatchResponse, international_payload),
+        ("teams_search", TeamSearchResponse, teams_payload),
+    ):
+        for n in SIZES:
+            payload = make(n)
+            t_default = bench(default_path, model_cls, payload) / n * 1e6
+            t_fast = bench(fast_path, payload) / n * 1e6
+            t_gzip = bench(fast_path_gzip, payload) / n * 1e6
+            print(f"{label:<22}{n:>7}{t_default:>17.2f}{t_fast:>17.2f}{t_gzip:>16.2f}{t_default / t_fast:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
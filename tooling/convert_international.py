@@ -1,79 +1,214 @@
-import pandas as pd
+"""
+Conversion du dump Kaggle (results_international_brut.csv) vers data/raw/international.csv.
+
+Par défaut la conversion est incrémentale et en flux :
+  - schéma détecté sur la seule ligne d'en-tête (home_team/home, home_score/home_goals...),
+  - matchs pas encore joués (score manquant) ignorés,
+  - source lue par blocs de --chunk-rows lignes, sans charger tout le fichier,
+  - seules les lignes postérieures à la dernière date convertie (ou de ce jour-là
+    mais absentes) sont triées puis ajoutées en fin de fichier,
+  - neutral et country sont conservés,
+  - --columnar ajoute aussi ces lignes au stockage en colonnes (.npy, voir features/mmap_bundle.py).
+
+    python tooling/convert_international.py                 # ajout des nouveaux matchs
+    python tooling/convert_international.py --full          # réécriture complète
+    python tooling/convert_international.py --columnar
+"""
+
+import argparse
+import io
+import os
+import sys
+import time
 from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+import pandas as pd
 
 ROOT = Path(__file__).resolve().parent.parent
 
 SRC = ROOT / "data" / "raw" / "results_international_brut.csv"  # le fichier téléchargé
 DST = ROOT / "data" / "raw" / "international.csv"
-
-def main():
-    print("Lecture du fichier source :", SRC)
-    df = pd.read_csv(SRC)
-
-    # Adapter aux colonnes Kaggle classiques : date, home_team, away_team, home_score, away_score, tournament
-    # Si les noms diffèrent (ex: 'home' au lieu de 'home_team'), on ajustera.
-    rename_map = {}
-
-    cols = set(df.columns)
-
-    if "home_team" in cols:
-        rename_map["home_team"] = "home"
-    elif "home" in cols:
-        rename_map["home"] = "home"
-    else:
-        raise SystemExit("Impossible de trouver la colonne home_team/home dans le CSV source.")
-
-    if "away_team" in cols:
-        rename_map["away_team"] = "away"
-    elif "away" in cols:
-        rename_map["away"] = "away"
-    else:
-        raise SystemExit("Impossible de trouver la colonne away_team/away dans le CSV source.")
-
-    if "home_score" in cols:
-        rename_map["home_score"] = "home_goals"
-    elif "home_goals" in cols:
-        rename_map["home_goals"] = "home_goals"
-    else:
-        raise SystemExit("Impossible de trouver la colonne home_score/home_goals dans le CSV source.")
-
-    if "away_score" in cols:
-        rename_map["away_score"] = "away_goals"
-    elif "away_goals" in cols:
-        rename_map["away_goals"] = "away_goals"
-    else:
-        raise SystemExit("Impossible de trouver la colonne away_score/away_goals dans le CSV source.")
-
-    if "tournament" in cols:
-        rename_map["tournament"] = "competition"
-    elif "competition" in cols:
-        rename_map["competition"] = "competition"
-    else:
-        print("⚠️ Pas de colonne tournament/competition, on mettra 'Unknown'.")
+COLUMNAR_DIR = ROOT / "data" / "columnar" / "international"
+
+# colonne cible -> noms possibles dans la source (Kaggle classique en premier)
+COLUMN_ALIASES = {
+    "date": ("date",),
+    "home": ("home_team", "home"),
+    "away": ("away_team", "away"),
+    "home_goals": ("home_score", "home_goals"),
+    "away_goals": ("away_score", "away_goals"),
+    "competition": ("tournament", "competition"),
+    "country": ("country",),
+    "neutral": ("neutral",),
+}
+REQUIRED = ("date", "home", "away", "home_goals", "away_goals")
+OUT_COLUMNS = ["date", "home", "away", "home_goals", "away_goals", "competition", "country", "neutral"]
+CHUNK_ROWS = 20_000
+TAIL_BYTES = 64 * 1024
+
+
+# ============================================================
+# SCHEMA
+# ============================================================
+
+def detect_schema(columns) -> Dict[str, str]:
+    """Colonnes source -> colonnes cibles, à partir des seuls noms de colonnes."""
+    cols = set(columns)
+    schema: Dict[str, str] = {}
+    for target, candidates in COLUMN_ALIASES.items():
+        found = next((c for c in candidates if c in cols), None)
+        if found is not None:
+            schema[found] = target
+        elif target in REQUIRED:
+            raise SystemExit(f"Impossible de trouver la colonne {'/'.join(candidates)} dans le CSV source.")
+    return schema
+
+
+def read_header(path: Path) -> List[str]:
+    return list(pd.read_csv(path, nrows=0).columns)
+
+
+def _normalize(df: pd.DataFrame, schema: Dict[str, str]) -> pd.DataFrame:
+    df = df[list(schema)].rename(columns=schema)
+    if "competition" not in df.columns:
         df["competition"] = "Unknown"
-        rename_map["competition"] = "competition"
-
-    if "date" not in cols:
-        raise SystemExit("Impossible de trouver la colonne date dans le CSV source.")
+    df["date"] = pd.to_datetime(df["date"])
+    # Matchs programmés (score NA dans le dump) : jamais écrits, sinon ils avanceraient
+    # la dernière date convertie et les résultats joués avant seraient ignorés
+    df = df.dropna(subset=["home_goals", "away_goals"])
+    df = df.astype({"home_goals": "int64", "away_goals": "int64"})
+    return df[[c for c in OUT_COLUMNS if c in df.columns]]
+
+
+def convert(df: pd.DataFrame) -> pd.DataFrame:
+    """Renomme les colonnes du dump Kaggle vers le format international.csv (tout en mémoire)."""
+    schema = detect_schema(df.columns)
+    if "competition" not in schema.values():
+        print("⚠️ Pas de colonne tournament/competition, on mettra 'Unknown'.")
+    df_out = _normalize(df, schema)
+    return df_out.sort_values("date", kind="mergesort")
+
+
+# ============================================================
+# INCREMENTAL
+# ============================================================
+
+def last_converted(dst: Path) -> Tuple[Optional[pd.Timestamp], Set[Tuple[str, str]], List[str]]:
+    """
+    (dernière date, couples (home, away) déjà écrits ce jour-là, colonnes de dst),
+    en ne lisant que la fin du fichier.
+    """
+    columns = read_header(dst)
+    size = dst.stat().st_size
+    nbytes = TAIL_BYTES
+    while True:
+        with open(dst, "rb") as f:
+            f.seek(max(0, size - nbytes))
+            tail = f.read().decode("utf-8")
+        lines = tail.splitlines()
+        if size > nbytes:
+            lines = lines[1:]           # première ligne probablement tronquée
+        if not lines or lines[0].startswith("date,"):
+            lines = lines[1:]
+        if not lines:
+            return None, set(), columns
+        rows = pd.read_csv(io.StringIO("\n".join(lines)), names=columns, parse_dates=["date"])
+        last = rows["date"].max()
+        # toute la journée doit tenir dans la fenêtre lue
+        if rows["date"].iloc[0] < last or nbytes >= size:
+            same_day = rows[rows["date"] == last]
+            return last, set(zip(same_day["home"].astype(str), same_day["away"].astype(str))), columns
+        nbytes *= 4
+
+
+def iter_new_rows(src: Path, since: Optional[pd.Timestamp], chunk_rows: int = CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+    """Blocs convertis de la source, limités aux lignes datées >= since."""
+    schema = detect_schema(read_header(src))
+    for chunk in pd.read_csv(src, usecols=list(schema), chunksize=chunk_rows):
+        chunk = _normalize(chunk, schema)
+        if since is not None:
+            chunk = chunk[chunk["date"] >= since]
+        if not chunk.empty:
+            yield chunk
+
+
+def update(src: Path = SRC, dst: Path = DST, chunk_rows: int = CHUNK_ROWS) -> pd.DataFrame:
+    """Ajoute à dst les matchs de src qu'il ne contient pas encore ; retourne les lignes ajoutées."""
+    since, seen, columns = last_converted(dst)
+    parts = list(iter_new_rows(src, since, chunk_rows))
+    if not parts:
+        return pd.DataFrame(columns=columns)
+
+    new = pd.concat(parts, ignore_index=True)
+    if since is not None:
+        on_last_day = new["date"] == since
+        already = [(h, a) in seen for h, a in zip(new["home"].astype(str), new["away"].astype(str))]
+        new = new[~(on_last_day & pd.Series(already, index=new.index))]
+    new = new.sort_values("date", kind="mergesort")
+
+    missing = [c for c in columns if c not in new.columns]
+    if missing:
+        raise SystemExit(f"Colonnes {missing} absentes de la source : relance avec --full.")
+    # Prévenir seulement si des valeurs réellement présentes dans les lignes ajoutées sont perdues
+    dropped = [c for c in new.columns if c not in columns and new[c].notna().any()]
+    if dropped:
+        print(f"⚠️ {len(new)} ligne(s) ajoutée(s) sans les colonnes {dropped} absentes de {dst.name} : "
+              "relance avec --full pour les conserver.")
+
+    new = new[columns]
+    with open(dst, "a", encoding="utf-8", newline="") as f:
+        new.to_csv(f, header=False, index=False, date_format="%Y-%m-%d")
+    return new
+
+
+def write_full(src: Path = SRC, dst: Path = DST, chunk_rows: int = CHUNK_ROWS) -> pd.DataFrame:
+    df_out = pd.concat(list(iter_new_rows(src, None, chunk_rows)), ignore_index=True)
+    df_out = df_out.sort_values("date", kind="mergesort")
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    tmp = dst.with_suffix(".csv.tmp")
+    df_out.to_csv(tmp, index=False, date_format="%Y-%m-%d")
+    os.replace(tmp, dst)
+    return df_out
 
-    df = df.rename(columns=rename_map)
 
-    keep_cols = ["date", "home", "away", "home_goals", "away_goals", "competition"]
-    df_out = df[keep_cols].copy()
+def main():
+    parser = argparse.ArgumentParser(description="Conversion incrémentale du dump Kaggle des matchs internationaux.")
+    parser.add_argument("--src", type=Path, default=SRC)
+    parser.add_argument("--dst", type=Path, default=DST)
+    parser.add_argument("--full", action="store_true", help="réécrit tout international.csv")
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS)
+    parser.add_argument("--columnar", nargs="?", const=COLUMNAR_DIR, type=Path, default=None,
+                        help=f"met aussi à jour le stockage en colonnes (défaut : {COLUMNAR_DIR})")
+    args = parser.parse_args()
+
+    if not args.src.exists():
+        print("❌ Fichier source manquant :", args.src)
+        return
+
+    t0 = time.perf_counter()
+    print("Lecture du fichier source :", args.src)
+    full = args.full or not args.dst.exists()
+    written = write_full(args.src, args.dst, args.chunk_rows) if full else update(args.src, args.dst, args.chunk_rows)
+
+    if full:
+        print("✅ Fichier international.csv écrit :", args.dst)
+        print("Nombre de matchs :", len(written))
+    else:
+        print(f"✅ {len(written)} nouveau(x) match(s) ajouté(s) à {args.dst}")
 
-    # Nettoyage basique : garder uniquement les A-matchs (tu peux filtrer + tard par tournament)
-    df_out["date"] = pd.to_datetime(df_out["date"])
-    df_out = df_out.sort_values("date")
+    if args.columnar is not None:
+        sys.path.append(str(ROOT))
+        from features.mmap_bundle import append_history_columns, save_history_columns  # type: ignore
 
-    # Optionnel : filtrer sur une période récente (ex: à partir de 2000)
-    # df_out = df_out[df_out["date"] >= "2000-01-01"]
+        if full or not (args.columnar / "meta.json").exists():
+            save_history_columns(pd.read_csv(args.dst, parse_dates=["date"]), args.columnar)
+        elif len(written):
+            append_history_columns(written, args.columnar)
+        print("✅ Stockage en colonnes à jour :", args.columnar)
 
-    DST.parent.mkdir(parents=True, exist_ok=True)
-    df_out.to_csv(DST, index=False)
+    print(f"Durée : {time.perf_counter() - t0:.2f}s")
 
-    print("✅ Fichier international.csv écrit :", DST)
-    print("Nombre de matchs :", len(df_out))
 
 if __name__ == "__main__":
-    main() 
-    
\ No newline at end of file
+    main()
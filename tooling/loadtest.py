@@ -0,0 +1,230 @@
+"""
+Générateur de charge pour api/main.py, à débit cible constant (boucle ouverte).
+
+Les requêtes partent à des instants planifiés (i / rps) quel que soit le temps de
+réponse, et la latence est mesurée depuis l'instant prévu : un serveur saturé
+fait grimper les percentiles au lieu de ralentir discrètement le test.
+Le scénario (endpoint + paramètres de chaque requête) est tiré avec --seed :
+deux runs identiques envoient exactement les mêmes requêtes.
+
+Usage (tout en local, sans réseau) :
+    python tooling/loadtest.py --spawn --rps 50 --duration 30
+    python tooling/loadtest.py --spawn --rps 100 --mock-args "--latency-ms 150 --error-rate 0.02 --rate-limit 80"
+
+    # contre une API déjà lancée (branchée sur le mock via API_FOOTBALL_BASE)
+    python tooling/loadtest.py --target http://127.0.0.1:8000 --rps 50
+"""
+
+import argparse
+import json
+import os
+import shlex
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import requests
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# endpoint -> poids dans le mélange
+SCENARIO = {
+    "/predict_one_api_fixture": 0.4,
+    "/teams_search": 0.3,
+    "/find_fixture": 0.2,
+    "/predict_one": 0.1,
+}
+N_TEAMS = 200
+N_FIXTURES = 500
+
+
+# ============================================================
+# SCENARIO
+# ============================================================
+
+def team_pool(n: int = N_TEAMS) -> List[str]:
+    """Les n sélections les plus présentes dans l'historique international."""
+    src = ROOT / "data" / "raw" / "international.csv"
+    if not src.exists():
+        return [f"Team {i}" for i in range(n)]
+    df = pd.read_csv(src, usecols=["home", "away"])
+    counts = pd.concat([df["home"], df["away"]]).value_counts()
+    return [str(t) for t in counts.index[:n]]
+
+
+def build_plan(rps: float, duration: float, seed: int) -> List[Tuple[float, str, Dict[str, Any]]]:
+    """[(instant prévu en s, endpoint, paramètres)] pour tout le test."""
+    rng = np.random.default_rng(seed)
+    teams = team_pool()
+    endpoints = list(SCENARIO)
+    weights = np.array([SCENARIO[e] for e in endpoints])
+    n = int(rps * duration)
+
+    choices = rng.choice(len(endpoints), size=n, p=weights / weights.sum())
+    plan = []
+    for i, c in enumerate(choices):
+        endpoint = endpoints[c]
+        if endpoint == "/predict_one_api_fixture":
+            params = {"fixture_id": int(rng.integers(1, N_FIXTURES + 1))}
+        elif endpoint == "/teams_search":
+            params = {"name": teams[rng.integers(len(teams))]}
+        elif endpoint == "/find_fixture":
+            h, a = rng.choice(len(teams), size=2, replace=False)
+            params = {"home": teams[h], "away": teams[a]}
+        else:
+            params = {"home": teams[rng.integers(len(teams))], "away": teams[rng.integers(len(teams))]}
+        plan.append((i / rps, endpoint, params))
+    return plan
+
+
+# ============================================================
+# EXECUTION
+# ============================================================
+
+def run(target: str, plan, concurrency: int) -> List[Dict[str, Any]]:
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_maxsize=concurrency)
+    session.mount("http://", adapter)
+    results: List[Dict[str, Any]] = []
+
+    def fire(scheduled: float, endpoint: str, params: Dict[str, Any], t_start: float):
+        sent = time.perf_counter()
+        ok = False
+        try:
+            r = session.get(f"{target}{endpoint}", params=params, timeout=60)
+            ok = r.status_code == 200 and r.json().get("status") == "ok"
+        except Exception:
+            pass
+        done = time.perf_counter()
+        results.append({
+            "endpoint": endpoint,
+            "ok": ok,
+            "latency": done - (t_start + scheduled),   # depuis l'instant prévu
+            "service": done - sent,
+        })
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        t_start = time.perf_counter()
+        for scheduled, endpoint, params in plan:
+            delay = t_start + scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            pool.submit(fire, scheduled, endpoint, params, t_start)
+    results.append({"wall": time.perf_counter() - t_start})
+    return results
+
+
+def report(results: List[Dict[str, Any]], rps: float) -> Dict[str, Any]:
+    wall = results[-1]["wall"]
+    rows = pd.DataFrame(results[:-1])
+    out: Dict[str, Any] = {"target_rps": rps, "wall_s": round(wall, 2), "endpoints": {}}
+
+    def summarize(df: pd.DataFrame) -> Dict[str, Any]:
+        lat = df["latency"].to_numpy() * 1000
+        p50, p95, p99 = np.percentile(lat, [50, 95, 99]) if len(lat) else (np.nan,) * 3
+        return {
+            "requests": int(len(df)),
+            "errors": int((~df["ok"]).sum()),
+            "throughput_rps": round(len(df) / wall, 1),
+            "p50_ms": round(float(p50), 1),
+            "p95_ms": round(float(p95), 1),
+            "p99_ms": round(float(p99), 1),
+        }
+
+    for endpoint, df in rows.groupby("endpoint"):
+        out["endpoints"][endpoint] = summarize(df)
+    out["total"] = summarize(rows)
+    return out
+
+
+def print_report(rep: Dict[str, Any]):
+    print(f"\n{'endpoint':<28}{'req':>7}{'err':>6}{'rps':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}")
+    for name, s in list(rep["endpoints"].items()) + [("TOTAL", rep["total"])]:
+        print(f"{name:<28}{s['requests']:>7}{s['errors']:>6}{s['throughput_rps']:>8}"
+              f"{s['p50_ms']:>9}{s['p95_ms']:>9}{s['p99_ms']:>9}")
+    if "upstream" in rep:
+        print(f"\nAppels API-FOOTBALL (mock) : {rep['upstream']['total']} → {rep['upstream']['routes']}")
+
+
+# ============================================================
+# LANCEMENT LOCAL (mock + API)
+# ============================================================
+
+def wait_ready(url: str, timeout: float = 30.0):
+    t0 = time.monotonic()
+    while time.monotonic() - t0 < timeout:
+        try:
+            requests.get(url, timeout=1)
+            return
+        except requests.RequestException:
+            time.sleep(0.2)
+    raise RuntimeError(f"{url} ne répond pas")
+
+
+def spawn(api_port: int, mock_port: int, mock_args: str, workers: int) -> List[subprocess.Popen]:
+    env = dict(os.environ)
+    env.update({
+        "API_FOOTBALL_BASE": f"http://127.0.0.1:{mock_port}",
+        "API_FOOTBALL_KEY": "mock",
+        "PYTHONPATH": str(ROOT),
+    })
+    mock = subprocess.Popen(
+        [sys.executable, str(ROOT / "tooling" / "mock_apifootball.py"), "--port", str(mock_port)] + shlex.split(mock_args),
+        cwd=ROOT, env=env,
+    )
+    api = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "api.main:app", "--port", str(api_port),
+         "--workers", str(workers), "--log-level", "warning"],
+        cwd=ROOT, env=env,
+    )
+    wait_ready(f"http://127.0.0.1:{mock_port}/_mock/stats")
+    wait_ready(f"http://127.0.0.1:{api_port}/")
+    return [api, mock]
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Test de charge de l'API (débit cible constant).")
+    parser.add_argument("--target", default="http://127.0.0.1:8000")
+    parser.add_argument("--rps", type=float, default=20.0)
+    parser.add_argument("--duration", type=float, default=20.0, help="secondes")
+    parser.add_argument("--concurrency", type=int, default=64, help="requêtes simultanées max")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--spawn", action="store_true", help="lance le mock et l'API en local")
+    parser.add_argument("--api-port", type=int, default=8000)
+    parser.add_argument("--mock-port", type=int, default=8100)
+    parser.add_argument("--mock-args", default="", help="options passées à mock_apifootball.py")
+    parser.add_argument("--workers", type=int, default=1, help="workers uvicorn de l'API (avec --spawn)")
+    parser.add_argument("--out", default=None, help="rapport JSON")
+    args = parser.parse_args(argv)
+
+    procs: List[subprocess.Popen] = []
+    target = args.target
+    try:
+        if args.spawn:
+            procs = spawn(args.api_port, args.mock_port, args.mock_args, args.workers)
+            target = f"http://127.0.0.1:{args.api_port}"
+
+        plan = build_plan(args.rps, args.duration, args.seed)
+        print(f"🚀 {len(plan)} requêtes à {args.rps} req/s vers {target} (seed {args.seed})")
+        rep = report(run(target, plan, args.concurrency), args.rps)
+
+        if args.spawn:
+            rep["upstream"] = requests.get(f"http://127.0.0.1:{args.mock_port}/_mock/stats", timeout=5).json()
+        print_report(rep)
+
+        if args.out:
+            Path(args.out).write_text(json.dumps(rep, indent=2), encoding="utf-8")
+            print(f"✅ Rapport : {args.out}")
+    finally:
+        for p in procs:
+            p.terminate()
+            p.wait(timeout=10)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,309 @@
+"""
+Faux serveur API-FOOTBALL local, pour les tests de charge de api/main.py
+sans toucher au quota payant ni au réseau.
+
+Routes : /teams, /fixtures, /fixtures/headtohead, /odds, /predictions
+  - payload enregistré dans data/mock_apifootball/<route>/<clé>.json s'il existe
+    (voir la commande "record"), sinon payload synthétique déterministe
+    (dérivé des paramètres : même requête -> même réponse) ;
+  - latence tirée d'une loi log-normale (médiane --latency-ms, dispersion --sigma,
+    surcharge par route avec --route-latency /odds=250) ;
+  - erreurs 503 avec la probabilité --error-rate ;
+  - limitation de débit par seau à jetons (--rate-limit req/s) -> 429.
+Tous les tirages viennent d'un générateur initialisé par --seed.
+
+Usage :
+    python tooling/mock_apifootball.py --port 8100 --latency-ms 120 --error-rate 0.01 --rate-limit 100
+    API_FOOTBALL_BASE=http://127.0.0.1:8100 API_FOOTBALL_KEY=mock uvicorn api.main:app --port 8000
+
+Enregistrer une vraie réponse (clé API-FOOTBALL requise) :
+    python tooling/mock_apifootball.py record /odds fixture=1035037 timezone=Europe/Paris
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+import zlib
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import requests
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+ROOT = Path(__file__).resolve().parent.parent
+RECORD_DIR = ROOT / "data" / "mock_apifootball"
+REAL_BASE = "https://v3.football.api-sports.io"
+
+PAGE_SIZE = 10
+ROUTES = ("/teams", "/fixtures", "/fixtures/headtohead", "/odds", "/predictions")
+COUNTRIES = ("France", "Spain", "England", "Italy", "Germany", "Brazil", "Argentina", "Portugal")
+
+
+@dataclass
+class MockConfig:
+    latency_ms: float = 80.0
+    sigma: float = 0.4
+    route_latency_ms: Dict[str, float] = field(default_factory=dict)
+    error_rate: float = 0.0
+    rate_limit: float = 0.0          # req/s, 0 = illimité
+    odds_period: float = 0.0         # s ; > 0 : les cotes bougent à chaque période (flux live)
+    seed: int = 42
+
+
+# ============================================================
+# PAYLOADS
+# ============================================================
+
+def params_key(params: Dict[str, Any]) -> str:
+    canon = "&".join(f"{k}={params[k]}" for k in sorted(params))
+    return hashlib.sha1(canon.encode("utf-8")).hexdigest()[:16]
+
+
+def stable_id(*parts: Any, modulo: int = 1_000_000) -> int:
+    return zlib.crc32("|".join(map(str, parts)).encode("utf-8")) % modulo + 1
+
+
+def load_recordings(root: Path = RECORD_DIR) -> Dict[str, Dict[str, Any]]:
+    """route -> {clé des paramètres -> payload}."""
+    out: Dict[str, Dict[str, Any]] = {}
+    if not root.exists():
+        return out
+    for f in root.rglob("*.json"):
+        rec = json.loads(f.read_text(encoding="utf-8"))
+        out.setdefault(rec["route"], {})[params_key(rec["params"])] = rec["payload"]
+    return out
+
+
+def _fixture(fid: int, home_id: int, away_id: int, status: str = "NS") -> Dict[str, Any]:
+    return {
+        "fixture": {"id": fid, "date": "2025-11-15T20:45:00+01:00", "status": {"short": status}},
+        "teams": {"home": {"id": home_id}, "away": {"id": away_id}},
+    }
+
+
+def synthetic(route: str, params: Dict[str, str], cfg: MockConfig) -> List[Dict[str, Any]]:
+    """Contenu 'response' plausible et déterministe pour une requête."""
+    if route == "/teams":
+        name = params.get("search", "Team").strip().title()
+        tid = stable_id("team", name.lower(), modulo=50_000)
+        return [{
+            "team": {"id": tid, "name": name, "country": COUNTRIES[tid % len(COUNTRIES)],
+                     "logo": f"https://media.api-sports.io/football/teams/{tid}.png"},
+            "venue": {},
+        }]
+
+    if route == "/fixtures/headtohead":
+        a, _, b = params.get("h2h", "1-2").partition("-")
+        mode = "next" if "next" in params else "last"
+        return [_fixture(stable_id("h2h", a, b, mode), int(a), int(b or 0), "NS" if mode == "next" else "FT")]
+
+    if route == "/fixtures":
+        team = int(params.get("team", 1))
+        return [_fixture(stable_id("fx", team, params.get("date")), team, stable_id("opp", team, modulo=50_000))]
+
+    if route == "/odds":
+        if "fixture" not in params and "league" in params:
+            # cotes de toute une ligue pour une date (paginées par envelope)
+            league, day = params["league"], params.get("date")
+            n = 20 + stable_id("nfx", league, day, modulo=40)
+            return [_odds_item(stable_id("bulkfx", league, day, i), cfg, int(league)) for i in range(n)]
+        return [_odds_item(int(params.get("fixture", 1)), cfg)]
+
+    if route == "/predictions":
+        fid = int(params.get("fixture", 1))
+        p = np.random.default_rng(stable_id("pred", fid)).dirichlet([4.5, 2.7, 2.8])
+        pct = [f"{round(x * 100)}%" for x in p]
+        return [{"predictions": {"winner": None, "percent": {"home": pct[0], "draw": pct[1], "away": pct[2]}}}]
+
+    return []
+
+
+def _odds_item(fid: int, cfg: MockConfig, league: Optional[int] = None) -> Dict[str, Any]:
+    bucket = int(time.time() // cfg.odds_period) if cfg.odds_period > 0 else 0
+    rng = np.random.default_rng(stable_id("odds", fid, bucket))
+    p = rng.dirichlet([4.5, 2.7, 2.8])
+    margin = 1.06
+    odds_1x2 = np.round(1 / (p * margin), 2)
+    p_btts = float(rng.uniform(0.4, 0.65))
+    p_over = float(rng.uniform(0.4, 0.65))
+    return {
+        "league": {"id": league},
+        "fixture": {"id": fid},
+        "bookmakers": [{"id": 8, "name": "Bet365", "bets": [
+            {"id": 1, "name": "Match Winner", "values": [
+                {"value": "Home", "odd": f"{odds_1x2[0]:.2f}"},
+                {"value": "Draw", "odd": f"{odds_1x2[1]:.2f}"},
+                {"value": "Away", "odd": f"{odds_1x2[2]:.2f}"},
+            ]},
+            {"id": 8, "name": "Both Teams To Score", "values": [
+                {"value": "Yes", "odd": f"{1 / (p_btts * margin):.2f}"},
+                {"value": "No", "odd": f"{1 / ((1 - p_btts) * margin):.2f}"},
+            ]},
+            {"id": 5, "name": "Goals Over/Under", "values": [
+                {"value": "Over 2.5", "odd": f"{1 / (p_over * margin):.2f}"},
+                {"value": "Under 2.5", "odd": f"{1 / ((1 - p_over) * margin):.2f}"},
+            ]},
+        ]}],
+    }
+
+
+def envelope(route: str, params: Dict[str, str], response: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Enveloppe API-FOOTBALL ; /odds est paginé par PAGE_SIZE comme l'API réelle."""
+    page, total = 1, 1
+    if route == "/odds" and len(response) > PAGE_SIZE:
+        total = -(-len(response) // PAGE_SIZE)
+        page = min(max(int(params.get("page", 1)), 1), total)
+        response = response[(page - 1) * PAGE_SIZE:page * PAGE_SIZE]
+    return {
+        "get": route.lstrip("/"),
+        "parameters": params,
+        "errors": [],
+        "results": len(response),
+        "paging": {"current": page, "total": total},
+        "response": response,
+    }
+
+
+# ============================================================
+# SERVEUR
+# ============================================================
+
+class TokenBucket:
+    def __init__(self, rate: float):
+        self.rate = rate
+        self.tokens = rate
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def take(self) -> bool:
+        if self.rate <= 0:
+            return True
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens < 1:
+                return False
+            self.tokens -= 1
+            return True
+
+
+def create_app(cfg: MockConfig, recordings: Optional[Dict[str, Dict[str, Any]]] = None) -> FastAPI:
+    app = FastAPI(title="Mock API-FOOTBALL")
+    recordings = load_recordings() if recordings is None else recordings
+    rng = np.random.default_rng(cfg.seed)
+    rng_lock = threading.Lock()
+    bucket = TokenBucket(cfg.rate_limit)
+    stats: Counter = Counter()
+
+    def draw(route: str):
+        median = cfg.route_latency_ms.get(route, cfg.latency_ms)
+        with rng_lock:
+            latency = median * float(np.exp(cfg.sigma * rng.standard_normal())) / 1000
+            failed = rng.random() < cfg.error_rate
+        return latency, failed
+
+    async def serve(route: str, request: Request):
+        params = dict(request.query_params)
+        if not bucket.take():
+            stats[(route, 429)] += 1
+            return JSONResponse({"errors": {"rateLimit": "Too many requests"}}, status_code=429)
+
+        latency, failed = draw(route)
+        await asyncio.sleep(latency)
+        if failed:
+            stats[(route, 503)] += 1
+            return JSONResponse({"errors": {"server": "mock failure"}}, status_code=503)
+
+        stats[(route, 200)] += 1
+        recorded = recordings.get(route, {}).get(params_key(params))
+        return recorded if recorded is not None else envelope(route, params, synthetic(route, params, cfg))
+
+    for route in ROUTES:
+        async def endpoint(request: Request, _route: str = route):
+            return await serve(_route, request)
+        app.add_api_route(route, endpoint, methods=["GET"])
+
+    @app.get("/_mock/stats")
+    def mock_stats():
+        by_route: Dict[str, Dict[str, int]] = {}
+        for (route, status), n in stats.items():
+            by_route.setdefault(route, {})[str(status)] = n
+        return {"total": sum(stats.values()), "routes": by_route}
+
+    return app
+
+
+# ============================================================
+# ENREGISTREMENT
+# ============================================================
+
+def record(route: str, pairs: List[str]):
+    key = os.environ.get("API_FOOTBALL_KEY")
+    if not key:
+        print("❌ API_FOOTBALL_KEY manquante (nécessaire pour enregistrer).")
+        return
+    route = "/" + route.strip("/")
+    params = dict(p.split("=", 1) for p in pairs)
+    r = requests.get(f"{REAL_BASE}{route}", headers={"x-apisports-key": key}, params=params, timeout=15)
+    r.raise_for_status()
+
+    out = RECORD_DIR / route.strip("/").replace("/", "_") / f"{params_key(params)}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps({"route": route, "params": params, "payload": r.json()}, ensure_ascii=False, indent=2),
+                   encoding="utf-8")
+    print(f"✅ Enregistré : {out}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Faux serveur API-FOOTBALL pour tests de charge.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--latency-ms", type=float, default=80.0, help="latence médiane")
+    parser.add_argument("--sigma", type=float, default=0.4, help="dispersion log-normale de la latence")
+    parser.add_argument("--route-latency", action="append", default=[], metavar="ROUTE=MS",
+                        help="latence médiane d'une route (répétable)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="probabilité de 503")
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="req/s avant 429 (0 = illimité)")
+    parser.add_argument("--odds-period", type=float, default=0.0, help="période de variation des cotes (s)")
+    parser.add_argument("--seed", type=int, default=42)
+    return parser.parse_args(argv)
+
+
+def config_from_args(args) -> MockConfig:
+    route_latency = {}
+    for item in args.route_latency:
+        route, _, ms = item.partition("=")
+        route_latency["/" + route.strip("/")] = float(ms)
+    return MockConfig(
+        latency_ms=args.latency_ms, sigma=args.sigma, route_latency_ms=route_latency,
+        error_rate=args.error_rate, rate_limit=args.rate_limit, odds_period=args.odds_period, seed=args.seed,
+    )
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == "record":
+        if len(sys.argv) < 3:
+            print("Usage : python tooling/mock_apifootball.py record /route clé=valeur ...")
+            return
+        record(sys.argv[2], sys.argv[3:])
+        return
+
+    args = parse_args()
+    cfg = config_from_args(args)
+    print(f"🧪 Mock API-FOOTBALL sur http://{args.host}:{args.port} ({cfg})")
+    uvicorn.run(create_app(cfg), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
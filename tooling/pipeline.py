@@ -0,0 +1,416 @@
+"""
+Pipeline données brutes -> modèle déployé, avec cache par empreinte de contenu.
+
+Chaque étape a une empreinte (sha256) calculée à partir :
+  - du contenu des fichiers de données qu'elle lit,
+  - du code source des fonctions qu'elle appelle et, transitivement, des fonctions,
+    classes et constantes du dépôt qu'elles référencent (un helper modifié relance
+    l'étape, une modification de train() ne relance que l'entraînement),
+  - de ses paramètres,
+  - des empreintes des étapes dont elle dépend.
+
+Les artefacts intermédiaires (historique converti, table Elo, matrice de
+features, modèle) sont stockés dans data/cache/pipeline/<etape>-<empreinte>.pkl.
+Seules les étapes dont l'empreinte a changé sont recalculées : changer C du
+classifieur ne relance que l'étape d'entraînement.
+
+Usage :
+    python tooling/pipeline.py international
+    python tooling/pipeline.py club --C 0.5
+    python tooling/pipeline.py international --status
+    python tooling/pipeline.py club --force club_elo
+"""
+
+import argparse
+import ast
+import hashlib
+import inspect
+import json
+import sys
+import textwrap
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import joblib
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT))
+
+from features.build_features import build_features  # type: ignore
+from features.elo_history import EloHistory  # type: ignore
+from tooling.convert_international import convert, SRC as INT_SRC, DST as INT_DST  # type: ignore
+from training import ingest_many  # type: ignore
+from training import train_1x2  # type: ignore
+from training import train_international  # type: ignore
+
+CACHE_DIR = ROOT / "data" / "cache" / "pipeline"
+MANIFEST = CACHE_DIR / "manifest.json"
+MODELS_DIR = ROOT / "models"
+MATCHES = ROOT / "data" / "raw" / "matches.csv"
+
+DEFAULT_PARAMS = {
+    "elo_k": 20.0,
+    "elo_home_adv": 60.0,
+    "C": 1.0,
+    "max_iter": 500,
+}
+
+
+# ============================================================
+# EMPREINTES
+# ============================================================
+
+def _sha256_bytes(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def file_hash(path: Path, memo: Dict[str, Any]) -> str:
+    """
+    Hash du contenu d'un fichier, mémorisé par (taille, mtime) dans le manifeste
+    pour ne pas relire 51k lignes à chaque lancement.
+    """
+    st = path.stat()
+    key = str(path.relative_to(ROOT))
+    known = memo.get(key)
+    if known and known["size"] == st.st_size and known["mtime_ns"] == st.st_mtime_ns:
+        return known["sha256"]
+
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    digest = h.hexdigest()
+    memo[key] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha256": digest}
+    return digest
+
+
+def _module_file(name: str) -> Optional[Path]:
+    """Fichier du module `name` s'il fait partie du dépôt (pas la stdlib ni les dépendances)."""
+    base = ROOT.joinpath(*name.split("."))
+    for path in (base.with_suffix(".py"), base / "__init__.py"):
+        if path.is_file():
+            return path
+    return None
+
+
+_SIMPLE = (bool, int, float, str, bytes, tuple, list, dict, set, frozenset, type(None))
+
+
+def _is_repo(module: Optional[str]) -> bool:
+    return module is not None and (module in ("__main__", __name__) or _module_file(module) is not None)
+
+
+def _references(obj: Any) -> Iterator[Tuple[str, Any]]:
+    """(nom, valeur) des globales du module de obj que son source utilise (x et module.x)."""
+    namespace = vars(sys.modules[obj.__module__])
+    tree = ast.parse(textwrap.dedent(inspect.getsource(obj)))
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Name) and node.id in namespace:
+            yield f"{obj.__module__}.{node.id}", namespace[node.id]
+        elif isinstance(node, ast.Attribute) and isinstance(node.value, ast.Name):
+            base = namespace.get(node.value.id)
+            if inspect.ismodule(base) and _is_repo(base.__name__) and hasattr(base, node.attr):
+                yield f"{base.__name__}.{node.attr}", getattr(base, node.attr)
+
+
+def code_sources(func: Callable) -> Dict[str, str]:
+    """
+    Source de la fonction (ou classe) et, transitivement, des fonctions et classes du
+    dépôt qu'elle référence, plus la valeur des constantes de module qu'elles lisent.
+    Un helper modifié (last_n_stats imbriqué, compute_elo_history, EloHistory) change
+    l'empreinte ; le reste du module (train(), imports de training.stage_report) non.
+    """
+    out: Dict[str, str] = {}
+    todo = [func]
+    while todo:
+        obj = inspect.unwrap(todo.pop())
+        key = f"{obj.__module__}.{obj.__qualname__}"
+        if key in out:
+            continue
+        out[key] = inspect.getsource(obj)
+        for name, value in _references(obj):
+            if inspect.isfunction(value) or inspect.isclass(value):
+                if _is_repo(getattr(value, "__module__", None)):
+                    todo.append(value)
+            elif isinstance(value, _SIMPLE):
+                out.setdefault(name, repr(value))
+    return out
+
+
+def code_hash(func: Callable) -> str:
+    """Version du code = hash de code_sources(func)."""
+    return _sha256_bytes(json.dumps(code_sources(func), sort_keys=True).encode("utf-8"))
+
+
+# ============================================================
+# ETAPES
+# ============================================================
+
+@dataclass
+class Stage:
+    name: str
+    build: Callable[[Dict[str, Any]], Any]
+    deps: List[str] = field(default_factory=list)
+    files: List[Path] = field(default_factory=list)
+    code: List[Callable] = field(default_factory=list)
+    params: Dict[str, Any] = field(default_factory=dict)
+    deploy: Optional[Callable[[Any, Dict[str, Any]], bool]] = None   # False si rien n'a été écrit
+
+    def fingerprint(self, upstream: Dict[str, str], memo: Dict[str, Any]) -> str:
+        payload = {
+            "stage": self.name,
+            "params": self.params,
+            "files": {str(p.relative_to(ROOT)): file_hash(p, memo) for p in self.files},
+            "code": {f"{c.__module__}.{c.__qualname__}": code_hash(c) for c in self.code},
+            "deps": {d: upstream[d] for d in self.deps},
+        }
+        return _sha256_bytes(json.dumps(payload, sort_keys=True, default=str).encode("utf-8"))
+
+
+def _artifact_path(stage: str, fp: str) -> Path:
+    return CACHE_DIR / f"{stage}-{fp[:16]}.pkl"
+
+
+def _write_provenance(model_path: Path, provenance: Dict[str, Any]) -> None:
+    out = model_path.with_suffix(".provenance.json")
+    out.write_text(json.dumps(provenance, indent=2, ensure_ascii=False), encoding="utf-8")
+
+
+# ---------- International ----------
+
+def _int_convert(inp):
+    return convert(pd.read_csv(INT_SRC))
+
+
+def _int_deploy_history(df, provenance):
+    INT_DST.parent.mkdir(parents=True, exist_ok=True)
+    df.to_csv(INT_DST, index=False)
+    return True
+
+
+def _int_deploy_model(artifact, provenance):
+    pipe, features, metrics = artifact
+    MODELS_DIR.mkdir(parents=True, exist_ok=True)
+    joblib.dump(pipe, train_international.MODEL_PATH)
+    joblib.dump(features, train_international.FEAT_PATH)
+    _write_provenance(train_international.MODEL_PATH, {**provenance, "metrics": metrics})
+    return True
+
+
+def international_stages(params: Dict[str, Any]) -> List[Stage]:
+    return [
+        Stage(
+            name="int_convert",
+            files=[INT_SRC],
+            code=[convert, _int_convert],
+            build=_int_convert,
+            deploy=_int_deploy_history,
+        ),
+        Stage(
+            name="int_elo",
+            deps=["int_convert"],
+            code=[train_international.compute_elo_history, EloHistory],
+            params={"k": params["elo_k"]},
+            build=lambda inp: train_international.compute_elo_history(inp["int_convert"], k=params["elo_k"]),
+        ),
+        Stage(
+            name="int_features",
+            deps=["int_convert", "int_elo"],
+            code=[train_international.build_features],
+            build=lambda inp: train_international.build_features(inp["int_convert"], elo=inp["int_elo"]),
+        ),
+        Stage(
+            name="int_train",
+            deps=["int_features"],
+            code=[train_international.train, train_international.align_proba_matrix],
+            params={"C": params["C"], "max_iter": params["max_iter"]},
+            build=lambda inp: train_international.train(inp["int_features"], C=params["C"], max_iter=params["max_iter"]),
+            deploy=_int_deploy_model,
+        ),
+    ]
+
+
+# ---------- Clubs ----------
+
+def _club_sources() -> List[Path]:
+    bulk = ROOT / ingest_many.RAW_BULK
+    files = sorted(bulk.glob("*.csv"))
+    if files:
+        aliases = ROOT / ingest_many.ALIASES_FILE
+        return files + ([aliases] if aliases.exists() else [])
+    return [MATCHES]
+
+
+def _club_history(inp):
+    bulk_files = [p for p in _club_sources() if p.parent == ROOT / ingest_many.RAW_BULK]
+    if bulk_files:
+        df = ingest_many.ingest(bulk_files, ingest_many.load_aliases())
+        if df is None:
+            raise SystemExit("Après nettoyage: plus aucune ligne. Vérifie tes fichiers.")
+    else:
+        df = pd.read_csv(MATCHES)
+    df = df.copy()
+    df["date"] = pd.to_datetime(df["date"])
+    return df.sort_values("date")
+
+
+def _club_deploy_history(df, provenance):
+    # Sans fichiers bulk, matches.csv est la source : on ne la réécrit pas
+    if _club_sources() == [MATCHES]:
+        return False
+    MATCHES.parent.mkdir(parents=True, exist_ok=True)
+    df.to_csv(MATCHES, index=False)
+    return True
+
+
+def _club_deploy_model(artifact, provenance):
+    model, features, metrics = artifact
+    MODELS_DIR.mkdir(parents=True, exist_ok=True)
+    joblib.dump(model, MODELS_DIR / "model_1x2.pkl")
+    joblib.dump(features, MODELS_DIR / "feature_columns.pkl")
+    _write_provenance(MODELS_DIR / "model_1x2.pkl", {**provenance, "metrics": metrics})
+    return True
+
+
+def club_stages(params: Dict[str, Any]) -> List[Stage]:
+    return [
+        Stage(
+            name="club_history",
+            files=_club_sources(),
+            code=[ingest_many.ingest, ingest_many.standardize_columns, ingest_many.normalize_team_names, _club_history],
+            build=_club_history,
+            deploy=_club_deploy_history,
+        ),
+        Stage(
+            name="club_elo",
+            deps=["club_history"],
+            code=[EloHistory],
+            params={"k": params["elo_k"], "home_adv": params["elo_home_adv"]},
+            build=lambda inp: EloHistory.from_matches(inp["club_history"], k=params["elo_k"], home_adv=params["elo_home_adv"]),
+        ),
+        Stage(
+            name="club_features",
+            deps=["club_history", "club_elo"],
+            code=[build_features],
+            build=lambda inp: build_features(inp["club_history"], elo=inp["club_elo"]),
+        ),
+        Stage(
+            name="club_train",
+            deps=["club_features"],
+            code=[train_1x2.train, train_1x2.fit_model, train_1x2.align_proba_matrix],
+            params={"C": params["C"], "max_iter": params["max_iter"]},
+            build=lambda inp: train_1x2.train(inp["club_features"], C=params["C"], max_iter=params["max_iter"]),
+            deploy=_club_deploy_model,
+        ),
+    ]
+
+
+PIPELINES = {
+    "international": international_stages,
+    "club": club_stages,
+}
+
+
+# ============================================================
+# EXECUTION
+# ============================================================
+
+def load_manifest() -> Dict[str, Any]:
+    if MANIFEST.exists():
+        return json.loads(MANIFEST.read_text(encoding="utf-8"))
+    return {"files": {}, "stages": {}}
+
+
+def save_manifest(manifest: Dict[str, Any]) -> None:
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    tmp = MANIFEST.with_suffix(".tmp")
+    tmp.write_text(json.dumps(manifest, indent=2, sort_keys=True), encoding="utf-8")
+    tmp.replace(MANIFEST)
+
+
+def run(stages: List[Stage], force: Optional[List[str]] = None, status_only: bool = False) -> Dict[str, str]:
+    """
+    Exécute les étapes dans l'ordre. Une étape est recalculée si son empreinte
+    n'a pas d'artefact en cache (ou si elle est forcée). Retourne les empreintes.
+    """
+    force = set(force or [])
+    manifest = load_manifest()
+    fps: Dict[str, str] = {}
+    loaded: Dict[str, Any] = {}
+
+    def get_artifact(name: str) -> Any:
+        if name not in loaded:
+            loaded[name] = joblib.load(_artifact_path(name, fps[name]))
+        return loaded[name]
+
+    for stage in stages:
+        fp = stage.fingerprint(fps, manifest["files"])
+        fps[stage.name] = fp
+        path = _artifact_path(stage.name, fp)
+        fresh = path.exists() and stage.name not in force
+
+        if status_only:
+            state = "à jour" if fresh else "PÉRIMÉE"
+            print(f"  {stage.name:<15} {fp[:12]}  {state}")
+            continue
+
+        if fresh:
+            print(f"✔ {stage.name} à jour (cache {fp[:12]})")
+        else:
+            t0 = time.perf_counter()
+            inputs = {d: get_artifact(d) for d in stage.deps}
+            artifact = stage.build(inputs)
+            CACHE_DIR.mkdir(parents=True, exist_ok=True)
+            joblib.dump(artifact, path)
+            loaded[stage.name] = artifact
+            print(f"▶ {stage.name} reconstruite en {time.perf_counter() - t0:.2f}s (cache {fp[:12]})")
+
+        # Déploiement uniquement si la version déployée diffère
+        if stage.deploy is not None and manifest["stages"].get(stage.name, {}).get("deployed") != fp:
+            provenance = {
+                "stage": stage.name,
+                "fingerprint": fp,
+                "chain": {s: fps[s] for s in fps},
+                "params": stage.params,
+                "built_at": datetime.now(timezone.utc).isoformat(),
+            }
+            if stage.deploy(get_artifact(stage.name), provenance):
+                manifest["stages"].setdefault(stage.name, {})["deployed"] = fp
+                print(f"  ↳ {stage.name} déployée")
+
+        manifest["stages"].setdefault(stage.name, {})["fingerprint"] = fp
+
+    if not status_only:
+        save_manifest(manifest)
+    return fps
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pipeline données -> modèle avec cache par empreinte.")
+    parser.add_argument("pipeline", choices=sorted(PIPELINES))
+    parser.add_argument("--status", action="store_true", help="affiche les étapes périmées sans rien exécuter")
+    parser.add_argument("--force", nargs="*", default=[], help="étapes à reconstruire même si à jour")
+    parser.add_argument("--elo-k", type=float, default=DEFAULT_PARAMS["elo_k"])
+    parser.add_argument("--elo-home-adv", type=float, default=DEFAULT_PARAMS["elo_home_adv"])
+    parser.add_argument("--C", type=float, default=DEFAULT_PARAMS["C"])
+    parser.add_argument("--max-iter", type=int, default=DEFAULT_PARAMS["max_iter"])
+    args = parser.parse_args()
+
+    params = {
+        "elo_k": args.elo_k,
+        "elo_home_adv": args.elo_home_adv,
+        "C": args.C,
+        "max_iter": args.max_iter,
+    }
+    stages = PIPELINES[args.pipeline](params)
+
+    print(f"=== Pipeline {args.pipeline} ===")
+    run(stages, force=args.force, status_only=args.status)
+
+
+if __name__ == "__main__":
+    main()
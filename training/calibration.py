@@ -0,0 +1,71 @@
+"""
+Réduction d'un CalibratedClassifierCV(method="sigmoid") à un seul prédicteur calibré.
+
+L'ensemble garde cv copies de (scaler + logistique + une sigmoïde par classe) et
+moyenne leurs probabilités : cv fois le coût de predict_proba et la taille du pickle.
+Ici :
+  - les logistiques des plis (scaler replié dans les poids) sont moyennées en une seule,
+  - une seule carte de calibration (a_k, b_k par classe) est ajustée pour reproduire
+    les probabilités de l'ensemble (entropie croisée, départ = moyenne des plis),
+  - le résultat (features.mmap_bundle.CalibratedLinearModel) n'est retenu que si
+    l'écart max de probabilité reste sous COLLAPSE_TOL.
+"""
+
+import os
+from typing import Optional, Tuple
+
+import numpy as np
+from scipy.optimize import minimize
+
+from features.mmap_bundle import CalibratedLinearModel, LinearModel
+
+COLLAPSE_TOL = float(os.environ.get("CALIB_COLLAPSE_TOL", "0.01"))
+
+
+def collapse_calibrated(model, X) -> Optional[CalibratedLinearModel]:
+    """Un CalibratedLinearModel qui imite model sur X, None si l'ensemble n'est pas réductible."""
+    folds = getattr(model, "calibrated_classifiers_", None)
+    if not folds:
+        return None
+    linears = [LinearModel.from_pipeline(fold.estimator) for fold in folds]
+    if any(lin is None or list(lin.classes_) != list(model.classes_) for lin in linears):
+        return None
+    if any(type(cal).__name__ != "_SigmoidCalibration" for fold in folds for cal in fold.calibrators):
+        return None
+
+    coef = np.mean([lin.coef / lin.scale for lin in linears], axis=0)
+    intercept = np.mean([lin.intercept for lin in linears], axis=0)
+    a0 = np.mean([[cal.a_ for cal in fold.calibrators] for fold in folds], axis=0)
+    b0 = np.mean([[cal.b_ for cal in fold.calibrators] for fold in folds], axis=0)
+
+    def build(theta):
+        k = len(a0)
+        return CalibratedLinearModel(np.ones(coef.shape[1]), coef, intercept, model.classes_, theta[:k], theta[k:])
+
+    target = model.predict_proba(X)
+    Xa = np.asarray(X, dtype=float)
+
+    def loss(theta):
+        q = np.clip(build(theta).predict_proba(Xa), 1e-12, 1.0)
+        return -float((target * np.log(q)).sum()) / len(target)
+
+    res = minimize(loss, np.r_[a0, b0], method="L-BFGS-B")
+    return build(res.x if res.fun <= loss(np.r_[a0, b0]) else np.r_[a0, b0])
+
+
+def max_abs_diff(model, collapsed, *Xs) -> float:
+    return max(float(np.abs(model.predict_proba(X) - collapsed.predict_proba(X)).max()) for X in Xs if len(X))
+
+
+def collapse_if_close(model, X_fit, X_check, tol: float = COLLAPSE_TOL) -> Tuple[object, Optional[float]]:
+    """(modèle retenu, écart max) : le modèle réduit si l'écart sur X_fit et X_check est <= tol."""
+    collapsed = collapse_calibrated(model, X_fit)
+    if collapsed is None:
+        print("[Calib] Ensemble non réductible : modèle conservé tel quel.")
+        return model, None
+    diff = max_abs_diff(model, collapsed, X_fit, X_check)
+    if diff > tol:
+        print(f"[Calib] Ecart {diff:.4f} > {tol} : ensemble calibré conservé.")
+        return model, diff
+    print(f"[Calib] Ensemble réduit à un seul prédicteur calibré (écart max {diff:.4f}).")
+    return collapsed, diff
@@ -0,0 +1,256 @@
+"""
+Modèle Dixon-Coles : attaque / défense par équipe, avantage domicile,
+correction rho des petits scores, pondération temporelle exp(-xi * âge en jours).
+
+    log λ_home = mu + home_adv * (1 - neutral) + att[home] - def[away]
+    log λ_away = mu + att[away] - def[home]
+
+La vraisemblance et son gradient sont évalués en bloc avec deux matrices
+creuses d'indicatrices d'équipes (une par côté), puis optimisés par L-BFGS.
+Les paramètres du fit précédent servent de point de départ (warm start),
+et en mode clubs chaque ligue est ajustée dans un process séparé.
+
+Usage :
+    python -m training.fit_dixon_coles --source international
+    python -m training.fit_dixon_coles --source club --workers 4
+"""
+
+import argparse
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import joblib
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from scipy.optimize import minimize
+
+ROOT = Path(__file__).resolve().parent.parent
+SOURCES = {
+    "international": ROOT / "data" / "raw" / "international.csv",
+    "club": ROOT / "data" / "raw" / "matches.csv",
+}
+OUT_DIR = ROOT / "models"
+
+XI_DEFAULT = 0.0019      # ~ demi-vie d'un an
+RIDGE = 1e-3             # rend att/def identifiables (somme ~ 0)
+RHO_BOUNDS = (-0.3, 0.3)
+
+
+# ============================================================
+# MATRICES DE DESIGN
+# ============================================================
+
+def build_design(home_idx: np.ndarray, away_idx: np.ndarray, n_teams: int):
+    """
+    Xh @ [att, def] = att[home] - def[away]  (η domicile sans mu / home_adv)
+    Xa @ [att, def] = att[away] - def[home]
+    """
+    n = len(home_idx)
+    rows = np.concatenate([np.arange(n), np.arange(n)])
+    vals = np.concatenate([np.ones(n), -np.ones(n)])
+    shape = (n, 2 * n_teams)
+    Xh = sp.csr_matrix((vals, (rows, np.concatenate([home_idx, n_teams + away_idx]))), shape=shape)
+    Xa = sp.csr_matrix((vals, (rows, np.concatenate([away_idx, n_teams + home_idx]))), shape=shape)
+    return Xh, Xa
+
+
+# ============================================================
+# VRAISEMBLANCE + GRADIENT
+# ============================================================
+
+def make_objective(Xh, Xa, gh, ga, w, is_home):
+    """
+    Retourne f(θ) -> (-loglik pondérée normalisée, gradient), θ = [att, def, mu, home_adv, rho].
+    """
+    n_team_params = Xh.shape[1]
+    w_sum = w.sum()
+    XhT = Xh.T.tocsr()
+    XaT = Xa.T.tocsr()
+
+    m00 = (gh == 0) & (ga == 0)
+    m01 = (gh == 0) & (ga == 1)
+    m10 = (gh == 1) & (ga == 0)
+    m11 = (gh == 1) & (ga == 1)
+
+    def f(theta):
+        team = theta[:n_team_params]
+        mu, home_adv, rho = theta[n_team_params:]
+
+        eta_h = Xh @ team + mu + home_adv * is_home
+        eta_a = Xa @ team + mu
+        lh = np.exp(eta_h)
+        la = np.exp(eta_a)
+
+        # Poisson (sans le terme constant log y!)
+        ll = gh * eta_h - lh + ga * eta_a - la
+        d_eta_h = gh - lh
+        d_eta_a = ga - la
+        d_rho = np.zeros_like(lh)
+
+        # Correction Dixon-Coles sur 0-0, 0-1, 1-0, 1-1
+        tau = np.ones_like(lh)
+        tau[m00] = 1 - lh[m00] * la[m00] * rho
+        tau[m01] = 1 + lh[m01] * rho
+        tau[m10] = 1 + la[m10] * rho
+        tau[m11] = 1 - rho
+        tau = np.clip(tau, 1e-10, None)
+        ll += np.log(tau)
+
+        prod = lh * la
+        d_eta_h[m00] -= prod[m00] * rho / tau[m00]
+        d_eta_a[m00] -= prod[m00] * rho / tau[m00]
+        d_rho[m00] = -prod[m00] / tau[m00]
+        d_eta_h[m01] += lh[m01] * rho / tau[m01]
+        d_rho[m01] = lh[m01] / tau[m01]
+        d_eta_a[m10] += la[m10] * rho / tau[m10]
+        d_rho[m10] = la[m10] / tau[m10]
+        d_rho[m11] = -1 / tau[m11]
+
+        gw_h = w * d_eta_h
+        gw_a = w * d_eta_a
+
+        value = -(w @ ll) / w_sum + RIDGE * (team @ team)
+        grad = np.empty_like(theta)
+        grad[:n_team_params] = -(XhT @ gw_h + XaT @ gw_a) / w_sum + 2 * RIDGE * team
+        grad[n_team_params] = -(gw_h.sum() + gw_a.sum()) / w_sum
+        grad[n_team_params + 1] = -(gw_h @ is_home) / w_sum
+        grad[n_team_params + 2] = -(w @ d_rho) / w_sum
+        return value, grad
+
+    return f
+
+
+# ============================================================
+# FIT
+# ============================================================
+
+def fit(df: pd.DataFrame, xi: float = XI_DEFAULT, previous: Optional[Dict[str, Any]] = None,
+        ref_date=None) -> Dict[str, Any]:
+    """
+    Ajuste un modèle sur df (colonnes date, home, away, home_goals, away_goals[, neutral]).
+    previous : résultat d'un fit antérieur, utilisé comme point de départ.
+    """
+    df = df.dropna(subset=["home_goals", "away_goals"])
+    dates = pd.to_datetime(df["date"])
+    ref = pd.Timestamp(ref_date) if ref_date is not None else dates.max()
+    age_days = (ref - dates).dt.days.to_numpy(dtype=float)
+    w = np.exp(-xi * np.clip(age_days, 0, None))
+
+    teams = sorted(set(df["home"].astype(str)) | set(df["away"].astype(str)))
+    index = {t: i for i, t in enumerate(teams)}
+    T = len(teams)
+    home_idx = df["home"].astype(str).map(index).to_numpy()
+    away_idx = df["away"].astype(str).map(index).to_numpy()
+    gh = df["home_goals"].to_numpy(dtype=float)
+    ga = df["away_goals"].to_numpy(dtype=float)
+    if "neutral" in df.columns:
+        is_home = 1.0 - df["neutral"].astype(str).str.lower().isin(["true", "1"]).to_numpy(dtype=float)
+    else:
+        is_home = np.ones(len(df))
+
+    Xh, Xa = build_design(home_idx, away_idx, T)
+    f = make_objective(Xh, Xa, gh, ga, w, is_home)
+
+    # Point de départ : fit précédent pour les équipes connues, 0 sinon
+    theta0 = np.zeros(2 * T + 3)
+    theta0[2 * T] = np.log(max(np.average(np.r_[gh, ga], weights=np.r_[w, w]), 0.1))
+    theta0[2 * T + 1] = 0.25
+    if previous is not None:
+        prev_index = {t: i for i, t in enumerate(previous["teams"])}
+        for t, i in index.items():
+            j = prev_index.get(t)
+            if j is not None:
+                theta0[i] = previous["attack"][j]
+                theta0[T + i] = previous["defence"][j]
+        theta0[2 * T:] = [previous["mu"], previous["home_adv"], previous["rho"]]
+
+    bounds = [(None, None)] * (2 * T + 2) + [RHO_BOUNDS]
+    t0 = time.perf_counter()
+    res = minimize(f, theta0, jac=True, method="L-BFGS-B", bounds=bounds,
+                   options={"maxiter": 1000, "gtol": 1e-8})
+
+    theta = res.x
+    return {
+        "teams": teams,
+        "attack": theta[:T],
+        "defence": theta[T:2 * T],
+        "mu": float(theta[2 * T]),
+        "home_adv": float(theta[2 * T + 1]),
+        "rho": float(theta[2 * T + 2]),
+        "xi": xi,
+        "ref_date": str(ref.date()),
+        "n_matches": int(len(df)),
+        "neg_loglik": float(res.fun),
+        "iterations": int(res.nit),
+        "converged": bool(res.success),
+        "fit_seconds": time.perf_counter() - t0,
+        "warm_start": previous is not None,
+    }
+
+
+def _fit_task(args):
+    key, df, xi, previous = args
+    return key, fit(df, xi=xi, previous=previous)
+
+
+def fit_groups(df: pd.DataFrame, by: Optional[str], xi: float = XI_DEFAULT,
+               previous: Optional[Dict[str, Any]] = None, workers: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Un modèle par groupe (ligue) ajusté en parallèle ; by=None -> un seul modèle "ALL".
+    """
+    previous = previous or {}
+    if by is None or by not in df.columns:
+        groups = [("ALL", df)]
+    else:
+        groups = [(str(k), g) for k, g in df.groupby(by)]
+
+    tasks = [(key, g, xi, previous.get(key)) for key, g in groups]
+    if len(tasks) == 1 or workers == 1:
+        return dict(map(_fit_task, tasks))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return dict(pool.map(_fit_task, tasks))
+
+
+def out_path(source: str) -> Path:
+    return OUT_DIR / f"dixon_coles_{source}.pkl"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fit Dixon-Coles (attaque/défense par équipe).")
+    parser.add_argument("--source", choices=sorted(SOURCES), default="international")
+    parser.add_argument("--xi", type=float, default=XI_DEFAULT, help="décroissance temporelle par jour")
+    parser.add_argument("--workers", type=int, default=None, help="process pour les fits par ligue")
+    parser.add_argument("--cold", action="store_true", help="ignore le fit précédent (pas de warm start)")
+    args = parser.parse_args()
+
+    src = SOURCES[args.source]
+    if not src.exists():
+        print("❌ Fichier manquant :", src)
+        return
+
+    df = pd.read_csv(src)
+    out = out_path(args.source)
+    previous = None if args.cold or not out.exists() else joblib.load(out)
+
+    t0 = time.perf_counter()
+    by = "league" if args.source == "club" else None
+    fits = fit_groups(df, by=by, xi=args.xi, previous=previous, workers=args.workers)
+    elapsed = time.perf_counter() - t0
+
+    for key, res in fits.items():
+        order = np.argsort(-(res["attack"] + res["defence"]))[:5]
+        best = ", ".join(res["teams"][i] for i in order)
+        print(f"[{key}] {res['n_matches']} matchs, {len(res['teams'])} équipes, "
+              f"{res['iterations']} itérations ({res['fit_seconds']:.2f}s, warm={res['warm_start']}) "
+              f"home_adv={res['home_adv']:.3f} rho={res['rho']:.3f} — top: {best}")
+
+    OUT_DIR.mkdir(parents=True, exist_ok=True)
+    joblib.dump(fits, out)
+    print(f"✅ Saved {out} ({elapsed:.2f}s au total)")
+
+
+if __name__ == "__main__":
+    main()
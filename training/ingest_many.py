@@ -53,13 +53,8 @@ def normalize_team_names(df, aliases):
         df[col] = df[col].apply(lambda x: aliases.get(x, x))
     return df
 
-def run():
-    files = sorted(RAW_BULK.glob("*.csv"))
-    if not files:
-        print("Aucun CSV trouvé dans data/raw/bulk — copie tes fichiers puis relance.")
-        return
-
-    aliases = load_aliases()
+def ingest(files, aliases):
+    """Fusionne et nettoie les CSV bruts. Retourne None si plus aucune ligne."""
     parts = []
     for f in files:
         try:
@@ -87,8 +82,7 @@ def run():
         parts.append(dfi)
 
     if not parts:
-        print("Après nettoyage: plus aucune ligne. Vérifie tes fichiers.")
-        return
+        return None
 
     df = pd.concat(parts, ignore_index=True)
     df = df.sort_values(["league","season","date","home","away"])
@@ -99,6 +93,19 @@ def run():
         if ocol in df.columns:
             df[ocol] = df[ocol].round(3)
 
+    return df
+
+def run():
+    files = sorted(RAW_BULK.glob("*.csv"))
+    if not files:
+        print("Aucun CSV trouvé dans data/raw/bulk — copie tes fichiers puis relance.")
+        return
+
+    df = ingest(files, load_aliases())
+    if df is None:
+        print("Après nettoyage: plus aucune ligne. Vérifie tes fichiers.")
+        return
+
     OUT_FILE.parent.mkdir(parents=True, exist_ok=True)
     df.to_csv(OUT_FILE, index=False)
 
@@ -0,0 +1,149 @@
+"""
+Registre versionné des modèles 1X2 par ligue.
+
+    models/registry/1x2/<version>/
+        manifest.json      features + {ligue: {file, n_matches, metrics}} (+ "__global__")
+        __global__.pkl     modèle toutes ligues (repli)
+        FRA1.pkl, ENG1.pkl ...
+    models/registry/1x2/current -> <version>   (lien symbolique, bascule atomique)
+
+Côté lecture, ModelRegistry charge les modèles à la demande dans un cache LRU
+borné (REGISTRY_CACHE_SIZE) et route chaque ligue vers son modèle, ou vers le
+modèle global si la ligue n'a pas le sien.
+"""
+
+import json
+import os
+import shutil
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+import joblib
+
+ROOT = Path(__file__).resolve().parent.parent
+MODELS_DIR = ROOT / "models"
+REGISTRY_DIR = MODELS_DIR / "registry" / "1x2"
+CURRENT = REGISTRY_DIR / "current"
+GLOBAL = "__global__"
+
+CACHE_SIZE = int(os.environ.get("REGISTRY_CACHE_SIZE", "8"))
+
+
+# ============================================================
+# ECRITURE
+# ============================================================
+
+def new_version_dir(version: Optional[str] = None) -> Tuple[str, Path]:
+    """(version, dossier temporaire) ; publish() le renomme en dossier final."""
+    version = version or datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%f")
+    tmp = REGISTRY_DIR / f".{version}.{os.getpid()}.tmp"
+    if tmp.exists():
+        shutil.rmtree(tmp)
+    tmp.mkdir(parents=True)
+    return version, tmp
+
+
+def _free_version(version: str) -> str:
+    """version, ou version-1, version-2... si ce dossier existe déjà (deux publications rapprochées)."""
+    name, n = version, 0
+    while (REGISTRY_DIR / name).exists():
+        n += 1
+        name = f"{version}-{n}"
+    return name
+
+
+def publish(tmp: Path, version: str, manifest: Dict[str, Any], activate: bool = True, keep: int = 3) -> Path:
+    """Renomme tmp en REGISTRY_DIR/<version> (jamais par-dessus une version existante) et l'active."""
+    version = _free_version(version)
+    manifest = {"version": version, "created_at": datetime.now(timezone.utc).isoformat(), **manifest}
+    (tmp / "manifest.json").write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+    target = REGISTRY_DIR / version
+    tmp.rename(target)
+    if activate:
+        link_tmp = REGISTRY_DIR / "current.tmp"
+        if link_tmp.is_symlink() or link_tmp.exists():
+            link_tmp.unlink()
+        os.symlink(version, link_tmp)
+        os.replace(link_tmp, CURRENT)
+    active = os.path.realpath(CURRENT) if CURRENT.is_symlink() else None
+    versions = sorted(p for p in REGISTRY_DIR.iterdir() if p.is_dir() and not p.is_symlink() and not p.name.startswith("."))
+    for old in versions[:-keep]:
+        if str(old.resolve()) != active:
+            shutil.rmtree(old)
+    return target
+
+
+# ============================================================
+# LECTURE
+# ============================================================
+
+class ModelRegistry:
+    """Modèles d'une version du registre, chargés à la demande (LRU)."""
+
+    def __init__(self, path: Path, manifest: Dict[str, Any], capacity: int = CACHE_SIZE):
+        self.path = path
+        self.manifest = manifest
+        self.version = manifest["version"]
+        self.features = list(manifest["features"])
+        self.capacity = max(1, capacity)
+        self._cache: "OrderedDict[str, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.loads = 0
+        self.hits = 0
+
+    @classmethod
+    def open_current(cls, capacity: int = CACHE_SIZE) -> Optional["ModelRegistry"]:
+        """Version active du registre (lien 'current' résolu une fois), None s'il n'y en a pas."""
+        if not (CURRENT / "manifest.json").exists():
+            return None
+        path = Path(os.path.realpath(CURRENT))
+        return cls(path, json.loads((path / "manifest.json").read_text(encoding="utf-8")), capacity)
+
+    @classmethod
+    def legacy(cls) -> "ModelRegistry":
+        """Registre à un seul modèle global : models/model_1x2.pkl (avant le registre)."""
+        manifest = {
+            "version": "legacy",
+            "features": [str(c) for c in joblib.load(MODELS_DIR / "feature_columns.pkl")],
+            "models": {GLOBAL: {"file": "model_1x2.pkl"}},
+        }
+        return cls(MODELS_DIR, manifest)
+
+    @classmethod
+    def load(cls, capacity: int = CACHE_SIZE) -> "ModelRegistry":
+        return cls.open_current(capacity) or cls.legacy()
+
+    def route(self, league: Optional[str]) -> str:
+        return league if league in self.manifest["models"] else GLOBAL
+
+    def model_for(self, league: Optional[str]) -> Tuple[str, Any]:
+        """(nom du modèle retenu, modèle) pour cette ligue."""
+        name = self.route(league)
+        with self._lock:
+            model = self._cache.get(name)
+            if model is not None:
+                self._cache.move_to_end(name)
+                self.hits += 1
+                return name, model
+
+        model = joblib.load(self.path / self.manifest["models"][name]["file"])
+        with self._lock:
+            self._cache[name] = model
+            self._cache.move_to_end(name)
+            while len(self._cache) > self.capacity:
+                self._cache.popitem(last=False)
+            self.loads += 1
+        return name, model
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "version": self.version,
+            "leagues": sorted(k for k in self.manifest["models"] if k != GLOBAL),
+            "cached": list(self._cache),
+            "capacity": self.capacity,
+            "loads": self.loads,
+            "hits": self.hits,
+        }
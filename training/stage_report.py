@@ -0,0 +1,131 @@
+"""
+Rapport par étape des scripts d'entraînement : temps réel, temps CPU, pic de
+mémoire tracée (tracemalloc) et nombre de lignes.
+
+    report = StageReport("train_1x2")
+    with report.stage("read_csv") as st:
+        df = pd.read_csv(RAW)
+        st["rows"] = len(df)
+    ...
+    report.save(ROOT / "models" / "train_1x2.report.json")
+
+save() écrit le rapport à côté des artefacts et ajoute une ligne à
+models/training_reports.jsonl : l'historique permet de suivre, run après run,
+l'évolution des étapes avec le volume de données.
+
+Le pic mémoire ne couvre que les allocations Python/NumPy du process courant
+(pas les workers d'un ProcessPoolExecutor, qui mesurent les leurs).
+TRAIN_TRACE_MEMORY=0 désactive tracemalloc (il ralentit les étapes qui allouent beaucoup).
+"""
+
+import json
+import multiprocessing
+import os
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+ROOT = Path(__file__).resolve().parent.parent
+HISTORY_PATH = ROOT / "models" / "training_reports.jsonl"
+TRACE_MEMORY = os.environ.get("TRAIN_TRACE_MEMORY", "1") == "1"
+
+MB = 1024 * 1024
+
+
+def max_rss_mb() -> Optional[float]:
+    """Pic de mémoire résidente du process depuis son démarrage (toutes allocations, sans surcoût)."""
+    try:
+        import resource
+    except ImportError:     # Windows
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(rss / (MB if sys.platform == "darwin" else 1024), 1)
+
+
+class StageReport:
+    def __init__(self, script: str, trace_memory: Optional[bool] = None):
+        self.script = script
+        # Si un rapport parent trace déjà dans ce process, on ne touche pas à son pic
+        # (un worker forké hérite du traçage du parent mais a son propre pic)
+        wanted = TRACE_MEMORY if trace_memory is None else trace_memory
+        nested = tracemalloc.is_tracing() and multiprocessing.parent_process() is None
+        self.trace_memory = wanted and not nested
+        self.started_at = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        self.stages: List[Dict[str, Any]] = []
+        self.extra: Dict[str, Any] = {}
+        self._wall0 = time.perf_counter()
+        self._cpu0 = time.process_time()
+        self._peak = 0
+        if self.trace_memory:
+            tracemalloc.start()
+
+    @contextmanager
+    def stage(self, name: str, /, **attrs: Any) -> Iterator[Dict[str, Any]]:
+        """Mesure le bloc ; le dict produit peut recevoir rows=... ou d'autres compteurs."""
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+        wall0 = time.perf_counter()
+        cpu0 = time.process_time()
+        try:
+            yield attrs
+        finally:
+            entry = {
+                "name": name,
+                "wall_s": round(time.perf_counter() - wall0, 3),
+                "cpu_s": round(time.process_time() - cpu0, 3),
+            }
+            if self.trace_memory:
+                peak = tracemalloc.get_traced_memory()[1]
+                self._peak = max(self._peak, peak)
+                entry["peak_mb"] = round(peak / MB, 1)
+            entry.update(attrs)
+            self.stages.append(entry)
+
+    def as_dict(self) -> Dict[str, Any]:
+        total = {
+            "wall_s": round(time.perf_counter() - self._wall0, 3),
+            "cpu_s": round(time.process_time() - self._cpu0, 3),
+        }
+        if self.trace_memory:
+            total["peak_mb"] = round(self._peak / MB, 1)
+        total["max_rss_mb"] = max_rss_mb()
+        # les temps avec et sans tracemalloc ne se comparent pas (x3 sur les boucles Python)
+        return {"script": self.script, "started_at": self.started_at, "trace_memory": self.trace_memory,
+                "total": total, "stages": self.stages, **self.extra}
+
+    def close(self) -> Dict[str, Any]:
+        report = self.as_dict()
+        if self.trace_memory and tracemalloc.is_tracing():
+            tracemalloc.stop()
+            self.trace_memory = False
+        return report
+
+    def print(self):
+        print(f"[Rapport] {self.script}")
+        for s in self.stages:
+            mem = f"  pic {s['peak_mb']:>7.1f} Mo" if "peak_mb" in s else ""
+            rows = f"  {s['rows']} lignes" if "rows" in s else ""
+            print(f"  {s['name']:<16} {s['wall_s']:>8.3f}s réel  {s['cpu_s']:>8.3f}s CPU{mem}{rows}")
+
+    def save(self, path: Path, history: Path = HISTORY_PATH) -> Dict[str, Any]:
+        """Ecrit le rapport (JSON) à `path` et l'ajoute à l'historique (une ligne par run)."""
+        report = self.close()
+        report["report"] = str(path)
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8")
+        history.parent.mkdir(parents=True, exist_ok=True)
+        with open(history, "a", encoding="utf-8") as f:
+            f.write(json.dumps(report, ensure_ascii=False) + "\n")
+        self.print()
+        print(f"✅ Rapport d'entraînement : {path}")
+        return report
+
+
+def stage(report: Optional[StageReport], name: str, /, **attrs: Any):
+    """report.stage(...) ou un bloc non mesuré si report est None."""
+    return report.stage(name, **attrs) if report is not None else nullcontext(attrs)
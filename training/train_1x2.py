@@ -1,3 +1,8 @@
+import argparse
+import time
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+
 import pandas as pd
 from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import StandardScaler
@@ -6,10 +11,16 @@ from sklearn.metrics import log_loss
 from sklearn.linear_model import LogisticRegression
 from sklearn.calibration import CalibratedClassifierCV
 import joblib
-from features.build_features import build_features
+from features.build_features import build_features, compute_elo_history
+from training import registry
+from training.calibration import collapse_if_close
+from training.stage_report import StageReport, stage
 
+ROOT = Path(__file__).resolve().parent.parent
 RAW = "data/raw/matches.csv"
+REPORT_PATH = ROOT / "models" / "train_1x2.report.json"
 ALL_LABELS = ['away', 'draw', 'home']
+MIN_MATCHES_PER_LEAGUE = 200
 
 def align_proba_matrix(classes, proba):
     import pandas as pd
@@ -21,25 +32,10 @@ def align_proba_matrix(classes, proba):
     dfp = dfp.div(dfp.sum(axis=1), axis=0)
     return dfp.values
 
-if __name__ == "__main__":
-    df = pd.read_csv(RAW, parse_dates=["date"]).sort_values("date")
-    df_feat = build_features(df)
-    features = [c for c in df_feat.columns if c.startswith(("f_","home_form_","away_form_"))]
-    X = df_feat[features]
-    y = df_feat["target_1x2"]
-
-    try:
-        X_train, X_test, y_train, y_test = train_test_split(
-            X, y, test_size=0.3, shuffle=True, stratify=y, random_state=42
-        )
-    except ValueError:
-        X_train, X_test, y_train, y_test = train_test_split(
-            X, y, test_size=0.3, shuffle=True, random_state=42
-        )
-
+def fit_model(X_train, y_train, C=1.0, max_iter=500):
     base = Pipeline([
         ("scaler", StandardScaler(with_mean=False)),
-        ("clf", LogisticRegression(max_iter=500, class_weight="balanced", multi_class="auto"))
+        ("clf", LogisticRegression(C=C, max_iter=max_iter, class_weight="balanced", multi_class="auto"))
     ])
 
     model = None
@@ -58,18 +54,146 @@ if __name__ == "__main__":
         model = base
         model.fit(X_train, y_train)
 
-    p_train = model.predict_proba(X_train)
-    p_test  = model.predict_proba(X_test)
-    classes = model.classes_
+    return model
+
+def train(df_feat, C=1.0, max_iter=500, collapse=False, report=None):
+    """
+    Entraîne le modèle 1X2. Retourne (model, features, metrics).
+    collapse : réduit l'ensemble calibré à un seul prédicteur (training/calibration.py).
+    report : StageReport optionnel (étapes fit, collapse, evaluate).
+    """
+    features = [c for c in df_feat.columns if c.startswith(("f_","home_form_","away_form_"))]
+    X = df_feat[features]
+    y = df_feat["target_1x2"]
+
+    try:
+        X_train, X_test, y_train, y_test = train_test_split(
+            X, y, test_size=0.3, shuffle=True, stratify=y, random_state=42
+        )
+    except ValueError:
+        X_train, X_test, y_train, y_test = train_test_split(
+            X, y, test_size=0.3, shuffle=True, random_state=42
+        )
+
+    with stage(report, "fit", rows=len(X_train)):      # logistique + calibration CV
+        model = fit_model(X_train, y_train, C=C, max_iter=max_iter)
+    collapse_diff = None
+    if collapse:
+        with stage(report, "collapse", rows=len(X_train) + len(X_test)):
+            model, collapse_diff = collapse_if_close(model, X_train, X_test)
+
+    with stage(report, "evaluate", rows=len(X_train) + len(X_test)):
+        p_train = model.predict_proba(X_train)
+        p_test  = model.predict_proba(X_test)
+        classes = model.classes_
+
+        p_train_al = align_proba_matrix(classes, p_train)
+        p_test_al  = align_proba_matrix(classes, p_test)
+
+        metrics = {
+            "classes": [str(c) for c in classes],
+            "logloss_train": float(log_loss(y_train, p_train_al, labels=ALL_LABELS)),
+            "logloss_test": float(log_loss(y_test,  p_test_al,  labels=ALL_LABELS)),
+        }
+    if collapse_diff is not None:
+        metrics["collapse_max_abs_diff"] = collapse_diff
+    return model, features, metrics
+
+def _train_league(args):
+    """Worker : entraîne un modèle et l'écrit directement dans le dossier de version."""
+    name, df_feat, out_dir, C, max_iter, collapse = args
+    t0 = time.perf_counter()
+    report = StageReport(name)      # mémoire tracée seulement dans un worker (pas sous le rapport parent)
+    try:
+        model, features, metrics = train(df_feat, C=C, max_iter=max_iter, collapse=collapse, report=report)
+    except ValueError as e:
+        report.close()
+        return name, None, f"{e}", None
+    with report.stage("dump"):
+        joblib.dump(model, out_dir / f"{name}.pkl")
+    metrics["n_matches"] = int(len(df_feat))
+    metrics["fit_seconds"] = round(time.perf_counter() - t0, 3)
+    return name, metrics, None, report.close()["stages"]
+
+
+def train_per_league(df_feat, C=1.0, max_iter=500, min_matches=MIN_MATCHES_PER_LEAGUE, workers=None,
+                     collapse=False, report=None):
+    """
+    Un modèle par ligue (si assez de matchs) + un modèle global, en parallèle,
+    publiés comme nouvelle version du registre. Retourne le dossier de version.
+    report : StageReport optionnel (étape train + détail par ligue dans report.extra["leagues"]).
+    """
+    version, tmp = registry.new_version_dir()
+    tasks = [(registry.GLOBAL, df_feat, tmp, C, max_iter, collapse)]
+    for league, group in df_feat.groupby("league"):
+        if len(group) >= min_matches:
+            tasks.append((str(league), group, tmp, C, max_iter, collapse))
+        else:
+            print(f"[{league}] {len(group)} matchs < {min_matches} : modèle global utilisé")
+
+    with stage(report, "train", rows=len(df_feat), models=len(tasks)):
+        if len(tasks) == 1 or workers == 1:
+            results = list(map(_train_league, tasks))
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                results = list(pool.map(_train_league, tasks))
+    if report is not None:
+        report.extra["leagues"] = {name: stages for name, _, _, stages in results if stages is not None}
+
+    models = {}
+    for name, metrics, error, _ in results:
+        if error is not None:
+            print(f"[{name}] échec de l'entraînement ({error}) : ignoré")
+            continue
+        print(f"[{name}] {metrics['n_matches']} matchs, logloss test {metrics['logloss_test']:.4f} "
+              f"({metrics['fit_seconds']}s)")
+        models[name] = {"file": f"{name}.pkl", "n_matches": metrics.pop("n_matches"), "metrics": metrics}
+    if registry.GLOBAL not in models:
+        raise SystemExit("Le modèle global n'a pas pu être entraîné.")
+
+    features = [c for c in df_feat.columns if c.startswith(("f_","home_form_","away_form_"))]
+    with stage(report, "publish"):
+        return registry.publish(tmp, version, {"features": features, "min_matches": min_matches, "models": models})
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Entraînement du modèle 1X2 (clubs).")
+    parser.add_argument("--per-league", action="store_true", help="un modèle par ligue + global, dans models/registry/")
+    parser.add_argument("--workers", type=int, default=None, help="process pour les modèles par ligue")
+    parser.add_argument("--min-matches", type=int, default=MIN_MATCHES_PER_LEAGUE,
+                        help="matchs minimum pour qu'une ligue ait son modèle")
+    parser.add_argument("--collapse", action="store_true",
+                        help="réduit l'ensemble calibré (cv=3) à un seul prédicteur calibré")
+    args = parser.parse_args()
+
+    report = StageReport("train_1x2")
+    with report.stage("read_csv") as st:
+        df = pd.read_csv(RAW, parse_dates=["date"]).sort_values("date")
+        st["rows"] = len(df)
+    with report.stage("elo", rows=len(df)):
+        elo = compute_elo_history(df)
+    with report.stage("form_features", rows=len(df)):
+        df_feat = build_features(df, elo=elo)
+
+    if args.per_league:
+        target = train_per_league(df_feat, min_matches=args.min_matches, workers=args.workers,
+                                  collapse=args.collapse, report=report)
+        print(f"✅ Registre publié et activé : {target}")
+        report.save(Path(target) / "report.json")
+        raise SystemExit(0)
 
-    p_train_al = align_proba_matrix(classes, p_train)
-    p_test_al  = align_proba_matrix(classes, p_test)
+    model, features, metrics = train(df_feat, collapse=args.collapse, report=report)
 
     print("Features utilisées:", features)
-    print("Classes apprises:", list(classes))
-    print("LogLoss train:", log_loss(y_train, p_train_al, labels=ALL_LABELS))
-    print("LogLoss test:",  log_loss(y_test,  p_test_al,  labels=ALL_LABELS))
+    print("Classes apprises:", metrics["classes"])
+    print("LogLoss train:", metrics["logloss_train"])
+    print("LogLoss test:",  metrics["logloss_test"])
+    if "collapse_max_abs_diff" in metrics:
+        print("Ecart max vs ensemble calibré:", metrics["collapse_max_abs_diff"])
 
-    joblib.dump(model, "models/model_1x2.pkl")
-    joblib.dump(features, "models/feature_columns.pkl")
+    with report.stage("dump"):
+        joblib.dump(model, "models/model_1x2.pkl")
+        joblib.dump(features, "models/feature_columns.pkl")
     print("Saved models/model_1x2.pkl and models/feature_columns.pkl")
+    report.extra["metrics"] = metrics
+    report.save(REPORT_PATH)
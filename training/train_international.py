@@ -7,14 +7,24 @@ from sklearn.metrics import log_loss
 from sklearn.linear_model import LogisticRegression
 import joblib
 
+from features.elo_history import EloHistory
+from training.stage_report import StageReport, stage
+
 ROOT = Path(__file__).resolve().parent.parent
 DATA = ROOT / "data" / "raw" / "international.csv"
 MODEL_PATH = ROOT / "models" / "model_international.pkl"
 FEAT_PATH = ROOT / "models" / "feature_columns_international.pkl"
+REPORT_PATH = ROOT / "models" / "train_international.report.json"
 
 ALL_LABELS = ["home", "draw", "away"]
 
-def build_features(df: pd.DataFrame) -> pd.DataFrame:
+def compute_elo_history(df: pd.DataFrame, k: float = 20) -> EloHistory:
+    """Elo simple par équipe nationale (pas d'avantage domicile), séries par équipe interrogeables à une date."""
+    df = df.copy()
+    df["date"] = pd.to_datetime(df["date"])
+    return EloHistory.from_matches(df, k=k, home_adv=0.0)
+
+def build_features(df: pd.DataFrame, elo: EloHistory = None) -> pd.DataFrame:
     df = df.copy()
     df["date"] = pd.to_datetime(df["date"])
     df = df.sort_values("date")
@@ -30,42 +40,12 @@ def build_features(df: pd.DataFrame) -> pd.DataFrame:
             target.append("draw")
     df["target_1x2"] = target
 
-    # Elo simple par équipe nationale
-    # On va réutiliser une logique simple interne (Elo pour sélections)
-    teams = sorted(set(df["home"]).union(df["away"]))
-    elo = {t: 1500.0 for t in teams}
+    # Elo simple par équipe nationale, lu strictement avant le jour du match (jointure as-of)
+    if elo is None:
+        elo = compute_elo_history(df)
 
-    k = 20  # facteur K
-    elo_hist = []
-    for _, r in df.iterrows():
-        h, a = r["home"], r["away"]
-        gh, ga = r["home_goals"], r["away_goals"]
-        ra, rb = elo[h], elo[a]
-        ea = 1 / (1 + 10 ** ((rb - ra) / 400))
-        eb = 1 / (1 + 10 ** ((ra - rb) / 400))
-
-        if gh > ga:
-            sa, sb = 1.0, 0.0
-        elif gh < ga:
-            sa, sb = 0.0, 1.0
-        else:
-            sa, sb = 0.5, 0.5
-
-        elo[h] = ra + k * (sa - ea)
-        elo[a] = rb + k * (sb - eb)
-
-        elo_hist.append({
-            "date": r["date"],
-            "home": h,
-            "away": a,
-            "elo_home": elo[h],
-            "elo_away": elo[a],
-        })
-
-    elo_df = pd.DataFrame(elo_hist)
-
-    df = df.merge(elo_df[["date","home","elo_home"]], on=["date","home"], how="left")
-    df = df.merge(elo_df[["date","away","elo_away"]], on=["date","away"], how="left")
+    df["elo_home"] = elo.ratings_as_of(df["home"], df["date"], strict=True)
+    df["elo_away"] = elo.ratings_as_of(df["away"], df["date"], strict=True)
 
     df["f_elo_diff"] = df["elo_home"] - df["elo_away"]
 
@@ -123,19 +103,15 @@ def align_proba_matrix(classes, proba):
     dfp = dfp.div(dfp.sum(axis=1), axis=0)
     return dfp.values
 
-def main():
-    if not DATA.exists():
-        print("❌ Fichier international manquant :", DATA)
-        return
+FEATURES = [
+    "f_elo_diff",
+    "home_form_goals_for","home_form_goals_against","home_form_points",
+    "away_form_goals_for","away_form_goals_against","away_form_points",
+]
 
-    df_raw = pd.read_csv(DATA)
-    df_feat = build_features(df_raw)
-
-    features = [
-        "f_elo_diff",
-        "home_form_goals_for","home_form_goals_against","home_form_points",
-        "away_form_goals_for","away_form_goals_against","away_form_points",
-    ]
+def train(df_feat: pd.DataFrame, C: float = 1.0, max_iter: int = 500, report: StageReport = None):
+    """Entraîne la logistique internationale. Retourne (pipe, features, metrics)."""
+    features = list(FEATURES)
 
     X = df_feat[features]
     y = df_feat["target_1x2"]
@@ -151,28 +127,55 @@ def main():
 
     pipe = Pipeline([
         ("scaler", StandardScaler(with_mean=False)),
-        ("clf", LogisticRegression(max_iter=500, class_weight="balanced", multi_class="auto")),
+        ("clf", LogisticRegression(C=C, max_iter=max_iter, class_weight="balanced", multi_class="auto")),
     ])
 
-    pipe.fit(X_train, y_train)
+    with stage(report, "fit", rows=len(X_train)):
+        pipe.fit(X_train, y_train)
 
-    p_train = pipe.predict_proba(X_train)
-    p_test = pipe.predict_proba(X_test)
-    classes = pipe.classes_
+    with stage(report, "evaluate", rows=len(X_train) + len(X_test)):
+        p_train = pipe.predict_proba(X_train)
+        p_test = pipe.predict_proba(X_test)
+        classes = pipe.classes_
 
-    p_train_al = align_proba_matrix(classes, p_train)
-    p_test_al = align_proba_matrix(classes, p_test)
+        p_train_al = align_proba_matrix(classes, p_train)
+        p_test_al = align_proba_matrix(classes, p_test)
 
-    print("Features utilisées:", features)
-    print("Classes apprises:", list(classes))
-    print("LogLoss train:", log_loss(y_train, p_train_al, labels=ALL_LABELS))
-    print("LogLoss test:", log_loss(y_test, p_test_al, labels=ALL_LABELS))
+        metrics = {
+            "classes": [str(c) for c in classes],
+            "logloss_train": float(log_loss(y_train, p_train_al, labels=ALL_LABELS)),
+            "logloss_test": float(log_loss(y_test, p_test_al, labels=ALL_LABELS)),
+        }
+    return pipe, features, metrics
+
+def main():
+    if not DATA.exists():
+        print("❌ Fichier international manquant :", DATA)
+        return
 
-    MODEL_PATH.parent.mkdir(parents=True, exist_ok=True)
-    joblib.dump(pipe, MODEL_PATH)
-    joblib.dump(features, FEAT_PATH)
+    report = StageReport("train_international")
+    with report.stage("read_csv") as st:
+        df_raw = pd.read_csv(DATA)
+        st["rows"] = len(df_raw)
+    with report.stage("elo", rows=len(df_raw)):
+        elo = compute_elo_history(df_raw)
+    with report.stage("form_features", rows=len(df_raw)):
+        df_feat = build_features(df_raw, elo=elo)
+
+    pipe, features, metrics = train(df_feat, report=report)
+
+    print("Features utilisées:", features)
+    print("Classes apprises:", metrics["classes"])
+    print("LogLoss train:", metrics["logloss_train"])
+    print("LogLoss test:", metrics["logloss_test"])
+
+    with report.stage("dump"):
+        MODEL_PATH.parent.mkdir(parents=True, exist_ok=True)
+        joblib.dump(pipe, MODEL_PATH)
+        joblib.dump(features, FEAT_PATH)
     print("✅ Saved", MODEL_PATH, "and", FEAT_PATH)
+    report.extra["metrics"] = metrics
+    report.save(REPORT_PATH)
 
 if __name__ == "__main__":
-    main() 
-    
\ No newline at end of file
+    main()